@@ -0,0 +1,73 @@
+"""
+Wall time of running a large generated script with lox: compiling it
+without the cache, compiling it and writing the cache and loading it
+from the cache. The script mostly declares things, so the time is spent
+getting it ready to run rather than running it.
+
+    python bench/caching.py [megabytes] [runs]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append("./src")
+from program_cache import cache_path
+
+CHUNK = """
+class Point{n} {{
+    init(x, y) {{ this.x = x; this.y = y; }}
+    distance(other) {{
+        var dx = this.x - other.x;
+        var dy = this.y - other.y;
+        if (dx < 0) dx = -dx;
+        return dx * dx + dy * dy;
+    }}
+}}
+fun farthest{n}(points, count) {{
+    var best = 0;
+    for (var i = 0; i < count; i = i + 1) best = best + i * 2 - 1;
+    return best;
+}}
+"""
+
+
+def run(script: str, *args: str) -> float:
+    start: float = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "src/main.py", *args, script],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main(megabytes: float, runs: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        script: str = os.path.join(directory, "generated.lox")
+        with open(script, "w") as file:
+            count: int = int(megabytes * 1e6 / len(CHUNK))
+            file.write("".join(CHUNK.format(n=n) for n in range(count)))
+            file.write('print "done";\n')
+        print(f"{os.path.getsize(script) / 1e6:.1f}MB script")
+
+        compiling: float = min(run(script, "--no-cache") for _ in range(runs))
+        print(f"--no-cache      {compiling:.2f}s")
+
+        storing: float = float("inf")
+        for _ in range(runs):
+            if os.path.exists(cache_path(script)):
+                os.remove(cache_path(script))
+            storing = min(storing, run(script))
+        print(f"writing cache   {storing:.2f}s")
+
+        loading: float = min(run(script) for _ in range(runs))
+        print(f"loading cache   {loading:.2f}s")
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 2,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
@@ -0,0 +1,39 @@
+"""
+Memory used per LoxInstance, for instances that all get the same fields.
+
+    python bench/instances.py [count]
+"""
+import sys
+import tracemalloc
+
+sys.path.append("./src")
+from _token import Token
+from loxcallable import LoxClass, LoxInstance
+from token_type import TokenType
+
+FIELDS = ["x", "y", "z"]
+
+
+def main(count: int) -> None:
+    klass = LoxClass("Point", None, {})
+    names = [Token(TokenType.IDENTIFIER, field, None, 1) for field in FIELDS]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = []
+    for i in range(count):
+        instance = LoxInstance(klass)
+        for name in names:
+            instance.set(name, float(i))
+        instances.append(instance)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # The floats and the list holding the instances aren't per-instance cost
+    overhead = sys.getsizeof(instances) + count * len(FIELDS) * sys.getsizeof(1.0)
+    print(f"{count} instances with {len(FIELDS)} fields")
+    print(f"{(after - before - overhead) / count:.1f} bytes per instance")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,69 @@
+"""
+Startup time, scanning time and peak memory of loading a large generated
+script the way run_file used to, reading its lines into one str, against
+memory mapping it and scanning the bytes. Each way runs in a process of
+its own so their peak memory doesn't mix, the tokens are streamed and
+dropped like lox --stream does.
+
+    python bench/loading.py [megabytes]
+"""
+import collections
+import mmap
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append("./src")
+from regex_scanner import RegexScanner
+
+CHUNK = """// Points and the distances between them
+class Point {
+    init(x, y) { this.x = x; this.y = y; }
+    distance(other) {
+        var dx = this.x - other.x;
+        return dx * dx + (this.y - other.y) * (this.y - other.y);
+    }
+}
+print "distance: " + "far";
+"""
+
+WAYS = ["readlines", "mmap"]
+
+
+def load(way: str, path: str) -> None:
+    start: float = time.perf_counter()
+    if way == "readlines":
+        source = "\n".join(open(path).readlines())[:-1]
+    else:
+        with open(path, "rb") as file:
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    loaded: float = time.perf_counter()
+    collections.deque(RegexScanner(source).scan(), maxlen=0)
+    scanned: float = time.perf_counter()
+
+    peak: float = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{way:10} startup {loaded - start:.3f}s  "
+        f"scanning {scanned - loaded:.1f}s  peak RSS {peak:.0f}MB"
+    )
+
+
+def main(megabytes: float) -> None:
+    with tempfile.NamedTemporaryFile("w", suffix=".lox", delete=False) as file:
+        file.write(CHUNK * int(megabytes * 1e6 / len(CHUNK)))
+    try:
+        print(f"{os.path.getsize(file.name) / 1e6:.0f}MB of source")
+        for way in WAYS:
+            subprocess.run([sys.executable, __file__, way, file.name], check=True)
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in WAYS:
+        load(sys.argv[1], sys.argv[2])
+    else:
+        main(float(sys.argv[1]) if len(sys.argv) > 1 else 100)
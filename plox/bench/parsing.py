@@ -0,0 +1,68 @@
+"""
+Parsing throughput in MB/s and tokens/s on large generated sources, best
+of a few runs each. The tokens are scanned once up front, only Parser is
+timed.
+
+    python bench/parsing.py [megabytes] [runs]
+"""
+import sys
+import time
+
+sys.path.append("./src")
+from parser import Parser
+
+from _token import Token
+from regex_scanner import RegexScanner
+
+SOURCES = {
+    # Mostly statements, expressions are short
+    "statements": """
+class Point {
+    init(x, y) { this.x = x; this.y = y; }
+    distance(other) {
+        var dx = this.x - other.x;
+        if (dx < 0) dx = -dx;
+        return dx;
+    }
+}
+for (var i = 0; i < 10; i = i + 1) { print Point(i, 2).distance(Point(1, i)); }
+while (false) { var skipped = nil; }
+""",
+    # Long expressions mixing every precedence level
+    "expressions": """
+var a = 1 + 2 * 3 - 4 / 5 + (6 - 7) * -8 == 9 or !true and 10 >= 11;
+var b = a.field.other(1, 2 + 3, a * (b - c)).last = x = y + z * w - v / u;
+print ((((1 + 2) * (3 - 4)) / ((5 + 6) * (7 - 8))) + f(g(h(1), 2), 3));
+""",
+}
+
+
+def error(*args) -> None:
+    raise Exception(args)
+
+
+def throughput(tokens: list[Token], runs: int) -> float:
+    best: float = float("inf")
+    for _ in range(runs):
+        start: float = time.process_time()
+        Parser(tokens, error).parse()
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main(megabytes: float, runs: int) -> None:
+    for name, chunk in SOURCES.items():
+        source: str = chunk * int(megabytes * 1e6 / len(chunk))
+        tokens: list[Token] = RegexScanner(source).scan_tokens()
+        best: float = throughput(tokens, runs)
+        print(
+            f"{name:12} {len(source) / 1e6:.1f}MB {len(tokens)} tokens  "
+            f"{len(source) / best / 1e6:.2f} MB/s  {len(tokens) / best:,.0f} tokens/s"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 2,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
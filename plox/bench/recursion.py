@@ -0,0 +1,76 @@
+"""
+Time spent in recursive Lox code by the tree-walking engines, best of a few
+runs each. The shallow programs stay within what the recursive Interpreter
+can run, the deep one only runs stackless.
+
+    python bench/recursion.py [runs]
+"""
+import sys
+import time
+
+sys.path.append("./src")
+from parser import Parser
+
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stackless import StacklessInterpreter
+
+PROGRAMS = {
+    "fib(22)": """
+        fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fib(22);""",
+    "sum(60) x 2000": """
+        fun sum(n) { if (n == 0) return 0; return n + sum(n - 1); }
+        for (var i = 0; i < 2000; i = i + 1) sum(60);""",
+    "list length(60) x 2000": """
+        class Node {
+            init(next) { this.next = next; }
+            length() { if (this.next == nil) return 1; return 1 + this.next.length(); }
+        }
+        var list = nil;
+        for (var i = 0; i < 60; i = i + 1) list = Node(list);
+        for (var i = 0; i < 2000; i = i + 1) list.length();""",
+}
+
+DEEP = {
+    "sum(200000)": """
+        fun sum(n) { if (n == 0) return 0; return n + sum(n - 1); }
+        sum(200000);""",
+}
+
+
+def error(*args) -> None:
+    raise Exception(args)
+
+
+def time_run(engine: type, source: str) -> float:
+    scanner: Scanner = Scanner(source)
+    scanner.scan_tokens()
+    stmts = Parser(scanner.tokens, error).parse()
+    interpreter: Interpreter = engine(error)
+    Resolver(interpreter).resolve(stmts)
+
+    start: float = time.process_time()
+    interpreter.interpret(stmts)
+    return time.process_time() - start
+
+
+def main(runs: int) -> None:
+    engines: list[type] = [Interpreter, StacklessInterpreter]
+    for name, source in PROGRAMS.items():
+        best: dict[type, float] = {engine: float("inf") for engine in engines}
+        for _ in range(runs):
+            for engine in engines:
+                best[engine] = min(best[engine], time_run(engine, source))
+        print(
+            f"{name:24} interpreter {best[Interpreter]:.3f}s  "
+            f"stackless {best[StacklessInterpreter]:.3f}s"
+        )
+
+    for name, source in DEEP.items():
+        print(f"{name:24} stackless {time_run(StacklessInterpreter, source):.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,57 @@
+"""
+Time the Resolver takes on generated code nested some number of blocks
+deep, with a number of references in the innermost block. Half of them
+name the outermost local and half a global, the two lookups that have to
+look past every scope in between. Best of a few runs each.
+
+    python bench/resolving.py [runs]
+"""
+import sys
+import time
+
+sys.path.append("./src")
+from parser import Parser
+
+from interpreter import Interpreter
+from regex_scanner import RegexScanner
+from resolver import Resolver
+
+DEPTHS = [10, 50, 100, 200]
+REFERENCES = [1000, 10000]
+
+
+def error(*args) -> None:
+    raise Exception(args)
+
+
+def generate(depth: int, references: int) -> str:
+    opened: str = "".join(f"{{ var v{i} = {i};\n" for i in range(depth))
+    used: str = "print v0 + g;\n" * (references // 2)
+    return "var g = 1;\n" + opened + used + "}" * depth
+
+
+def time_resolve(source: str, runs: int) -> float:
+    stmts = Parser(RegexScanner(source).scan(), error).parse()
+    best: float = float("inf")
+    for _ in range(runs):
+        resolver: Resolver = Resolver(Interpreter(error))
+        start: float = time.process_time()
+        resolver.resolve(stmts)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+def main(runs: int) -> None:
+    # Every nested block is a few Python calls deep in both Parser and Resolver
+    sys.setrecursionlimit(10000)
+    print("depth " + "".join(f"{references:>12} refs" for references in REFERENCES))
+    for depth in DEPTHS:
+        times: list[float] = [
+            time_resolve(generate(depth, references), runs)
+            for references in REFERENCES
+        ]
+        print(f"{depth:5} " + "".join(f"{seconds:16.3f}s" for seconds in times))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
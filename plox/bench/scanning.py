@@ -0,0 +1,54 @@
+"""
+Scanning throughput of Scanner and RegexScanner in MB/s on a generated
+source of a few megabytes, best of a few runs each.
+
+    python bench/scanning.py [megabytes] [runs]
+"""
+import sys
+import time
+
+sys.path.append("./src")
+from regex_scanner import RegexScanner
+from scanner import Scanner
+
+CHUNK = """// Points and the distances between them
+class Point {
+    init(x, y) { this.x = x; this.y = y; }
+    distance(other) {
+        var dx = this.x - other.x;
+        var dy = this.y - other.y;
+        return dx * dx + dy * dy;
+    }
+}
+fun farthest(points, count) {
+    var best = 0;
+    for (var i = 0; i < count; i = i + 1) {
+        if (points.distance(Point(i, 2.5)) >= best and !false) best = i;
+    }
+    print "farthest: " + "point";
+    return best;
+}
+"""
+
+
+def throughput(scanner: type, source: str, runs: int) -> float:
+    best: float = float("inf")
+    for _ in range(runs):
+        start: float = time.process_time()
+        scanner(source).scan_tokens()
+        best = min(best, time.process_time() - start)
+    return len(source.encode()) / best / 1e6
+
+
+def main(megabytes: float, runs: int) -> None:
+    source: str = CHUNK * int(megabytes * 1e6 / len(CHUNK))
+    print(f"{len(source.encode()) / 1e6:.1f}MB of source")
+    for scanner in (Scanner, RegexScanner):
+        print(f"{scanner.__name__:14} {throughput(scanner, source, runs):.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 4,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
@@ -0,0 +1,73 @@
+"""
+Time to build a string by appending to it in a loop, s = s + piece, for a
+growing number of appends. Each engine should take about twice as long for
+twice the appends.
+
+    python bench/strings.py [appends]
+"""
+import contextlib
+import io
+import sys
+import time
+
+sys.path.append("./src")
+from parser import Parser
+
+from closure_compiler import ClosureInterpreter
+from compiler import Compiler
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from vm import VM
+
+SOURCE = """
+var s = ">";
+for (var i = 0; i < {appends}; i = i + 1) s = s + "line of text";
+print s;"""
+
+
+def error(*args) -> None:
+    raise Exception(args)
+
+
+def time_run(engine: str, appends: int) -> float:
+    scanner: Scanner = Scanner(SOURCE.format(appends=appends))
+    scanner.scan_tokens()
+    stmts = Parser(scanner.tokens, error).parse()
+
+    if engine == "vm":
+        compiler: Compiler = Compiler(error)
+        Resolver(compiler).resolve(stmts)
+        function = compiler.compile(stmts)
+
+        def run() -> None:
+            VM(error).interpret(function)
+
+    else:
+        interpreter: Interpreter = (
+            Interpreter(error) if engine == "interpreter" else ClosureInterpreter(error)
+        )
+        Resolver(interpreter).resolve(stmts)
+
+        def run() -> None:
+            interpreter.interpret(stmts)
+
+    # Printing flattens the string, which is part of what's measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        start: float = time.process_time()
+        run()
+        return time.process_time() - start
+
+
+def main(appends: int) -> None:
+    counts: list[int] = [appends // 4, appends // 2, appends]
+    for engine in ["interpreter", "closure", "vm"]:
+        times: list[float] = [time_run(engine, count) for count in counts]
+        columns = "  ".join(
+            f"{count:>7} {elapsed:.3f}s" for count, elapsed in zip(counts, times)
+        )
+        print(f"{engine:12} {columns}  x{times[-1] / times[0]:.1f} for x4 appends")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -4,6 +4,8 @@ from token_type import TokenType
 
 
 class Token:
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(
         self, type: TokenType, lexeme: str, literal: Optional[str], line: int
     ) -> None:
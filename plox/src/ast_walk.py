@@ -0,0 +1,49 @@
+from typing import Any, Dict
+
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr,
+                        QuickBinaryExpr, QuickUnaryExpr, SetExpr, SuperExpr,
+                        ThisExpr, UnaryExpr, VariableExpr)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+
+# Fields of each node that hold child nodes or lists of them. Walking vars()
+# instead would make CPython give every node a real __dict__, which slows
+# down reading the nodes' attributes for the rest of the run.
+CHILDREN: Dict[type, tuple[str, ...]] = {
+    AssignExpr: ("value",),
+    BinaryExpr: ("left", "right"),
+    QuickBinaryExpr: ("left", "right"),
+    CallExpr: ("callee", "arguments"),
+    GetExpr: ("object",),
+    GroupingExpr: ("expression",),
+    LiteralExpr: (),
+    LogicalExpr: ("left", "right"),
+    SetExpr: ("object", "value"),
+    SuperExpr: (),
+    ThisExpr: (),
+    UnaryExpr: ("right",),
+    QuickUnaryExpr: ("right",),
+    VariableExpr: (),
+    BlockStmt: ("statements",),
+    ClassStmt: ("superclass", "methods"),
+    ExpressionStmt: ("expression",),
+    ForStmt: ("initializer", "condition", "increment", "body"),
+    FunctionStmt: ("body",),
+    IfStmt: ("condition", "then_branch", "else_branch"),
+    PrintStmt: ("expression",),
+    ReturnStmt: ("value",),
+    VarStmt: ("initializer",),
+    WhileStmt: ("condition", "body"),
+}
+
+
+def children(node: Expr | Stmt) -> list[Any]:
+    result: list[Any] = []
+    for field in CHILDREN[type(node)]:
+        child: Any = getattr(node, field)
+        if isinstance(child, list):
+            result.extend(child)
+        elif child is not None:
+            result.append(child)
+    return result
@@ -0,0 +1,104 @@
+from enum import IntEnum, auto
+from typing import Any
+
+
+class OpCode(IntEnum):
+    OP_CONSTANT = 0
+    OP_NIL = auto()
+    OP_TRUE = auto()
+    OP_FALSE = auto()
+    OP_POP = auto()
+    OP_GET_LOCAL = auto()
+    OP_SET_LOCAL = auto()
+    OP_GET_GLOBAL = auto()
+    OP_SET_GLOBAL = auto()
+    OP_DEFINE_GLOBAL = auto()
+    OP_GET_UPVALUE = auto()
+    OP_SET_UPVALUE = auto()
+    OP_GET_PROPERTY = auto()
+    OP_SET_PROPERTY = auto()
+    OP_GET_SUPER = auto()
+    OP_EQUAL = auto()
+    OP_GREATER = auto()
+    OP_LESS = auto()
+    OP_ADD = auto()
+    OP_SUBTRACT = auto()
+    OP_MULTIPLY = auto()
+    OP_DIVIDE = auto()
+    OP_NOT = auto()
+    OP_NEGATE = auto()
+    OP_PRINT = auto()
+    OP_JUMP = auto()
+    OP_JUMP_IF_FALSE = auto()
+    OP_LOOP = auto()
+    OP_CALL = auto()
+    OP_INVOKE = auto()
+    OP_SUPER_INVOKE = auto()
+    OP_CLOSURE = auto()
+    OP_CLOSE_UPVALUE = auto()
+    OP_RETURN = auto()
+    OP_CLASS = auto()
+    OP_INHERIT = auto()
+    OP_METHOD = auto()
+
+
+class Chunk:
+    """
+    Unlike clox the code is a list of python ints, so operands are stored
+    in a single slot and jump operands are absolute offsets into code.
+    """
+
+    def __init__(self) -> None:
+        self.code: list[int] = []
+        self.lines: list[int] = []
+        self.constants: list[Any] = []
+
+    def write(self, byte: int, line: int) -> None:
+        self.code.append(int(byte))
+        self.lines.append(line)
+
+    def add_constant(self, value: Any) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def disassemble(self, name: str) -> str:
+        lines = [f"== {name} =="]
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            width = OPERAND_COUNT.get(op, 0)
+            operands = self.code[offset + 1 : offset + 1 + width]
+            if op == OpCode.OP_CLOSURE:
+                function = self.constants[operands[0]]
+                width += 2 * function.upvalue_count
+                operands = self.code[offset + 1 : offset + 1 + width]
+            lines.append(
+                f"{offset:04d} {self.lines[offset]:4d} {op.name:<16} "
+                + " ".join(str(operand) for operand in operands)
+            )
+            offset += 1 + width
+        return "\n".join(lines)
+
+
+OPERAND_COUNT: dict[OpCode, int] = {
+    OpCode.OP_CONSTANT: 1,
+    OpCode.OP_GET_LOCAL: 1,
+    OpCode.OP_SET_LOCAL: 1,
+    OpCode.OP_GET_GLOBAL: 1,
+    OpCode.OP_SET_GLOBAL: 1,
+    OpCode.OP_DEFINE_GLOBAL: 1,
+    OpCode.OP_GET_UPVALUE: 1,
+    OpCode.OP_SET_UPVALUE: 1,
+    OpCode.OP_GET_PROPERTY: 1,
+    OpCode.OP_SET_PROPERTY: 1,
+    OpCode.OP_GET_SUPER: 1,
+    OpCode.OP_JUMP: 1,
+    OpCode.OP_JUMP_IF_FALSE: 1,
+    OpCode.OP_LOOP: 1,
+    OpCode.OP_CALL: 1,
+    OpCode.OP_INVOKE: 2,
+    OpCode.OP_SUPER_INVOKE: 2,
+    OpCode.OP_CLOSURE: 1,
+    OpCode.OP_CLASS: 1,
+    OpCode.OP_METHOD: 1,
+}
@@ -0,0 +1,603 @@
+from typing import Any, Callable, Dict, Optional
+
+from _token import Token
+from counted_loop import CountedLoop, counted_loop
+from environment import Environment, SlotEnvironment
+from expression import (AssignExpr, BinaryExpr, CallExpr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
+                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from inline_cache import GetCache, SetCache
+from interpreter import Interpreter, LoxRuntimeError
+from loxcallable import (RETURN, TAIL_CALL, LoxCallable, LoxClass, LoxFunction,
+                         LoxInstance)
+from rope import concat, is_string
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import NUMBER_OPS, TokenType
+
+Closure = Callable[[Environment], Any]
+
+
+class ClosureInterpreter(Interpreter):
+    """
+    Runs a program by compiling it into closures with ClosureCompiler first.
+    LoxFunction calls back into execute_body with a function declaration,
+    whose body the compiler has already turned into a closure.
+    """
+
+    def interpret(self, stmts: list[Stmt]) -> bool:
+        program: list[Closure] = ClosureCompiler(self).compile(stmts)
+        try:
+            for stmt in program:
+                stmt(self.globals)
+        except LoxRuntimeError as e:
+            self.error(1, e.args[0])
+            return False
+        return True
+
+    def execute_body(self, declaration: FunctionStmt, environment: SlotEnvironment):
+        return declaration.compiled(environment)
+
+
+class ClosureCompiler(Visitor):
+    def __init__(self, interpreter: ClosureInterpreter) -> None:
+        self.interpreter: ClosureInterpreter = interpreter
+        self.globals: Environment = interpreter.globals
+        # Anything declared below the top level lives in a SlotEnvironment
+        self.scope_depth: int = 0
+
+    def compile(self, stmts: list[Stmt]) -> list[Closure]:
+        return [self.compile_node(stmt) for stmt in stmts]
+
+    def compile_node(self, node: Any) -> Closure:
+        return node.accept(self)
+
+    def compile_body(self, stmts: list[Stmt]) -> Closure:
+        self.scope_depth += 1
+        compiled: list[Closure] = self.compile(stmts)
+        self.scope_depth -= 1
+
+        def body(env: Environment) -> Any:
+            for stmt in compiled:
+                result = stmt(env)
+                if result is RETURN or result is TAIL_CALL:
+                    return result
+
+        return body
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> Closure:
+        body: Closure = self.compile_body(stmt.statements)
+
+        def block(env: Environment) -> Any:
+            return body(SlotEnvironment(env))
+
+        return block
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> Closure:
+        name: Token = stmt.name
+        superclass_expr: Optional[Closure] = None
+        if stmt.superclass is not None:
+            superclass_expr = self.compile_node(stmt.superclass)
+
+        methods: list[FunctionStmt] = stmt.methods
+        for method in methods:
+            method.compiled = self.compile_body(method.body)
+        define: Closure = self.define(name.lexeme)
+
+        def klass(env: Environment) -> None:
+            superclass: Any = None
+            if superclass_expr is not None:
+                superclass = superclass_expr(env)
+                if not isinstance(superclass, LoxClass):
+                    raise Exception(f"{name.lexeme} superclass must be a class")
+
+            closure: Environment | SlotEnvironment = env
+            if superclass is not None:
+                closure = SlotEnvironment(env)
+                closure.values.append(superclass)
+
+            functions: Dict[str, LoxFunction] = {
+                method.name.lexeme: LoxFunction(
+                    method, closure, method.name.lexeme == "init"
+                )
+                for method in methods
+            }
+            define(env, LoxClass(name.lexeme, superclass, functions))
+
+        return klass
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> Closure:
+        return self.compile_node(stmt.expression)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> Closure:
+        stmt.compiled = self.compile_body(stmt.body)
+        define: Closure = self.define(stmt.name.lexeme)
+        new_function = self.interpreter.new_function
+
+        def function(env: Environment) -> None:
+            define(env, new_function(stmt, env))
+
+        return function
+
+    def visit_if_stmt(self, stmt: IfStmt) -> Closure:
+        condition: Closure = self.compile_node(stmt.condition)
+        then_branch: Closure = self.compile_node(stmt.then_branch)
+
+        if stmt.else_branch is None:
+
+            def if_then(env: Environment) -> Any:
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+
+            return if_then
+
+        else_branch: Closure = self.compile_node(stmt.else_branch)
+
+        def if_else(env: Environment) -> Any:
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+
+        return if_else
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> Closure:
+        expression: Closure = self.compile_node(stmt.expression)
+        stringify = self.interpreter.stringify
+
+        def print_(env: Environment) -> None:
+            print(stringify(expression(env)))
+
+        return print_
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> Closure:
+        interpreter: ClosureInterpreter = self.interpreter
+        if stmt.value is None:
+
+            def return_nil(env: Environment) -> Any:
+                interpreter.return_value = None
+                return RETURN
+
+            return return_nil
+
+        if type(stmt.value) is CallExpr and stmt.value.tail:
+            call: Closure = self.call(stmt.value, True)
+
+            def return_call(env: Environment) -> Any:
+                result = call(env)
+                if result is TAIL_CALL:
+                    return TAIL_CALL
+                interpreter.return_value = result
+                return RETURN
+
+            return return_call
+
+        value: Closure = self.compile_node(stmt.value)
+
+        def return_(env: Environment) -> Any:
+            interpreter.return_value = value(env)
+            return RETURN
+
+        return return_
+
+    def visit_var_stmt(self, stmt: VarStmt) -> Closure:
+        lexeme: str = stmt.name.lexeme
+        if stmt.initializer is None:
+            define: Callable[[Any, Any], None] = self.define(lexeme)
+            return lambda env: define(env, None)
+
+        initializer: Closure = self.compile_node(stmt.initializer)
+
+        if self.scope_depth == 0:
+
+            def var_global(env: Environment) -> None:
+                env.values[lexeme] = initializer(env)
+
+            return var_global
+
+        def var(env: SlotEnvironment) -> None:
+            env.values.append(initializer(env))
+
+        return var
+
+    def define(self, lexeme: str) -> Callable[[Any, Any], None]:
+        if self.scope_depth == 0:
+
+            def define_global(env: Environment, value: Any) -> None:
+                env.values[lexeme] = value
+
+            return define_global
+
+        return lambda env, value: env.values.append(value)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> Closure:
+        condition: Closure = self.compile_node(stmt.condition)
+        body: Closure = self.compile_node(stmt.body)
+
+        def while_(env: Environment) -> Any:
+            value = condition(env)
+            while value is not None and value is not False:
+                result = body(env)
+                if result is RETURN or result is TAIL_CALL:
+                    return result
+                value = condition(env)
+
+        return while_
+
+    def visit_for_stmt(self, stmt: ForStmt) -> Closure:
+        self.scope_depth += 1
+        initializer: Optional[Closure] = None
+        if stmt.initializer is not None:
+            initializer = self.compile_node(stmt.initializer)
+        condition: Optional[Closure] = None
+        if stmt.condition is not None:
+            condition = self.compile_node(stmt.condition)
+        increment: Optional[Closure] = None
+        if stmt.increment is not None:
+            increment = self.compile_node(stmt.increment)
+        body: Closure = self.compile_node(stmt.body)
+        self.scope_depth -= 1
+
+        def loop(env: SlotEnvironment) -> Any:
+            while True:
+                if condition is not None:
+                    value = condition(env)
+                    if value is None or value is False:
+                        return None
+                result = body(env)
+                if result is RETURN or result is TAIL_CALL:
+                    return result
+                if increment is not None:
+                    increment(env)
+
+        counted: Optional[CountedLoop] = counted_loop(stmt)
+        if counted is None:
+
+            def for_(env: Environment) -> Any:
+                env = SlotEnvironment(env)
+                if initializer is not None:
+                    initializer(env)
+                return loop(env)
+
+            return for_
+
+        compare = counted.compare
+        step: float = counted.step
+        constant: Optional[float] = counted.constant()
+        self.scope_depth += 1
+        bound: Closure = self.compile_node(counted.bound)
+        self.scope_depth -= 1
+
+        def counted_for(env: Environment) -> Any:
+            env = SlotEnvironment(env)
+            initializer(env)
+            values: list[Any] = env.values
+            while True:
+                i = values[0]
+                limit = constant if constant is not None else bound(env)
+                if type(i) is not float or type(limit) is not float:
+                    return loop(env)
+                if not compare(i, limit):
+                    return None
+                result = body(env)
+                if result is RETURN or result is TAIL_CALL:
+                    return result
+                values[0] = i + step
+
+        return counted_for
+
+    def visit_assign_expr(self, expr: AssignExpr) -> Closure:
+        value: Closure = self.compile_node(expr.value)
+        distance: Optional[int] = expr.depth
+        slot: int = expr.slot
+        name: Token = expr.name
+
+        if distance is None:
+            globals: Environment = self.globals
+
+            def assign_global(env: Environment) -> Any:
+                result = value(env)
+                globals.assign(name, result)
+                return result
+
+            return assign_global
+
+        if distance == 0:
+
+            def assign_local(env: SlotEnvironment) -> Any:
+                result = value(env)
+                env.values[slot] = result
+                return result
+
+            return assign_local
+
+        def assign_at(env: SlotEnvironment) -> Any:
+            result = value(env)
+            env.ancestor(distance).values[slot] = result
+            return result
+
+        return assign_at
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> Closure:
+        left: Closure = self.compile_node(expr.left)
+        right: Closure = self.compile_node(expr.right)
+        op: Token = expr.operator
+        check = self.interpreter.check_number_operands
+
+        match op.type:
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right(env)
+
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+
+            case TokenType.PLUS:
+
+                def plus(env: Environment) -> Any:
+                    lhs = left(env)
+                    rhs = right(env)
+                    if type(lhs) is float and type(rhs) is float:
+                        return lhs + rhs
+                    if is_string(lhs) and is_string(rhs):
+                        return concat(lhs, rhs)
+                    raise Exception(f"Trying to + smth? {type(lhs)} and {type(rhs)}")
+
+                return plus
+
+        number_op = NUMBER_OPS[op.type]
+
+        if isinstance(expr.right, LiteralExpr) and type(expr.right.value) is float:
+            constant: float = expr.right.value
+
+            def number_constant(env: Environment) -> Any:
+                lhs = left(env)
+                if type(lhs) is not float:
+                    check(op, lhs, constant)
+                return number_op(lhs, constant)
+
+            return number_constant
+
+        def number(env: Environment) -> Any:
+            lhs = left(env)
+            rhs = right(env)
+            if type(lhs) is not float or type(rhs) is not float:
+                check(op, lhs, rhs)
+            return number_op(lhs, rhs)
+
+        return number
+
+    def visit_call_expr(self, expr: CallExpr) -> Closure:
+        return self.call(expr, False)
+
+    def call(self, expr: CallExpr, tail: bool) -> Closure:
+        """Tail calls to Lox functions are left to LoxFunction.run's trampoline"""
+        if type(expr.callee) is GetExpr:
+            return self.invoke(expr, expr.callee, tail)
+
+        callee: Closure = self.compile_node(expr.callee)
+        arguments: list[Closure] = [self.compile_node(arg) for arg in expr.arguments]
+        arg_count: int = len(arguments)
+        interpreter: ClosureInterpreter = self.interpreter
+        paren: Token = expr.paren
+
+        def call(env: Environment) -> Any:
+            function = callee(env)
+            values: list[Any] = [argument(env) for argument in arguments]
+
+            if not isinstance(function, LoxCallable):
+                interpreter.error(paren, "Can only call functions and classes")
+                raise LoxRuntimeError("Trying to call non function")
+
+            if arg_count != function.arity():
+                raise LoxRuntimeError(
+                    f"Expected {function.arity()} arguments but got {arg_count}."
+                )
+
+            if tail and type(function) is LoxFunction:
+                interpreter.tail_call = (function, function.closure, values)
+                return TAIL_CALL
+
+            return function.call(interpreter, values)
+
+        return call
+
+    def invoke(self, expr: CallExpr, get: GetExpr, tail: bool) -> Closure:
+        """obj.method(args) calls the method without binding it, like OP_INVOKE"""
+        obj: Closure = self.compile_node(get.object)
+        arguments: list[Closure] = [self.compile_node(arg) for arg in expr.arguments]
+        arg_count: int = len(arguments)
+        interpreter: ClosureInterpreter = self.interpreter
+        name: Token = get.name
+        paren: Token = expr.paren
+        cache: GetCache = interpreter.get_cache(get)
+
+        def invoke(env: Environment) -> Any:
+            instance = obj(env)
+            function: Any = None
+            if isinstance(instance, LoxInstance):
+                if instance.shape is cache.shape:
+                    cache.hits += 1
+                    entry = cache.entry
+                else:
+                    entry = cache.lookup(instance)
+                if type(entry) is LoxFunction:
+                    values: list[Any] = [argument(env) for argument in arguments]
+                    if arg_count != entry.arity():
+                        raise LoxRuntimeError(
+                            f"Expected {entry.arity()} arguments but got {arg_count}."
+                        )
+                    if tail:
+                        interpreter.tail_call = (
+                            entry,
+                            entry.receiver(instance),
+                            values,
+                        )
+                        return TAIL_CALL
+                    return entry.invoke(interpreter, instance, values)
+                if type(entry) is int:
+                    function = instance.values[entry]
+                else:
+                    function = instance.get(name)
+            else:
+                interpreter.error(name, "Only instances have properties")
+
+            values = [argument(env) for argument in arguments]
+            if not isinstance(function, LoxCallable):
+                interpreter.error(paren, "Can only call functions and classes")
+                raise LoxRuntimeError("Trying to call non function")
+
+            if arg_count != function.arity():
+                raise LoxRuntimeError(
+                    f"Expected {function.arity()} arguments but got {arg_count}."
+                )
+
+            if tail and type(function) is LoxFunction:
+                interpreter.tail_call = (function, function.closure, values)
+                return TAIL_CALL
+
+            return function.call(interpreter, values)
+
+        return invoke
+
+    def visit_get_expr(self, expr: GetExpr) -> Closure:
+        obj: Closure = self.compile_node(expr.object)
+        name: Token = expr.name
+        error = self.interpreter.error
+        cache: GetCache = self.interpreter.get_cache(expr)
+
+        def get(env: Environment) -> Any:
+            instance = obj(env)
+            if isinstance(instance, LoxInstance):
+                # Monomorphic hit on a field inline, the rest goes to the cache
+                if instance.shape is cache.shape and type(cache.entry) is int:
+                    cache.hits += 1
+                    return instance.values[cache.entry]
+                return cache.get(instance, name)
+
+            error(name, "Only instances have properties")
+
+        return get
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> Closure:
+        return self.compile_node(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> Closure:
+        value: Any = expr.value
+        return lambda env: value
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> Closure:
+        left: Closure = self.compile_node(expr.left)
+        right: Closure = self.compile_node(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+
+            def or_(env: Environment) -> Any:
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+
+            return or_
+
+        def and_(env: Environment) -> Any:
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+
+        return and_
+
+    def visit_set_expr(self, expr: SetExpr) -> Closure:
+        obj: Closure = self.compile_node(expr.object)
+        value: Closure = self.compile_node(expr.value)
+        name: Token = expr.name
+        cache: SetCache = self.interpreter.set_cache(expr)
+
+        def set_(env: Environment) -> Any:
+            instance = obj(env)
+            if not isinstance(instance, LoxInstance):
+                raise LoxRuntimeError(f"{name} Only instances have fields")
+
+            result = value(env)
+            if instance.shape is cache.shape and type(cache.entry) is int:
+                cache.hits += 1
+                instance.values[cache.entry] = result
+            else:
+                cache.set(instance, result)
+            return result
+
+        return set_
+
+    def visit_super_expr(self, expr: SuperExpr) -> Closure:
+        distance: Optional[int] = expr.depth
+        if distance is None:
+            raise Exception("Should have distance here")
+        method_name: str = expr.method.lexeme
+
+        def super_(env: SlotEnvironment) -> Any:
+            superclass: LoxClass = env.get_at(distance, 0)
+            obj: LoxInstance = env.get_at(distance - 1, 0)
+
+            method: Optional[LoxFunction] = superclass.find_method(method_name)
+            if method is None:
+                raise Exception(f"{method_name} Undefined property")
+
+            return method.bind(obj)
+
+        return super_
+
+    def visit_this_expr(self, expr: ThisExpr) -> Closure:
+        return self.variable(expr.keyword, expr)
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> Closure:
+        right: Closure = self.compile_node(expr.right)
+        op: Token = expr.operator
+
+        if op.type == TokenType.BANG:
+
+            def bang(env: Environment) -> bool:
+                value = right(env)
+                return value is None or value is False
+
+            return bang
+
+        check = self.interpreter.check_number_operand
+
+        def negate(env: Environment) -> float:
+            value = right(env)
+            if type(value) is not float:
+                check(op, value)
+            return -value
+
+        return negate
+
+    def visit_variable_expr(self, expr: VariableExpr) -> Closure:
+        return self.variable(expr.name, expr)
+
+    def variable(self, name: Token, expr: VariableExpr | ThisExpr) -> Closure:
+        distance: Optional[int] = expr.depth
+        slot: int = expr.slot
+        lexeme: str = name.lexeme
+
+        if distance is None:
+            globals: Environment = self.globals
+            values: dict = globals.values
+
+            def get_global(env: Environment) -> Any:
+                if lexeme in values:
+                    return values[lexeme]
+                return globals.get(name)
+
+            return get_global
+
+        if distance == 0:
+            return lambda env: env.values[slot]
+
+        if distance == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        def get_at(env: SlotEnvironment) -> Any:
+            return env.ancestor(distance).values[slot]
+
+        return get_at
@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from _token import Token
+from bytecode import OpCode
+from expression import (AssignExpr, BinaryExpr, CallExpr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
+                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from resolver import FunctionType
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import TokenType
+from vm_object import ObjFunction
+
+
+class Local:
+    def __init__(self, name: str, depth: int) -> None:
+        self.name: str = name
+        self.depth: int = depth
+        self.is_captured: bool = False
+
+
+class Upvalue:
+    def __init__(self, index: int, is_local: bool) -> None:
+        self.index: int = index
+        self.is_local: bool = is_local
+
+
+class FunctionState:
+    def __init__(
+        self,
+        enclosing: Optional[FunctionState],
+        function_type: FunctionType,
+        name: Optional[str],
+    ) -> None:
+        self.enclosing: Optional[FunctionState] = enclosing
+        self.function: ObjFunction = ObjFunction(name)
+        self.function_type: FunctionType = function_type
+        self.upvalues: list[Upvalue] = []
+        self.scope_depth: int = 0
+        self.identifiers: dict[str, int] = {}
+
+        # Slot zero holds the callee, or the receiver for methods
+        slot_zero = "this" if function_type in METHOD_TYPES else ""
+        self.locals: list[Local] = [Local(slot_zero, 0)]
+
+
+class ClassState:
+    def __init__(self, enclosing: Optional[ClassState]) -> None:
+        self.enclosing: Optional[ClassState] = enclosing
+        self.has_superclass: bool = False
+
+
+METHOD_TYPES = (FunctionType.METHOD, FunctionType.INITIALIZER)
+
+BINARY_OPS: dict[TokenType, tuple[OpCode, ...]] = {
+    TokenType.BANG_EQUAL: (OpCode.OP_EQUAL, OpCode.OP_NOT),
+    TokenType.EQUAL_EQUAL: (OpCode.OP_EQUAL,),
+    TokenType.GREATER: (OpCode.OP_GREATER,),
+    TokenType.GREATER_EQUAL: (OpCode.OP_LESS, OpCode.OP_NOT),
+    TokenType.LESS: (OpCode.OP_LESS,),
+    TokenType.LESS_EQUAL: (OpCode.OP_GREATER, OpCode.OP_NOT),
+    TokenType.PLUS: (OpCode.OP_ADD,),
+    TokenType.MINUS: (OpCode.OP_SUBTRACT,),
+    TokenType.STAR: (OpCode.OP_MULTIPLY,),
+    TokenType.SLASH: (OpCode.OP_DIVIDE,),
+}
+
+
+class Compiler(Visitor):
+    """
+    Compiles a resolved program into bytecode for the VM.
+
+    The Resolver only reports errors through the compiler it's handed, the
+    depth it annotates on a variable only decides between global and local
+    access, slots and upvalues are then worked out the same way clox does it.
+    """
+
+    def __init__(self, error) -> None:
+        self.error = error
+        self.current: FunctionState = FunctionState(None, FunctionType.NONE, None)
+        self.current_class: Optional[ClassState] = None
+        self.line: int = 1
+
+    def compile(self, stmts: list[Stmt]) -> ObjFunction:
+        for stmt in stmts:
+            self.compile_node(stmt)
+        self.emit_return()
+        return self.current.function
+
+    def compile_node(self, node: Any) -> None:
+        node.accept(self)
+
+    def emit(self, *codes: int) -> None:
+        chunk = self.current.function.chunk
+        for code in codes:
+            chunk.write(code, self.line)
+
+    def emit_jump(self, instruction: OpCode) -> int:
+        self.emit(instruction, -1)
+        return len(self.current.function.chunk.code) - 1
+
+    def patch_jump(self, offset: int) -> None:
+        code = self.current.function.chunk.code
+        code[offset] = len(code)
+
+    def emit_loop(self, loop_start: int) -> None:
+        self.emit(OpCode.OP_LOOP, loop_start)
+
+    def emit_return(self) -> None:
+        if self.current.function_type == FunctionType.INITIALIZER:
+            self.emit(OpCode.OP_GET_LOCAL, 0)
+        else:
+            self.emit(OpCode.OP_NIL)
+        self.emit(OpCode.OP_RETURN)
+
+    def make_constant(self, value: Any) -> int:
+        return self.current.function.chunk.add_constant(value)
+
+    def identifier_constant(self, name: str) -> int:
+        identifiers = self.current.identifiers
+        if name not in identifiers:
+            identifiers[name] = self.make_constant(name)
+        return identifiers[name]
+
+    def begin_scope(self) -> None:
+        self.current.scope_depth += 1
+
+    def end_scope(self) -> None:
+        state = self.current
+        state.scope_depth -= 1
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            if state.locals[-1].is_captured:
+                self.emit(OpCode.OP_CLOSE_UPVALUE)
+            else:
+                self.emit(OpCode.OP_POP)
+            state.locals.pop()
+
+    def add_local(self, name: str) -> None:
+        self.current.locals.append(Local(name, self.current.scope_depth))
+
+    def declare_variable(self, name: Token) -> Optional[int]:
+        """Adds a local, or returns the constant holding a global's name"""
+        self.line = name.line
+        if self.current.scope_depth > 0:
+            self.add_local(name.lexeme)
+            return None
+        return self.identifier_constant(name.lexeme)
+
+    def define_variable(self, global_constant: Optional[int]) -> None:
+        if global_constant is not None:
+            self.emit(OpCode.OP_DEFINE_GLOBAL, global_constant)
+
+    def resolve_local(self, state: FunctionState, name: str) -> int:
+        for i in range(len(state.locals) - 1, -1, -1):
+            if state.locals[i].name == name:
+                return i
+        return -1
+
+    def add_upvalue(self, state: FunctionState, index: int, is_local: bool) -> int:
+        for i, upvalue in enumerate(state.upvalues):
+            if upvalue.index == index and upvalue.is_local == is_local:
+                return i
+
+        state.upvalues.append(Upvalue(index, is_local))
+        state.function.upvalue_count = len(state.upvalues)
+        return len(state.upvalues) - 1
+
+    def resolve_upvalue(self, state: FunctionState, name: str) -> int:
+        if state.enclosing is None:
+            return -1
+
+        local = self.resolve_local(state.enclosing, name)
+        if local != -1:
+            state.enclosing.locals[local].is_captured = True
+            return self.add_upvalue(state, local, True)
+
+        upvalue = self.resolve_upvalue(state.enclosing, name)
+        if upvalue != -1:
+            return self.add_upvalue(state, upvalue, False)
+
+        return -1
+
+    def named_variable(self, name: str, assign: bool, is_local: bool = True) -> None:
+        if is_local:
+            arg = self.resolve_local(self.current, name)
+            if arg != -1:
+                self.emit(OpCode.OP_SET_LOCAL if assign else OpCode.OP_GET_LOCAL, arg)
+                return
+            arg = self.resolve_upvalue(self.current, name)
+            if arg != -1:
+                self.emit(
+                    OpCode.OP_SET_UPVALUE if assign else OpCode.OP_GET_UPVALUE, arg
+                )
+                return
+
+        arg = self.identifier_constant(name)
+        self.emit(OpCode.OP_SET_GLOBAL if assign else OpCode.OP_GET_GLOBAL, arg)
+
+    def function(self, stmt: FunctionStmt, function_type: FunctionType) -> None:
+        state = FunctionState(self.current, function_type, stmt.name.lexeme)
+        self.current = state
+        self.begin_scope()
+
+        for param in stmt.params:
+            self.add_local(param.lexeme)
+        state.function.arity = len(stmt.params)
+
+        for body_stmt in stmt.body:
+            self.compile_node(body_stmt)
+        self.emit_return()
+
+        self.current = state.enclosing
+        self.emit(OpCode.OP_CLOSURE, self.make_constant(state.function))
+        for upvalue in state.upvalues:
+            self.emit(1 if upvalue.is_local else 0, upvalue.index)
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.begin_scope()
+        for statement in stmt.statements:
+            self.compile_node(statement)
+        self.end_scope()
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> None:
+        name: str = stmt.name.lexeme
+        name_constant = self.identifier_constant(name)
+        global_constant = self.declare_variable(stmt.name)
+
+        self.emit(OpCode.OP_CLASS, name_constant)
+        self.define_variable(global_constant)
+
+        class_state = ClassState(self.current_class)
+        self.current_class = class_state
+
+        if stmt.superclass is not None:
+            self.compile_node(stmt.superclass)
+            self.begin_scope()
+            self.add_local("super")
+
+            self.named_variable(name, False)
+            self.emit(OpCode.OP_INHERIT)
+            class_state.has_superclass = True
+
+        self.named_variable(name, False)
+        for method in stmt.methods:
+            function_type = FunctionType.METHOD
+            if method.name.lexeme == "init":
+                function_type = FunctionType.INITIALIZER
+            self.function(method, function_type)
+            self.emit(OpCode.OP_METHOD, self.identifier_constant(method.name.lexeme))
+        self.emit(OpCode.OP_POP)
+
+        if class_state.has_superclass:
+            self.end_scope()
+
+        self.current_class = class_state.enclosing
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.OP_POP)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        global_constant = self.declare_variable(stmt.name)
+        self.function(stmt, FunctionType.FUNCTION)
+        self.define_variable(global_constant)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.compile_node(stmt.condition)
+
+        then_jump = self.emit_jump(OpCode.OP_JUMP_IF_FALSE)
+        self.emit(OpCode.OP_POP)
+        self.compile_node(stmt.then_branch)
+
+        else_jump = self.emit_jump(OpCode.OP_JUMP)
+        self.patch_jump(then_jump)
+        self.emit(OpCode.OP_POP)
+
+        if stmt.else_branch is not None:
+            self.compile_node(stmt.else_branch)
+        self.patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.OP_PRINT)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        self.line = stmt.keyword.line
+        if stmt.value is None:
+            self.emit_return()
+            return
+
+        self.compile_node(stmt.value)
+        self.emit(OpCode.OP_RETURN)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer is not None:
+            self.compile_node(stmt.initializer)
+        else:
+            self.emit(OpCode.OP_NIL)
+
+        self.define_variable(self.declare_variable(stmt.name))
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        loop_start = len(self.current.function.chunk.code)
+        self.compile_node(stmt.condition)
+
+        exit_jump = self.emit_jump(OpCode.OP_JUMP_IF_FALSE)
+        self.emit(OpCode.OP_POP)
+        self.compile_node(stmt.body)
+        self.emit_loop(loop_start)
+
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.OP_POP)
+
+    def visit_for_stmt(self, stmt: ForStmt) -> None:
+        self.begin_scope()
+        if stmt.initializer is not None:
+            self.compile_node(stmt.initializer)
+
+        loop_start = len(self.current.function.chunk.code)
+        exit_jump: Optional[int] = None
+        if stmt.condition is not None:
+            self.compile_node(stmt.condition)
+            exit_jump = self.emit_jump(OpCode.OP_JUMP_IF_FALSE)
+            self.emit(OpCode.OP_POP)
+
+        self.compile_node(stmt.body)
+        if stmt.increment is not None:
+            self.compile_node(stmt.increment)
+            self.emit(OpCode.OP_POP)
+        self.emit_loop(loop_start)
+
+        if exit_jump is not None:
+            self.patch_jump(exit_jump)
+            self.emit(OpCode.OP_POP)
+        self.end_scope()
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.compile_node(expr.value)
+        self.line = expr.name.line
+        self.named_variable(expr.name.lexeme, True, expr.depth is not None)
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.compile_node(expr.left)
+        self.compile_node(expr.right)
+        self.line = expr.operator.line
+        self.emit(*BINARY_OPS[expr.operator.type])
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        callee = expr.callee
+        if isinstance(callee, GetExpr):
+            self.compile_node(callee.object)
+            self.compile_arguments(expr)
+            name_constant = self.identifier_constant(callee.name.lexeme)
+            self.emit(OpCode.OP_INVOKE, name_constant, len(expr.arguments))
+            return
+
+        if isinstance(callee, SuperExpr):
+            self.named_variable("this", False)
+            self.compile_arguments(expr)
+            self.named_variable("super", False)
+            name_constant = self.identifier_constant(callee.method.lexeme)
+            self.emit(OpCode.OP_SUPER_INVOKE, name_constant, len(expr.arguments))
+            return
+
+        self.compile_node(callee)
+        self.compile_arguments(expr)
+        self.emit(OpCode.OP_CALL, len(expr.arguments))
+
+    def compile_arguments(self, expr: CallExpr) -> None:
+        for argument in expr.arguments:
+            self.compile_node(argument)
+        self.line = expr.paren.line
+
+    def visit_get_expr(self, expr: GetExpr) -> None:
+        self.compile_node(expr.object)
+        self.line = expr.name.line
+        self.emit(OpCode.OP_GET_PROPERTY, self.identifier_constant(expr.name.lexeme))
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.compile_node(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        if expr.value is None:
+            self.emit(OpCode.OP_NIL)
+        elif expr.value is True:
+            self.emit(OpCode.OP_TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.OP_FALSE)
+        else:
+            self.emit(OpCode.OP_CONSTANT, self.make_constant(expr.value))
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.compile_node(expr.left)
+
+        if expr.operator.type == TokenType.OR:
+            else_jump = self.emit_jump(OpCode.OP_JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.OP_JUMP)
+            self.patch_jump(else_jump)
+            self.emit(OpCode.OP_POP)
+            self.compile_node(expr.right)
+            self.patch_jump(end_jump)
+            return
+
+        end_jump = self.emit_jump(OpCode.OP_JUMP_IF_FALSE)
+        self.emit(OpCode.OP_POP)
+        self.compile_node(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_set_expr(self, expr: SetExpr) -> None:
+        self.compile_node(expr.object)
+        self.compile_node(expr.value)
+        self.line = expr.name.line
+        self.emit(OpCode.OP_SET_PROPERTY, self.identifier_constant(expr.name.lexeme))
+
+    def visit_super_expr(self, expr: SuperExpr) -> None:
+        self.line = expr.keyword.line
+        self.named_variable("this", False)
+        self.named_variable("super", False)
+        self.emit(OpCode.OP_GET_SUPER, self.identifier_constant(expr.method.lexeme))
+
+    def visit_this_expr(self, expr: ThisExpr) -> None:
+        self.line = expr.keyword.line
+        self.named_variable("this", False)
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.compile_node(expr.right)
+        self.line = expr.operator.line
+
+        if expr.operator.type == TokenType.BANG:
+            self.emit(OpCode.OP_NOT)
+        else:
+            self.emit(OpCode.OP_NEGATE)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        self.line = expr.name.line
+        self.named_variable(expr.name.lexeme, False, expr.depth is not None)
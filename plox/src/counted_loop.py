@@ -0,0 +1,94 @@
+import operator
+from typing import Any, Callable, Dict, Optional
+
+from ast_walk import children
+from expression import (AssignExpr, BinaryExpr, Expr, LiteralExpr,
+                        VariableExpr)
+from stmt import ForStmt, VarStmt
+from token_type import TokenType
+
+COMPARISONS: Dict[TokenType, Callable[[float, float], bool]] = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+}
+
+
+class CountedLoop:
+    """
+    A for loop shaped like for (var i = a; i < b; i = i + c) where c is a
+    number literal, b a literal or a variable and nothing in the body
+    assigns i. The loop variable is the first local of the loop's scope, so
+    it lives in slot 0 of the loop's environment. Engines only take the
+    fast path while i and b are numbers and fall back to the generic loop
+    from the current iteration on otherwise.
+    """
+
+    __slots__ = ("compare", "bound", "step")
+
+    def __init__(
+        self, compare: Callable[[float, float], bool], bound: Expr, step: float
+    ) -> None:
+        self.compare: Callable[[float, float], bool] = compare
+        self.bound: Expr = bound
+        self.step: float = step
+
+    def constant(self) -> Optional[float]:
+        """The bound when it's a number literal"""
+        if type(self.bound) is LiteralExpr and type(self.bound.value) is float:
+            return self.bound.value
+        return None
+
+
+def is_loop_variable(expr: Any, name: str) -> bool:
+    return type(expr) is VariableExpr and expr.name.lexeme == name
+
+
+def is_number(expr: Any) -> bool:
+    return type(expr) is LiteralExpr and type(expr.value) is float
+
+
+def assigns(node: Any, name: str) -> bool:
+    """Whether anything under node, nested functions included, assigns name"""
+    if isinstance(node, AssignExpr) and node.name.lexeme == name:
+        return True
+    return any(assigns(child, name) for child in children(node))
+
+
+def counted_loop(stmt: ForStmt) -> Optional[CountedLoop]:
+    if not isinstance(stmt.initializer, VarStmt):
+        return None
+    name: str = stmt.initializer.name.lexeme
+
+    condition: Any = stmt.condition
+    if (
+        not isinstance(condition, BinaryExpr)
+        or condition.operator.type not in COMPARISONS
+        or not is_loop_variable(condition.left, name)
+    ):
+        return None
+    bound: Expr = condition.right
+    if not is_number(bound) and (
+        type(bound) is not VariableExpr or bound.name.lexeme == name
+    ):
+        return None
+
+    increment: Any = stmt.increment
+    if not isinstance(increment, AssignExpr) or increment.name.lexeme != name:
+        return None
+    value: Any = increment.value
+    if (
+        not isinstance(value, BinaryExpr)
+        or value.operator.type not in (TokenType.PLUS, TokenType.MINUS)
+        or not is_loop_variable(value.left, name)
+        or not is_number(value.right)
+    ):
+        return None
+    step: float = value.right.value
+    if value.operator.type == TokenType.MINUS:
+        step = -step
+
+    if assigns(stmt.body, name):
+        return None
+    return CountedLoop(COMPARISONS[condition.operator.type], bound, step)
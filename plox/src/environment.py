@@ -51,3 +51,40 @@ class Environment:
             result += " -> " + self.enclosing.to_string()
 
         return result
+
+
+class SlotEnvironment:
+    """
+    Array backed environment for local scopes. The Resolver hands out slots
+    in declaration order, so define() only has to append and reads are a
+    (depth, slot) pair instead of a name lookup.
+    """
+
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, enclosing: Optional[Environment | SlotEnvironment]) -> None:
+        self.values: list[Any] = []
+        self.enclosing: Optional[Environment | SlotEnvironment] = enclosing
+
+    def define(self, name: str, value: Any) -> None:
+        self.values.append(value)
+
+    def ancestor(self, distance: int) -> SlotEnvironment:
+        environment: SlotEnvironment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+
+        return environment
+
+    def get_at(self, distance: int, slot: int) -> Any:
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: Any) -> None:
+        self.ancestor(distance).values[slot] = value
+
+    def to_string(self):
+        result = str(self.values)
+        if self.enclosing:
+            result += " -> " + self.enclosing.to_string()
+
+        return result
@@ -22,8 +22,16 @@ if __name__ == "__main__":
         "Call ; callee : Expr, paren : Token, arguments : list[Expr]",
         "Get ; object: Expr, name: Token",
     ]
+    # Nodes that carry the Resolver's (depth, slot) annotation
+    RESOLVED = ["Assign", "Super", "This", "Variable"]
+    # Property sites that get an inline cache
+    CACHED = ["Get", "Set"]
+    # Calls the Resolver can mark as being in tail position
+    TAIL = ["Call"]
+    # Nodes the Interpreter quickens, they count runs with number operands
+    QUICKENED = ["Binary", "Unary"]
     k = """from abc import ABC
-from typing import Any
+from typing import Any, Optional
 from _token import Token
 class Visitor(ABC):
     pass
@@ -43,6 +51,7 @@ class Visitor(ABC):
         "block",
         "if",
         "while",
+        "for",
         "function",
         "return",
         "class",
@@ -51,9 +60,19 @@ class Visitor(ABC):
         s += f"""
     def visit_{i}_stmt(self, cls):
         pass
+"""
+    for name in QUICKENED:
+        s += f"""
+    def visit_quick_{name.lower()}_expr(self, cls):
+        return self.visit_{name.lower()}_expr(cls)
 """
     k += s
     k += """class Expr(ABC):
+    # Set by StacklessInterpreter.mark, if evaluating it calls something and
+    # for a call whose callee and arguments don't
+    calling: bool = False
+    direct: bool = False
+
     def accept(self, a: Any):
         pass
 """
@@ -65,6 +84,15 @@ class Visitor(ABC):
         s = ""
         for f in fields:
             s += f"        self.{f} = {f.split(':')[0]}\n"
+        if class_name in RESOLVED:
+            s += "        self.depth: Optional[int] = None\n"
+            s += "        self.slot: int = 0\n"
+        if class_name in CACHED:
+            s += "        self.cache: Any = None\n"
+        if class_name in TAIL:
+            s += "        self.tail: bool = False\n"
+        if class_name in QUICKENED:
+            s += "        self.feedback: int = 0\n"
         k += f"""\nclass {class_name}Expr(Expr, Visitor):
     def __init__(self, {', '.join(fields)}):
 {s}
@@ -72,4 +100,9 @@ class Visitor(ABC):
     def accept(self, visitor: Visitor):
         return visitor.visit_{class_name.lower()}_expr(self)
         """
+    for name in QUICKENED:
+        k += f"""\nclass Quick{name}Expr({name}Expr):
+    def accept(self, visitor: Visitor):
+        return visitor.visit_quick_{name.lower()}_expr(self)
+"""
     fp.write(k)
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Any
+from typing import Any, Callable, Optional
 
 from _token import Token
 
@@ -70,8 +70,24 @@ class Visitor(ABC):
     def visit_class_stmt(self, cls):
         pass
 
+    def visit_for_stmt(self, stmt):
+        pass
+
+    # Nodes quickened by the Interpreter look like the generic ones to
+    # every other visitor
+    def visit_quick_binary_expr(self, cls):
+        return self.visit_binary_expr(cls)
+
+    def visit_quick_unary_expr(self, cls):
+        return self.visit_unary_expr(cls)
+
 
 class Expr(ABC):
+    # Set by StacklessInterpreter.mark, if evaluating it calls something and
+    # for a call whose callee and arguments don't
+    calling: bool = False
+    direct: bool = False
+
     def accept(self, a: Any):
         pass
 
@@ -80,6 +96,9 @@ class AssignExpr(Expr, Visitor):
     def __init__(self, name: Token, value: Expr):
         self.name: Token = name
         self.value: Expr = value
+        # Set by the Resolver, depth is None for globals
+        self.depth: Optional[int] = None
+        self.slot: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_assign_expr(self)
@@ -90,6 +109,8 @@ class BinaryExpr(Expr, Visitor):
         self.left: Expr = left
         self.operator: Token = operator
         self.right: Expr = right
+        # Runs with number operands, used by the Interpreter to quicken
+        self.feedback: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_binary_expr(self)
@@ -125,6 +146,8 @@ class UnaryExpr(Expr, Visitor):
     def __init__(self, operator: Token, right: Expr):
         self.operator: Token = operator
         self.right: Expr = right
+        # Runs with number operands, used by the Interpreter to quicken
+        self.feedback: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_unary_expr(self)
@@ -135,6 +158,8 @@ class SetExpr(Expr, Visitor):
         self.object: Expr = object
         self.name: Token = name
         self.value: Expr = value
+        # Inline cache, created the first time the site runs
+        self.cache: Any = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_set_expr(self)
@@ -144,6 +169,9 @@ class SuperExpr(Expr, Visitor):
     def __init__(self, keyword: Token, method: Token):
         self.keyword: Token = keyword
         self.method: Token = method
+        # Set by the Resolver, depth is None for globals
+        self.depth: Optional[int] = None
+        self.slot: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_super_expr(self)
@@ -152,6 +180,9 @@ class SuperExpr(Expr, Visitor):
 class ThisExpr(Expr, Visitor):
     def __init__(self, keyword: Token):
         self.keyword: Token = keyword
+        # Set by the Resolver, depth is None for globals
+        self.depth: Optional[int] = None
+        self.slot: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_this_expr(self)
@@ -160,6 +191,9 @@ class ThisExpr(Expr, Visitor):
 class VariableExpr(Expr, Visitor):
     def __init__(self, name: Token):
         self.name: Token = name
+        # Set by the Resolver, depth is None for globals
+        self.depth: Optional[int] = None
+        self.slot: int = 0
 
     def accept(self, visitor: Visitor):
         return visitor.visit_variable_expr(self)
@@ -170,6 +204,8 @@ class CallExpr(Expr, Visitor):
         self.callee: Expr = callee
         self.paren: Token = paren
         self.arguments: list[Expr] = arguments
+        # Set by the Resolver for `return f(...)`
+        self.tail: bool = False
 
     def accept(self, visitor: Visitor):
         return visitor.visit_call_expr(self)
@@ -179,6 +215,24 @@ class GetExpr(Expr, Visitor):
     def __init__(self, object: Expr, name: Token):
         self.object: Expr = object
         self.name: Token = name
+        # Inline cache, created the first time the site runs
+        self.cache: Any = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_get_expr(self)
+
+
+class QuickBinaryExpr(BinaryExpr):
+    """BinaryExpr specialised for number operands, number_op does the work"""
+
+    number_op: Callable[[float, float], Any]
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_quick_binary_expr(self)
+
+
+class QuickUnaryExpr(UnaryExpr):
+    """Negation specialised for a number operand"""
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_quick_unary_expr(self)
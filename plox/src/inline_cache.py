@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from _token import Token
+from loxcallable import LoxFunction, LoxInstance, Shape
+
+# Shapes a site remembers before it goes megamorphic and stops caching
+MAX_SHAPES = 4
+
+
+class InlineCache:
+    """
+    Per-site cache from an instance's shape to what the site did for it
+    last time. A shape belongs to a single class and classes never change
+    their methods, so an entry stays valid for as long as the shape lives.
+    The first shape is checked by identity before the polymorphic table.
+    """
+
+    __slots__ = (
+        "name",
+        "line",
+        "shape",
+        "entry",
+        "entries",
+        "megamorphic",
+        "hits",
+        "misses",
+    )
+
+    kind: str = ""
+
+    def __init__(self, name: Token) -> None:
+        self.name: str = name.lexeme
+        self.line: int = name.line
+        self.shape: Optional[Shape] = None
+        self.entry: Any = None
+        self.entries: Dict[Shape, Any] = {}
+        self.megamorphic: bool = False
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def lookup(self, instance: LoxInstance) -> Any:
+        shape: Shape = instance.shape
+        if shape is self.shape:
+            self.hits += 1
+            return self.entry
+
+        entry: Any = self.entries.get(shape)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = self.resolve(instance)
+        if entry is None:
+            return None
+
+        if len(self.entries) >= MAX_SHAPES:
+            self.megamorphic = True
+        else:
+            if not self.entries:
+                self.shape = shape
+                self.entry = entry
+            self.entries[shape] = entry
+
+        return entry
+
+    def resolve(self, instance: LoxInstance) -> Any:
+        ...
+
+    def state(self) -> str:
+        if self.megamorphic:
+            return "megamorphic"
+        if len(self.entries) > 1:
+            return "polymorphic"
+        if self.entries:
+            return "monomorphic"
+        return "uninitialized"
+
+    def to_string(self) -> str:
+        return (
+            f"[line {self.line}] {self.kind} {self.name}: {self.state()}, "
+            f"{len(self.entries)} shapes, {self.hits} hits, {self.misses} misses"
+        )
+
+
+class GetCache(InlineCache):
+    """Entries are a field's index in the instance's values or a method"""
+
+    kind = "get"
+
+    def resolve(self, instance: LoxInstance) -> Optional[int | LoxFunction]:
+        slot: Optional[int] = instance.shape.slots.get(self.name)
+        if slot is not None:
+            return slot
+
+        return instance.klass.find_method(self.name)
+
+    def get(self, instance: LoxInstance, name: Token) -> Any:
+        entry: Optional[int | LoxFunction] = self.lookup(instance)
+        if type(entry) is int:
+            return instance.values[entry]
+        if entry is not None:
+            return entry.bind(instance)
+
+        return instance.get(name)
+
+
+class SetCache(InlineCache):
+    """Entries are the field's index or the shape that adding the field leads to"""
+
+    kind = "set"
+
+    def resolve(self, instance: LoxInstance) -> int | Shape:
+        slot: Optional[int] = instance.shape.slots.get(self.name)
+        if slot is not None:
+            return slot
+
+        return instance.shape.add(self.name)
+
+    def set(self, instance: LoxInstance, value: Any) -> None:
+        entry: int | Shape = self.lookup(instance)
+        if type(entry) is int:
+            instance.values[entry] = value
+        else:
+            instance.shape = entry
+            instance.values.append(value)
+
+
+def report(caches: list[InlineCache]) -> list[str]:
+    hits: int = sum(cache.hits for cache in caches)
+    misses: int = sum(cache.misses for cache in caches)
+    lines: list[str] = [cache.to_string() for cache in caches]
+    lines.append(f"{len(caches)} sites, {hits} hits, {misses} misses")
+    return lines
@@ -1,15 +1,27 @@
 from typing import Any, Dict, Optional
 
 from _token import Token
-from environment import Environment
+from counted_loop import CountedLoop, counted_loop
+from environment import Environment, SlotEnvironment
 from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
-                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
-                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
-from loxcallable import (Clock, LoxCallable, LoxClass, LoxFunction,
-                         LoxInstance, Return)
-from stmt import (BlockStmt, ClassStmt, ExpressionStmt, FunctionStmt, IfStmt,
-                  PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
-from token_type import TokenType
+                        GroupingExpr, LiteralExpr, LogicalExpr,
+                        QuickBinaryExpr, QuickUnaryExpr, SetExpr, SuperExpr,
+                        ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from inline_cache import GetCache, InlineCache, SetCache
+from loxcallable import (RETURN, TAIL_CALL, Clock, Completion, LoxCallable,
+                         LoxClass, LoxFunction, LoxInstance, Memo)
+from rope import concat, is_string
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import NUMBER_OPS, TokenType
+
+
+# Runs in a row with number operands before a node quickens
+QUICKEN_AFTER = 8
+# Extra runs a node needs to quicken again once its guard failed
+BACKOFF = 64
+# Returned by Interpreter.counted_loop when the loop ran to completion
+DONE = object()
 
 
 class LoxRuntimeError(Exception):
@@ -17,12 +29,17 @@ class LoxRuntimeError(Exception):
 
 
 class Interpreter(Visitor):
-    def __init__(self, error) -> None:
+    def __init__(self, error, memo_size: int = 0) -> None:
         self.error = error
         self.environment = Environment()
         self.globals = self.environment
         self.globals.define("clock", Clock())
-        self.locals = {}
+        self.return_value: Any = None
+        self.tail_call: tuple[LoxFunction, SlotEnvironment, list[Any]]
+        self.caches: list[InlineCache] = []
+        # Functions marked pure get an LRU cache of this size, 0 turns it off
+        self.memo_size: int = memo_size
+        self.memos: list[Memo] = []
 
     def get_all_env(self):
         envs = []
@@ -32,36 +49,43 @@ class Interpreter(Visitor):
             env = env.enclosing
         return envs
 
-    def interpret(self, stmts: list[Stmt]):
+    def interpret(self, stmts: list[Stmt]) -> bool:
+        """Runs stmts, returns False if a runtime error stopped them"""
         try:
             for stmt in stmts:
                 self.execute(stmt)
         except LoxRuntimeError as e:
             self.error(1, e.args[0])
+            return False
+        return True
 
     def evaluate(self, expr: Expr):
         return expr.accept(self)
 
-    def execute(self, stmt: Stmt):
-        stmt.accept(self)
-
-    def resolve(self, expr: Expr, depth: int) -> None:
-        self.locals[expr] = depth
+    def execute(self, stmt: Stmt) -> Optional[Completion]:
+        return stmt.accept(self)
 
-    def execute_block(self, statements: list[Stmt], environment: Environment):
-        previous: Environment = self.environment
+    def execute_block(
+        self, statements: list[Stmt], environment: Environment | SlotEnvironment
+    ) -> Optional[Completion]:
+        previous: Environment | SlotEnvironment = self.environment
+        self.environment = environment
         try:
-            self.environment = environment
             for statement in statements:
-                self.execute(statement)
-        except Return as r:
+                completion: Optional[Completion] = statement.accept(self)
+                if completion is not None:
+                    return completion
+        finally:
             self.environment = previous
-            raise r
-        self.environment = previous
+
+    def execute_body(
+        self, declaration: FunctionStmt, environment: SlotEnvironment
+    ) -> Optional[Completion]:
+        """Runs a function's body, LoxFunction.run calls back into it"""
+        return self.execute_block(declaration.body, environment)
 
     def visit_block_stmt(self, stmt: BlockStmt):
-        self.execute_block(stmt.statements, self.environment)
-        return
+        return self.execute_block(stmt.statements, SlotEnvironment(self.environment))
 
     def visit_class_stmt(self, stmt: ClassStmt):
         superclass: Any = None
@@ -70,10 +94,8 @@ class Interpreter(Visitor):
             if not isinstance(superclass, LoxClass):
                 raise Exception(f"{stmt.superclass.name} superclass must be a class")
 
-        self.environment.define(stmt.name.lexeme, None)
-
         if stmt.superclass is not None:
-            self.environment = Environment(self.environment)
+            self.environment = SlotEnvironment(self.environment)
             self.environment.define("super", superclass)
 
         methods: Dict[str, LoxFunction] = {}
@@ -90,20 +112,35 @@ class Interpreter(Visitor):
 
             self.environment = self.environment.enclosing
 
-        self.environment.assign(stmt.name, klass)
+        # Methods only see the class through their closure once called, so
+        # defining it last keeps the Resolver's slot order
+        self.environment.define(stmt.name.lexeme, klass)
 
     def visit_expression_stmt(self, stmt: ExpressionStmt):
         self.evaluate(stmt.expression)
 
     def visit_function_stmt(self, stmt: FunctionStmt):
-        function = LoxFunction(stmt, self.environment, False)
+        function = self.new_function(stmt, self.environment)
         self.environment.define(stmt.name.lexeme, function)
 
+    def new_function(
+        self, stmt: FunctionStmt, closure: Environment | SlotEnvironment
+    ) -> LoxFunction:
+        function: LoxFunction = LoxFunction(stmt, closure, False)
+        if stmt.pure and self.memo_size > 0:
+            # A pure function can't depend on its closure, so the declaration
+            # gets one memo however many closures of it there are
+            if stmt.memo is None:
+                stmt.memo = Memo(stmt.name.lexeme, self.memo_size)
+                self.memos.append(stmt.memo)
+            function.memo = stmt.memo
+        return function
+
     def visit_if_stmt(self, stmt: IfStmt):
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self.execute((stmt.else_branch))
+            return self.execute((stmt.else_branch))
 
     def visit_print_stmt(self, stmt: PrintStmt):
         value: Any = self.evaluate(stmt.expression)
@@ -111,9 +148,14 @@ class Interpreter(Visitor):
 
     def visit_return_stmt(self, stmt: ReturnStmt):
         value = None
-        if stmt.value is not None:
+        if type(stmt.value) is CallExpr and stmt.value.tail:
+            value = self.call(stmt.value, True)
+            if value is TAIL_CALL:
+                return TAIL_CALL
+        elif stmt.value is not None:
             value = self.evaluate(stmt.value)
-        raise Return(value)
+        self.return_value = value
+        return RETURN
 
     def visit_var_stmt(self, stmt: VarStmt):
         value: Any = None
@@ -123,14 +165,67 @@ class Interpreter(Visitor):
 
     def visit_while_stmt(self, stmt: WhileStmt):
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            completion: Optional[Completion] = self.execute(stmt.body)
+            if completion is not None:
+                return completion
+
+    def visit_for_stmt(self, stmt: ForStmt):
+        previous: Environment | SlotEnvironment = self.environment
+        environment: SlotEnvironment = SlotEnvironment(previous)
+        self.environment = environment
+        try:
+            completion: Optional[Completion]
+            if stmt.initializer is not None:
+                self.execute(stmt.initializer)
+
+            if stmt.counted is None:
+                stmt.counted = counted_loop(stmt) or False
+            if stmt.counted:
+                completion = self.counted_loop(stmt, stmt.counted, environment.values)
+                if completion is not None:
+                    return None if completion is DONE else completion
+
+            while stmt.condition is None or self.is_truthy(
+                self.evaluate(stmt.condition)
+            ):
+                completion = self.execute(stmt.body)
+                if completion is not None:
+                    return completion
+                if stmt.increment is not None:
+                    self.evaluate(stmt.increment)
+        finally:
+            self.environment = previous
+
+    def counted_loop(
+        self, stmt: ForStmt, loop: CountedLoop, values: list[Any]
+    ) -> Optional[Completion | object]:
+        """
+        Runs the loop without evaluating its condition and increment nodes.
+        Returns DONE once the condition fails, the body's completion if it
+        returns, or None to leave the rest of the loop to the generic path.
+        """
+        constant: Optional[float] = loop.constant()
+        compare = loop.compare
+        step: float = loop.step
+        body: Stmt = stmt.body
+        while True:
+            i: Any = values[0]
+            bound: Any = constant if constant is not None else self.evaluate(loop.bound)
+            if type(i) is not float or type(bound) is not float:
+                return None
+            if not compare(i, bound):
+                return DONE
+            completion: Optional[Completion] = body.accept(self)
+            if completion is not None:
+                return completion
+            values[0] = i + step
 
     def visit_assign_expr(self, expr: AssignExpr):
-        value: Any = self.evaluate(expr.value)
+        return self.assign(expr, self.evaluate(expr.value))
 
-        distance: Optional[int] = self.locals.get(expr)
-        if distance is not None:
-            self.environment.assign_at(distance, expr.name, value)
+    def assign(self, expr: AssignExpr, value: Any) -> Any:
+        if expr.depth is not None:
+            self.environment.assign_at(expr.depth, expr.slot, value)
         else:
             self.globals.assign(expr.name, value)
         return value
@@ -139,11 +234,33 @@ class Interpreter(Visitor):
         left: Any = self.evaluate(expr.left)
         right: Any = self.evaluate(expr.right)
 
+        if type(left) is float and type(right) is float:
+            expr.feedback += 1
+            if expr.feedback >= QUICKEN_AFTER and expr.operator.type in NUMBER_OPS:
+                expr.__class__ = QuickBinaryExpr
+                expr.number_op = NUMBER_OPS[expr.operator.type]
+        else:
+            expr.feedback = min(expr.feedback, 0)
+
+        return self.binary(expr, left, right)
+
+    def visit_quick_binary_expr(self, expr: QuickBinaryExpr):
+        left: Any = self.evaluate(expr.left)
+        right: Any = self.evaluate(expr.right)
+
+        if type(left) is float and type(right) is float:
+            return expr.number_op(left, right)
+
+        expr.__class__ = BinaryExpr
+        expr.feedback = -BACKOFF
+        return self.binary(expr, left, right)
+
+    def binary(self, expr: BinaryExpr, left: Any, right: Any):
         match expr.operator.type:
             case TokenType.BANG_EQUAL:
                 return left != right
 
-            case TokenType.EQUAL:
+            case TokenType.EQUAL_EQUAL:
                 return left == right
 
             case TokenType.GREATER:
@@ -164,26 +281,50 @@ class Interpreter(Visitor):
 
             case TokenType.MINUS:
                 self.check_number_operands(expr.operator, left, right)
-                return float(left) - float(right)
+                return left - right
 
             case TokenType.PLUS:
-                if isinstance(left, float) and isinstance(right, float):
+                if type(left) is float and type(right) is float:
                     return left + right
 
-                if isinstance(left, str) and isinstance(right, str):
-                    return left + right
+                if is_string(left) and is_string(right):
+                    return concat(left, right)
                 raise Exception(f"Trying to + smth? {type(left)} and {type(right)}")
 
             case TokenType.SLASH:
                 self.check_number_operands(expr.operator, left, right)
-                return float(left) / float(right)
+                return left / right
 
             case TokenType.STAR:
                 self.check_number_operands(expr.operator, left, right)
-                return float(left) * float(right)
+                return left * right
 
     def visit_call_expr(self, expr: CallExpr):
-        callee: Any = self.evaluate(expr.callee)
+        return self.call(expr, False)
+
+    def call(self, expr: CallExpr, tail: bool) -> Any:
+        """
+        Makes the call, or for a tail call to a Lox function leaves it in
+        tail_call and hands back TAIL_CALL.
+        """
+        callee: Any
+        if type(expr.callee) is GetExpr:
+            # obj.method(args) calls the method directly, like clox's OP_INVOKE
+            get: GetExpr = expr.callee
+            obj: Any = self.evaluate(get.object)
+            if isinstance(obj, LoxInstance):
+                entry: Optional[int | LoxFunction] = self.get_cache(get).lookup(obj)
+                if type(entry) is LoxFunction:
+                    return self.invoke(entry, obj, expr, tail)
+                callee = obj.values[entry] if type(entry) is int else obj.get(get.name)
+            else:
+                callee = self.get_property(obj, get.name)
+        elif type(expr.callee) is SuperExpr:
+            superclass, obj = self.super_receiver(expr.callee)
+            callee = self.find_super_method(superclass, expr.callee)
+            return self.invoke(callee, obj, expr, tail)
+        else:
+            callee = self.evaluate(expr.callee)
 
         arguments: list[Any] = [self.evaluate(argument) for argument in expr.arguments]
 
@@ -198,17 +339,55 @@ class Interpreter(Visitor):
                 f"Expected {function.arity()} arguments but got {len(arguments)}."
             )
 
+        if tail and type(function) is LoxFunction:
+            self.tail_call = (function, function.closure, arguments)
+            return TAIL_CALL
+
         return function.call(self, arguments)
 
+    def invoke(
+        self, method: LoxFunction, obj: LoxInstance, expr: CallExpr, tail: bool
+    ) -> Any:
+        arguments: list[Any] = [self.evaluate(argument) for argument in expr.arguments]
+
+        if len(arguments) != method.arity():
+            raise LoxRuntimeError(
+                f"Expected {method.arity()} arguments but got {len(arguments)}."
+            )
+
+        if tail:
+            self.tail_call = (method, method.receiver(obj), arguments)
+            return TAIL_CALL
+
+        return method.invoke(self, obj, arguments)
+
     def visit_get_expr(self, expr: GetExpr) -> Any:
         obj: Any = self.evaluate(expr.object)
         if isinstance(obj, LoxInstance):
-            return obj.get(expr.name)
+            return self.get_cache(expr).get(obj, expr.name)
+
+        return self.get_property(obj, expr.name)
+
+    def get_cache(self, expr: GetExpr) -> GetCache:
+        if expr.cache is None:
+            expr.cache = GetCache(expr.name)
+            self.caches.append(expr.cache)
+        return expr.cache
+
+    def set_cache(self, expr: SetExpr) -> SetCache:
+        if expr.cache is None:
+            expr.cache = SetCache(expr.name)
+            self.caches.append(expr.cache)
+        return expr.cache
+
+    def get_property(self, obj: Any, name: Token) -> Any:
+        if isinstance(obj, LoxInstance):
+            return obj.get(name)
 
-        self.error(expr.name, "Only instances have properties")
+        self.error(name, "Only instances have properties")
 
     def visit_grouping_expr(self, expr: GroupingExpr):
-        return self.evaluate(expr)
+        return self.evaluate(expr.expression)
 
     def visit_literal_expr(self, expr: LiteralExpr) -> Any:
         return expr.value
@@ -231,22 +410,28 @@ class Interpreter(Visitor):
             raise LoxRuntimeError(f"{expr.name} Only instances have fields")
 
         value: Any = self.evaluate(expr.value)
-        obj.set(expr, value)
+        self.set_cache(expr).set(obj, value)
         return value
 
     def visit_super_expr(self, expr: SuperExpr):
-        distance: Optional[int] = self.locals.get(expr)
+        superclass, obj = self.super_receiver(expr)
+        return self.find_super_method(superclass, expr).bind(obj)
+
+    def super_receiver(self, expr: SuperExpr) -> tuple[LoxClass, LoxInstance]:
+        distance: Optional[int] = expr.depth
         if distance is None:
             raise Exception("Should have distance here")
 
-        superclass: LoxClass = self.environment.get_at(distance + 1, "super")
-        obj: LoxInstance = self.environment.get_at(distance - 1, "this")
+        superclass: LoxClass = self.environment.get_at(distance, 0)
+        obj: LoxInstance = self.environment.get_at(distance - 1, 0)
+        return superclass, obj
 
+    def find_super_method(self, superclass: LoxClass, expr: SuperExpr) -> LoxFunction:
         method: Optional[LoxFunction] = superclass.find_method(expr.method.lexeme)
         if method is None:
             raise Exception(f"{expr.method.lexeme} Undefined property")
 
-        return method.bind(obj)
+        return method
 
     def visit_this_expr(self, expr: ThisExpr):
         return self.lookup_variable(expr.keyword, expr)
@@ -254,12 +439,31 @@ class Interpreter(Visitor):
     def visit_unary_expr(self, expr: UnaryExpr):
         right: Any = self.evaluate(expr.right)
 
+        if type(right) is float:
+            expr.feedback += 1
+            if expr.feedback >= QUICKEN_AFTER and expr.operator.type == TokenType.MINUS:
+                expr.__class__ = QuickUnaryExpr
+        else:
+            expr.feedback = min(expr.feedback, 0)
+
+        return self.unary(expr, right)
+
+    def visit_quick_unary_expr(self, expr: QuickUnaryExpr):
+        right: Any = self.evaluate(expr.right)
+        if type(right) is float:
+            return -right
+
+        expr.__class__ = UnaryExpr
+        expr.feedback = -BACKOFF
+        return self.unary(expr, right)
+
+    def unary(self, expr: UnaryExpr, right: Any):
         match expr.operator.type:
             case TokenType.BANG:
                 return not self.is_truthy(right)
             case TokenType.MINUS:
                 self.check_number_operand(expr.operator, right)
-                return -float(right)
+                return -right
             case _:
                 pass
 
@@ -267,19 +471,21 @@ class Interpreter(Visitor):
         return self.lookup_variable(expr.name, expr)
 
     def lookup_variable(self, name: Token, expr: Expr):
-        distance: Optional[int] = self.locals.get(expr)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
+        if expr.depth is not None:
+            environment = self.environment
+            for _ in range(expr.depth):
+                environment = environment.enclosing
+            return environment.values[expr.slot]
 
         return self.globals.get(name)
 
     def check_number_operand(self, operator: Token, operand: Any):
-        if isinstance(operand, float):
+        if type(operand) is float:
             return
         raise LoxRuntimeError(operator, "Operand must be a number")
 
     def check_number_operands(self, operator: Token, left_operand: Any, right_operand):
-        if isinstance(left_operand, float) and isinstance(right_operand, float):
+        if type(left_operand) is float and type(right_operand) is float:
             return
         raise LoxRuntimeError(operator, "Operands must be a numbers")
 
@@ -294,7 +500,7 @@ class Interpreter(Visitor):
                 txt = txt[0:-2]
 
             return txt
-        if isinstance(obj, LoxClass):
+        if isinstance(obj, (LoxCallable, LoxInstance)):
             return obj.to_string()
 
         # Does this never raise?
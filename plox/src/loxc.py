@@ -0,0 +1,123 @@
+import argparse
+import difflib
+import importlib.util
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+from parser import Parser
+from types import ModuleType
+from typing import Optional
+
+import main
+from interpreter import Interpreter
+from main import Lox
+from optimizer import Optimizer
+from regex_scanner import RegexScanner
+from resolver import Resolver
+from stmt import Stmt
+from transpiler import Transpiler
+
+
+def transpile(source: str, source_name: str) -> Optional[str]:
+    tokens = RegexScanner(source).scan_tokens()
+    stmts: list[Stmt] = Parser(tokens, Lox.error).parse()
+    if main.HAD_ERROR:
+        return None
+
+    stmts = Optimizer().optimize(stmts)
+    interpreter = Interpreter(Lox.error)
+    Resolver(interpreter).resolve(stmts)
+    if main.HAD_ERROR:
+        return None
+
+    return Transpiler().transpile(stmts, source_name)
+
+
+def module_path(script: str) -> str:
+    root, _ = os.path.splitext(script)
+    return root + "_lox.py"
+
+
+def load_module(path: str) -> ModuleType:
+    """Imports the generated module, letting python cache it as a .pyc"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise Exception(f"Can't import {path}")
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def compile_file(script: str, output: Optional[str]) -> Optional[str]:
+    output = output or module_path(script)
+    with open(script) as fp:
+        source = fp.read()
+
+    code = transpile(source, os.path.basename(script))
+    if code is None:
+        return None
+
+    with open(output, "w") as fp:
+        fp.write(code)
+    return output
+
+
+def check(script: str, output: str) -> bool:
+    """Runs both the tree-walker and the compiled module and diffs the output"""
+    expected = io.StringIO()
+    with redirect_stdout(expected):
+        Lox(script).run_file()
+
+    actual = io.StringIO()
+    with redirect_stdout(actual):
+        load_module(output).run()
+
+    diff = list(
+        difflib.unified_diff(
+            expected.getvalue().splitlines(),
+            actual.getvalue().splitlines(),
+            "interpreter",
+            output,
+            lineterm="",
+        )
+    )
+    for line in diff:
+        print(line)
+    return not diff
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(prog="plox")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = commands.add_parser("compile", help="transpile to python")
+    compile_parser.add_argument("script")
+    compile_parser.add_argument("-o", "--output")
+    compile_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="diff the compiled module's output against the interpreter",
+    )
+
+    run_parser = commands.add_parser("run", help="compile if stale and run")
+    run_parser.add_argument("script")
+
+    args = arg_parser.parse_args()
+
+    if args.command == "compile":
+        output = compile_file(args.script, args.output)
+        if output is None:
+            sys.exit(65)
+        if args.check and not check(args.script, output):
+            sys.exit(1)
+    else:
+        output = module_path(args.script)
+        if not os.path.exists(output) or os.path.getmtime(
+            output
+        ) < os.path.getmtime(args.script):
+            if compile_file(args.script, output) is None:
+                sys.exit(65)
+        load_module(output).run()
@@ -1,16 +1,35 @@
 from __future__ import annotations
 
+import math
 from abc import ABC
+from collections import OrderedDict, deque
+from enum import Enum, auto
 from time import time
 from typing import Any, Dict, Optional, Union
 
 from _token import Token
-from environment import Environment
+from environment import Environment, SlotEnvironment
 from stmt import FunctionStmt
 
 
-class Return(Exception):
-    pass
+class Completion(Enum):
+    """
+    Abrupt completion handed back by statement execution. Statements that
+    complete normally return None, a `return` hands back RETURN and leaves
+    its value in the interpreter's return_value. A `return` of a call in
+    tail position hands back TAIL_CALL and leaves the call to make in the
+    interpreter's tail_call for LoxFunction.run to continue with.
+    """
+
+    RETURN = auto()
+    TAIL_CALL = auto()
+
+
+RETURN = Completion.RETURN
+TAIL_CALL = Completion.TAIL_CALL
+
+# Memo.lookup's result for arguments it has no result for
+MISSING = object()
 
 
 class LoxCallable(ABC):
@@ -23,17 +42,26 @@ class LoxCallable(ABC):
 
 class LoxFunction(LoxCallable):
     def __init__(
-        self, declaration: FunctionStmt, closure: Environment, is_initializer: bool
+        self,
+        declaration: FunctionStmt,
+        closure: Environment | SlotEnvironment,
+        is_initializer: bool,
     ) -> None:
         self.declaration: FunctionStmt = declaration
-        self.closure: Environment = closure
+        self.closure: Environment | SlotEnvironment = closure
         self.is_initializer: bool = is_initializer
+        self.memo: Optional[Memo] = None
 
     def bind(self, instance: LoxInstance):
-        environment: Environment = self.closure
-        environment.define("this", instance)
+        return LoxFunction(
+            self.declaration, self.receiver(instance), self.is_initializer
+        )
 
-        return LoxFunction(self.declaration, environment, self.is_initializer)
+    def receiver(self, instance: LoxInstance) -> SlotEnvironment:
+        """The scope holding this for a call on instance"""
+        environment: SlotEnvironment = SlotEnvironment(self.closure)
+        environment.values = [instance]
+        return environment
 
     def to_string(self):
         return f"<fn {self.declaration.name.lexeme}>"
@@ -42,20 +70,137 @@ class LoxFunction(LoxCallable):
         return len(self.declaration.params)
 
     def call(self, interpreter, arguments: list[Any]):
-        environment: Environment = Environment(self.closure)
-
-        for i in range(len(self.declaration.params)):
-            environment.define(self.declaration.params[i].lexeme, arguments[i])
-
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except Return as r:
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return r.args[0]
+        if self.memo is not None:
+            return self.memo.call(self, interpreter, arguments)
+        return self.run(interpreter, self.closure, arguments)
+
+    def invoke(self, interpreter, instance: LoxInstance, arguments: list[Any]):
+        """Calls the method with instance as this without binding it first"""
+        return self.run(interpreter, self.receiver(instance), arguments)
+
+    def run(
+        self,
+        interpreter,
+        closure: Environment | SlotEnvironment,
+        arguments: list[Any],
+    ):
+        """
+        Trampoline for tail calls, the callee's body runs in this activation
+        instead of a nested one. A memoized callee is looked up first, every
+        call in the chain returns what the last one does so that's what the
+        misses are stored with.
+        """
+        function: LoxFunction = self
+        pending: Optional[deque[tuple[Memo, tuple]]] = None
+        result: Any = MISSING
+        while True:
+            environment: SlotEnvironment = SlotEnvironment(closure)
+            environment.values = arguments
+
+            completion = interpreter.execute_body(function.declaration, environment)
+            if completion is not TAIL_CALL:
+                break
+            function, closure, arguments = interpreter.tail_call
+            if function.memo is not None:
+                if pending is None:
+                    pending = function.memo.pending()
+                result = function.memo.tail_lookup(arguments, pending)
+                if result is not MISSING:
+                    break
+
+        if result is MISSING:
+            if function.is_initializer:
+                result = closure.get_at(0, 0)
+            elif completion is RETURN:
+                result = interpreter.return_value
+            else:
+                result = None
+        if pending:
+            Memo.store_pending(pending, result)
+        return result
+
+
+class Memo:
+    """
+    Bounded LRU cache of a pure function's results, keyed on its arguments.
+    Calls with anything but numbers, strings, booleans and nil aren't cached.
+    """
+
+    def __init__(self, name: str, size: int) -> None:
+        self.name: str = name
+        self.size: int = size
+        self.results: OrderedDict[tuple, Any] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def call(self, function: LoxFunction, interpreter, arguments: list[Any]) -> Any:
+        key: Optional[tuple] = self.key(arguments)
+        if key is None:
+            return function.run(interpreter, function.closure, arguments)
+
+        result: Any = self.lookup(key)
+        if result is MISSING:
+            result = function.run(interpreter, function.closure, arguments)
+            self.store(key, result)
+        return result
+
+    def lookup(self, key: tuple) -> Any:
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        self.misses += 1
+        return MISSING
+
+    def pending(self) -> deque[tuple[Memo, tuple]]:
+        """
+        Misses in a chain of tail calls, waiting for its result. Only the
+        last size of them are kept, storing any earlier one would evict it.
+        """
+        return deque(maxlen=self.size)
+
+    def tail_lookup(self, arguments: list[Any], pending: deque) -> Any:
+        """Looks up a call in tail position, a miss is added to pending"""
+        key: Optional[tuple] = self.key(arguments)
+        if key is None:
+            return MISSING
+
+        result: Any = self.lookup(key)
+        if result is MISSING:
+            pending.append((self, key))
+        return result
+
+    @staticmethod
+    def store_pending(pending: deque[tuple[Memo, tuple]], result: Any) -> None:
+        for memo, key in pending:
+            memo.store(key, result)
+
+    def store(self, key: tuple, result: Any) -> None:
+        self.results[key] = result
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def key(arguments: list[Any]) -> Optional[tuple]:
+        # Types are part of the key since True == 1.0, -0.0 == 0.0 and both
+        # hash the same but print differently
+        for argument in arguments:
+            if type(argument) is float:
+                if argument == 0.0 and math.copysign(1.0, argument) < 0:
+                    return None
+            elif argument is not None and type(argument) not in (str, bool):
+                return None
+
+        return (*arguments, *map(type, arguments))
 
-        if self.is_initializer:
-            return self.closure.get_at(0, "this")
+    def to_string(self) -> str:
+        return (
+            f"<fn {self.name}>: {self.hits} hits, {self.misses} misses, "
+            f"{self.evictions} evictions"
+        )
 
 
 class Clock(LoxCallable):
@@ -73,12 +218,25 @@ class Clock(LoxCallable):
 
 
 class LoxClass(LoxCallable):
+    """
+    Inherited methods are copied down when the class is created, so methods
+    holds the whole table and is never changed afterwards.
+    """
+
     def __init__(
         self, name: str, superclass: Optional[LoxClass], methods: Dict[str, LoxFunction]
     ) -> None:
         self.name: str = name
-        self.methods: Dict[str, LoxFunction] = methods
         self.superclass: Optional[LoxClass] = superclass
+        self.methods: Dict[str, LoxFunction] = {}
+        if superclass is not None:
+            self.methods.update(superclass.methods)
+        self.methods.update(methods)
+
+        self.initializer: Optional[LoxFunction] = self.methods.get("init")
+        self._arity: int = 0 if self.initializer is None else self.initializer.arity()
+        # Instances start out with no fields, they share shapes from here on
+        self.shape: Shape = Shape({})
 
     def to_string(self):
         return self.name
@@ -86,35 +244,55 @@ class LoxClass(LoxCallable):
     def call(self, interpreter, arguments) -> Any:
         instance: LoxInstance = LoxInstance(self)
 
-        initializer: Union[LoxFunction, None] = self.find_method("init")
-        if initializer is not None:
-            initializer.bind(instance).call(interpreter, arguments)
+        if self.initializer is not None:
+            self.initializer.invoke(interpreter, instance, arguments)
 
         return instance
 
     def arity(self) -> int:
-        initializer: Union[LoxFunction, None] = self.find_method("init")
-        return 0 if initializer is None else initializer.arity()
+        return self._arity
 
     def find_method(self, name: str) -> Union[LoxFunction, None]:
-        if name in self.methods:
-            return self.methods[name]
+        return self.methods.get(name)
+
+
+class Shape:
+    """
+    Hidden class, maps field names to indexes into an instance's values.
+    Adding a field moves the instance to the next shape, and instances that
+    got the same fields in the same order end up sharing a shape.
+    """
 
-        if self.superclass is not None:
-            return self.superclass.find_method(name)
+    __slots__ = ("slots", "transitions")
+
+    def __init__(self, slots: Dict[str, int]) -> None:
+        self.slots: Dict[str, int] = slots
+        self.transitions: Dict[str, Shape] = {}
+
+    def add(self, name: str) -> Shape:
+        shape: Optional[Shape] = self.transitions.get(name)
+        if shape is None:
+            shape = Shape({**self.slots, name: len(self.slots)})
+            self.transitions[name] = shape
+
+        return shape
 
 
 class LoxInstance:
+    __slots__ = ("klass", "shape", "values")
+
     def __init__(self, klass: LoxClass) -> None:
         self.klass: LoxClass = klass
-        self.fields: dict = {}
+        self.shape: Shape = klass.shape
+        self.values: list[Any] = []
 
     def to_string(self) -> str:
         return self.klass.name + " instance"
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self.fields:
-            return self.fields[name.lexeme]
+        slot: Optional[int] = self.shape.slots.get(name.lexeme)
+        if slot is not None:
+            return self.values[slot]
 
         method: Union[LoxFunction, None] = self.klass.find_method(name.lexeme)
         if method is not None:
@@ -123,4 +301,9 @@ class LoxInstance:
         raise Exception(f"Undefined property {name.lexeme}")
 
     def set(self, name: Token, value: Any) -> None:
-        self.fields[name.lexeme] = value
+        slot: Optional[int] = self.shape.slots.get(name.lexeme)
+        if slot is None:
+            self.shape = self.shape.add(name.lexeme)
+            self.values.append(value)
+        else:
+            self.values[slot] = value
@@ -1,54 +1,211 @@
+import argparse
+import gc
+import mmap
+import os
 import sys
 from parser import Parser
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
+import program_cache
 from _token import Token
 from ast_printer import AstPrinter
+from closure_compiler import ClosureInterpreter
+from compiler import Compiler
 from expression import Expr
+from inline_cache import report
 from interpreter import Interpreter, LoxRuntimeError
+from optimizer import Optimizer, count_nodes
+from purity import Purity
+from regex_scanner import RegexScanner
 from resolver import Resolver
-from scanner import Scanner
+from stackless import StacklessInterpreter
 from stmt import Stmt
 from token_type import TokenType
+from vm import VM
 
 HAD_ERROR = False
 
+ENGINES = ["interpreter", "vm", "closure", "stackless"]
+
 
 class Lox:
-    def __init__(self, file_name: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        file_name: Optional[str] = None,
+        engine: str = "interpreter",
+        ic_stats: bool = False,
+        opt_stats: bool = False,
+        memo_size: int = 0,
+        memo_stats: bool = False,
+        stream: bool = False,
+        cache: bool = True,
+    ) -> None:
+        if engine not in ENGINES:
+            raise Exception(f"Unknown engine {engine}, expected one of {ENGINES}")
+        if stream and memo_size > 0:
+            raise Exception("Memoizing needs the whole program, it can't stream")
+        if engine == "vm" and memo_size > 0:
+            raise Exception("Memoizing needs a tree-walking engine, not the vm")
         self.file_name: Optional[str] = file_name
-        self.input = None
+        self.engine: str = engine
+        self.ic_stats: bool = ic_stats
+        self.opt_stats: bool = opt_stats
+        self.memo_size: int = memo_size
+        self.memo_stats: bool = memo_stats
+        self.stream: bool = stream
+        self.cache: bool = cache
+        self.input: Optional[str | mmap.mmap] = None
 
     def run_file(self):
         if not self.file_name:
             raise Exception("Trying to read file without one assigned?")
-        fp = open(self.file_name).readlines()
-        self.input = "\n".join(fp)[:-1]
-        self._run()
+        with open(self.file_name, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise Exception("Trying to run smth without input")
+            # The scanner reads the mapped bytes in place, so the source is
+            # never copied into a str and only the lexemes get decoded
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as self.input:
+                self._run()
 
     def _run(self):
         if not self.input:
             raise Exception("Trying to run smth without input")
 
-        self.scanner = Scanner(self.input)
+        if self.stream:
+            self._run_stream()
+            return
+
+        if self.engine == "vm":
+            self.compiler = Compiler(Lox.error)
+            stmts: Optional[list[Stmt]] = self._compile(self.compiler)
+            if stmts is None:
+                return
+
+            self.vm = VM(Lox.error)
+            self.vm.interpret(self.compiler.compile(stmts))
+            return
+
+        self.interpreter = self._interpreter()
+        stmts = self._compile(self.interpreter)
+        if stmts is None:
+            return
+
+        if self.memo_size > 0:
+            Purity().analyze(stmts)
+
+        self.interpreter.interpret(stmts)
+        self._report_stats()
+
+    def _compile(self, engine: Any) -> Optional[list[Stmt]]:
+        """
+        Scans, parses, optimizes and resolves the input for engine, None if
+        it has errors. An unchanged script is loaded from its cache instead,
+        skipping all of that.
+        """
+        path: Optional[str] = None
+        if self.cache and self.file_name and not self.opt_stats:
+            path = program_cache.cache_path(self.file_name)
+            key: bytes = program_cache.cache_key(self.input)
+            cached: Optional[list[Stmt]] = program_cache.load(path, key)
+            if cached is not None:
+                # Unpickled with the collector paused, the whole program sits
+                # in the youngest generation and would be walked again and
+                # again once it's enabled. It lives as long as the run does,
+                # so it's moved out of the collector's sight for good.
+                gc.freeze()
+                return cached
+
+        self.scanner = RegexScanner(self.input)
         self.tokens: list[Token] = self.scanner.scan_tokens()
 
         self.parser = Parser(self.tokens, self.error)
         stmts: list[Stmt] = self.parser.parse()
 
-        self.interpreter = Interpreter(Lox.error)
-
         if HAD_ERROR:
-            return
+            return None
 
-        self.resolver: Resolver = Resolver(self.interpreter)
+        before: int = count_nodes(stmts) if self.opt_stats else 0
+        stmts = Optimizer().optimize(stmts)
+        if self.opt_stats:
+            print(
+                f"{before} nodes before optimizing, {count_nodes(stmts)} after",
+                file=sys.stderr,
+            )
+
+        self.resolver: Resolver = Resolver(engine)
         self.resolver.resolve(stmts)
 
         if HAD_ERROR:
             print("Had error")
-            return
+            return None
 
-        self.interpreter.interpret(stmts)
+        if path is not None:
+            program_cache.store(path, key, stmts)
+        return stmts
+
+    def _run_stream(self):
+        """
+        Scans, parses, resolves and runs one top-level declaration at a
+        time, so only the current declaration's tokens and tree are alive
+        next to what the program itself keeps, like function bodies. Unlike
+        a whole file run, the declarations before a syntax error have
+        already run by the time it's reported, after it nothing more runs
+        but the rest is still parsed to report further errors.
+        """
+        self.parser = Parser(RegexScanner(self.input).scan(), self.error)
+        optimizer: Optimizer = Optimizer()
+        if self.engine == "vm":
+            self.vm = VM(Lox.error)
+        else:
+            self.interpreter = self._interpreter()
+            self.resolver: Resolver = Resolver(self.interpreter)
+
+        before: int = 0
+        after: int = 0
+        for stmt in self.parser.declarations():
+            if HAD_ERROR:
+                continue
+
+            if self.opt_stats:
+                before += count_nodes(stmt)
+            stmts: list[Stmt] = optimizer.optimize([stmt])
+            if self.opt_stats:
+                after += count_nodes(stmts)
+
+            if self.engine == "vm":
+                compiler: Compiler = Compiler(Lox.error)
+                Resolver(compiler).resolve(stmts)
+                if HAD_ERROR:
+                    continue
+                if not self.vm.interpret(compiler.compile(stmts)):
+                    break
+            else:
+                self.resolver.resolve(stmts)
+                if HAD_ERROR:
+                    continue
+                if not self.interpreter.interpret(stmts):
+                    break
+
+        if self.opt_stats:
+            print(f"{before} nodes before optimizing, {after} after", file=sys.stderr)
+        if self.engine != "vm":
+            self._report_stats()
+
+    def _interpreter(self) -> Interpreter:
+        if self.engine == "closure":
+            return ClosureInterpreter(Lox.error, self.memo_size)
+        if self.engine == "stackless":
+            return StacklessInterpreter(Lox.error, self.memo_size)
+        return Interpreter(Lox.error, self.memo_size)
+
+    def _report_stats(self):
+        if self.ic_stats:
+            for line in report(self.interpreter.caches):
+                print(line, file=sys.stderr)
+
+        if self.memo_stats:
+            for memo in self.interpreter.memos:
+                print(memo.to_string(), file=sys.stderr)
 
     def run_repl(self):
         while True:
@@ -80,13 +237,65 @@ class Lox:
 
 
 if __name__ == "__main__":
-    args = sys.argv
-    if len(args) > 2:
-        print("Usage: plox [script]")
-        exit(64)
-    if len(args) == 2:
-        lox = Lox(args[1])
+    arg_parser = argparse.ArgumentParser(prog="plox")
+    arg_parser.add_argument("script", nargs="?")
+    arg_parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="interpreter",
+        help="tree-walking interpreter, bytecode vm, closure compiled tree or "
+        "tree-walking with Lox calls kept off the Python stack",
+    )
+    arg_parser.add_argument(
+        "--ic-stats",
+        action="store_true",
+        help="print inline cache hits and misses per property site to stderr",
+    )
+    arg_parser.add_argument(
+        "--opt-stats",
+        action="store_true",
+        help="print the number of AST nodes before and after optimizing to stderr",
+    )
+    arg_parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="cache the results of functions that are provably pure",
+    )
+    arg_parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=1024,
+        help="results kept per memoized function",
+    )
+    arg_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="print memo cache hits, misses and evictions to stderr",
+    )
+    arg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="parse and run one top-level declaration at a time to bound memory",
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always compile the script instead of loading the compiled program "
+        "cached in __pycache__ by an earlier run, and don't cache it",
+    )
+    args = arg_parser.parse_args()
+
+    lox = Lox(
+        args.script,
+        args.engine,
+        ic_stats=args.ic_stats,
+        opt_stats=args.opt_stats,
+        memo_size=args.memo_size if args.memoize else 0,
+        memo_stats=args.memo_stats,
+        stream=args.stream,
+        cache=not args.no_cache,
+    )
+    if args.script:
         lox.run_file()
     else:
-        lox = Lox()
         lox.run_repl()
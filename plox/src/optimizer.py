@@ -0,0 +1,225 @@
+import math
+from typing import Any, Optional
+
+from ast_walk import children
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
+                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import NUMBER_OPS, TokenType
+
+# Returned by fold_binary when the operation has to happen at runtime
+NOT_CONSTANT = object()
+
+
+def is_truthy(value: Any) -> bool:
+    return value is not None and value is not False
+
+
+def fold_binary(op: TokenType, left: Any, right: Any) -> Any:
+    if op == TokenType.EQUAL_EQUAL:
+        return left == right
+    if op == TokenType.BANG_EQUAL:
+        return left != right
+    if op == TokenType.PLUS and type(left) is str and type(right) is str:
+        return left + right
+
+    # Anything else either raises at runtime or isn't worth folding
+    if type(left) is not float or type(right) is not float:
+        return NOT_CONSTANT
+    if op == TokenType.SLASH and right == 0:
+        return NOT_CONSTANT
+
+    value: Any = NUMBER_OPS[op](left, right)
+    if type(value) is float and not math.isfinite(value):
+        return NOT_CONSTANT
+    return value
+
+
+def count_nodes(node: Any) -> int:
+    if isinstance(node, list):
+        return sum(count_nodes(child) for child in node)
+    return 1 + sum(count_nodes(child) for child in children(node))
+
+
+class Optimizer(Visitor):
+    """
+    Rewrites the parsed program before it's resolved. Operators with
+    literal operands are folded, if/while/for with a literal condition lose the
+    branches that can't run and statements after a return are dropped.
+    Operations that fail at runtime, like "a" - 1, are left in place so
+    they still fail there. Pruned code is not resolved, so static errors
+    inside it are no longer reported.
+    """
+
+    def optimize(self, stmts: list[Stmt]) -> list[Stmt]:
+        return self.statements(stmts)
+
+    def statements(self, stmts: list[Stmt]) -> list[Stmt]:
+        result: list[Stmt] = []
+        for stmt in stmts:
+            optimized: Optional[Stmt] = stmt.accept(self)
+            if optimized is None:
+                continue
+
+            result.append(optimized)
+            if isinstance(optimized, ReturnStmt):
+                break
+
+        return result
+
+    def statement(self, stmt: Stmt) -> Stmt:
+        """Optimizes a statement that can't be removed, like a loop body"""
+        optimized: Optional[Stmt] = stmt.accept(self)
+        return BlockStmt([]) if optimized is None else optimized
+
+    def expression(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> Stmt:
+        stmt.statements = self.statements(stmt.statements)
+        return stmt
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> Stmt:
+        for method in stmt.methods:
+            self.visit_function_stmt(method)
+        return stmt
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> Optional[Stmt]:
+        stmt.expression = self.expression(stmt.expression)
+        if isinstance(stmt.expression, LiteralExpr):
+            return None
+        return stmt
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> Stmt:
+        stmt.body = self.statements(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt: IfStmt) -> Optional[Stmt]:
+        stmt.condition = self.expression(stmt.condition)
+        if isinstance(stmt.condition, LiteralExpr):
+            if is_truthy(stmt.condition.value):
+                return stmt.then_branch.accept(self)
+            if stmt.else_branch is not None:
+                return stmt.else_branch.accept(self)
+            return None
+
+        stmt.then_branch = self.statement(stmt.then_branch)
+        if stmt.else_branch is not None:
+            stmt.else_branch = stmt.else_branch.accept(self)
+        return stmt
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> Stmt:
+        stmt.expression = self.expression(stmt.expression)
+        return stmt
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> Stmt:
+        if stmt.value is not None:
+            stmt.value = self.expression(stmt.value)
+        return stmt
+
+    def visit_var_stmt(self, stmt: VarStmt) -> Stmt:
+        if stmt.initializer is not None:
+            stmt.initializer = self.expression(stmt.initializer)
+        return stmt
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> Optional[Stmt]:
+        stmt.condition = self.expression(stmt.condition)
+        if isinstance(stmt.condition, LiteralExpr) and not is_truthy(
+            stmt.condition.value
+        ):
+            return None
+
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_for_stmt(self, stmt: ForStmt) -> Optional[Stmt]:
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+        if stmt.condition is not None:
+            stmt.condition = self.expression(stmt.condition)
+            if isinstance(stmt.condition, LiteralExpr) and not is_truthy(
+                stmt.condition.value
+            ):
+                # The initializer still runs, in a scope of its own
+                if stmt.initializer is None:
+                    return None
+                return BlockStmt([stmt.initializer])
+
+        if stmt.increment is not None:
+            stmt.increment = self.expression(stmt.increment)
+            if isinstance(stmt.increment, LiteralExpr):
+                stmt.increment = None
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_assign_expr(self, expr: AssignExpr) -> Expr:
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> Expr:
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        if isinstance(expr.left, LiteralExpr) and isinstance(expr.right, LiteralExpr):
+            value: Any = fold_binary(
+                expr.operator.type, expr.left.value, expr.right.value
+            )
+            if value is not NOT_CONSTANT:
+                return LiteralExpr(value)
+        return expr
+
+    def visit_call_expr(self, expr: CallExpr) -> Expr:
+        expr.callee = self.expression(expr.callee)
+        expr.arguments = [self.expression(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_get_expr(self, expr: GetExpr) -> Expr:
+        expr.object = self.expression(expr.object)
+        return expr
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> Expr:
+        expr.expression = self.expression(expr.expression)
+        if isinstance(expr.expression, LiteralExpr):
+            return expr.expression
+        return expr
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> Expr:
+        expr.left = self.expression(expr.left)
+        expr.right = self.expression(expr.right)
+        if not isinstance(expr.left, LiteralExpr):
+            return expr
+
+        # Lox's and/or hand back one of their operands
+        if is_truthy(expr.left.value) == (expr.operator.type == TokenType.OR):
+            return expr.left
+        return expr.right
+
+    def visit_set_expr(self, expr: SetExpr) -> Expr:
+        expr.object = self.expression(expr.object)
+        expr.value = self.expression(expr.value)
+        return expr
+
+    def visit_super_expr(self, expr: SuperExpr) -> Expr:
+        return expr
+
+    def visit_this_expr(self, expr: ThisExpr) -> Expr:
+        return expr
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> Expr:
+        expr.right = self.expression(expr.right)
+        if not isinstance(expr.right, LiteralExpr):
+            return expr
+
+        value: Any = expr.right.value
+        if expr.operator.type == TokenType.BANG:
+            return LiteralExpr(not is_truthy(value))
+        if type(value) is float:
+            return LiteralExpr(-value)
+        return expr
+
+    def visit_variable_expr(self, expr: VariableExpr) -> Expr:
+        return expr
@@ -1,11 +1,12 @@
-from typing import Any, Optional
+from enum import IntEnum, auto
+from typing import Any, Callable, Iterable, Iterator, Optional
 
 from _token import Token
 from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
                         GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
                         SuperExpr, ThisExpr, UnaryExpr, VariableExpr)
-from stmt import (BlockStmt, ClassStmt, ExpressionStmt, FunctionStmt, IfStmt,
-                  PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
 from token_type import TokenType
 
 
@@ -13,22 +14,93 @@ class ParseError(Exception):
     pass
 
 
+class Precedence(IntEnum):
+    """How tightly an operator binds its operands, loosest first"""
+
+    NONE = 0
+    ASSIGNMENT = auto()
+    OR = auto()
+    AND = auto()
+    EQUALITY = auto()
+    COMPARISON = auto()
+    TERM = auto()
+    FACTOR = auto()
+    UNARY = auto()
+    CALL = auto()
+
+
+# Parser methods starting an expression, by the token they start with
+PREFIX_RULES: dict[TokenType, str] = {
+    TokenType.FALSE: "_false",
+    TokenType.TRUE: "_true",
+    TokenType.NIL: "_nil",
+    TokenType.NUMBER: "_literal",
+    TokenType.STRING: "_literal",
+    TokenType.SUPER: "_super",
+    TokenType.THIS: "_this",
+    TokenType.IDENTIFIER: "_variable",
+    TokenType.LEFT_PAREN: "_grouping",
+    TokenType.BANG: "_unary",
+    TokenType.MINUS: "_unary",
+}
+
+# Parser methods continuing an expression with the operator they follow,
+# and how tightly that operator binds
+INFIX_RULES: dict[TokenType, tuple[Precedence, str]] = {
+    TokenType.EQUAL: (Precedence.ASSIGNMENT, "_assign"),
+    TokenType.OR: (Precedence.OR, "_logical"),
+    TokenType.AND: (Precedence.AND, "_logical"),
+    TokenType.BANG_EQUAL: (Precedence.EQUALITY, "_binary"),
+    TokenType.EQUAL_EQUAL: (Precedence.EQUALITY, "_binary"),
+    TokenType.GREATER: (Precedence.COMPARISON, "_binary"),
+    TokenType.GREATER_EQUAL: (Precedence.COMPARISON, "_binary"),
+    TokenType.LESS: (Precedence.COMPARISON, "_binary"),
+    TokenType.LESS_EQUAL: (Precedence.COMPARISON, "_binary"),
+    TokenType.MINUS: (Precedence.TERM, "_binary"),
+    TokenType.PLUS: (Precedence.TERM, "_binary"),
+    TokenType.SLASH: (Precedence.FACTOR, "_binary"),
+    TokenType.STAR: (Precedence.FACTOR, "_binary"),
+    TokenType.LEFT_PAREN: (Precedence.CALL, "_call"),
+    TokenType.DOT: (Precedence.CALL, "_get"),
+}
+
+UNARY_OPERATORS = (TokenType.BANG, TokenType.MINUS)
+
+InfixRule = tuple[Precedence, Callable[[Expr, Token, Precedence], Expr]]
+
+
 class Parser:
-    def __init__(self, tokens: list[Token], error: Any):
-        self._current: int = 0
-        self.tokens = tokens
+    """
+    Pulls tokens from any iterable ending with EOF, a list or a scanner's
+    generator. The grammar never looks further than the next token or
+    back past the one just consumed, so those two are all that's kept.
+    """
+
+    def __init__(self, tokens: Iterable[Token], error: Any):
+        self.tokens: Iterator[Token] = iter(tokens)
         self.error = error
+        self._previous_token: Optional[Token] = None
+        self._next_token: Token = next(self.tokens)
+        self._prefix_rules: dict[TokenType, Callable[[Token], Expr]] = {
+            type: getattr(self, name) for type, name in PREFIX_RULES.items()
+        }
+        self._infix_rules: dict[TokenType, InfixRule] = {
+            type: (precedence, getattr(self, name))
+            for type, (precedence, name) in INFIX_RULES.items()
+        }
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[Stmt]:
+        """Parses the top-level declarations one at a time, as they're asked for"""
         while not self._is_at_end():
             stmt = self.declaration()
             if stmt:
-                statements.append(stmt)
-        return statements
+                yield stmt
 
     def expression(self) -> Expr:
-        return self._assignment()
+        return self._parse_precedence(Precedence.ASSIGNMENT)
 
     def declaration(self) -> Optional[Stmt]:
         try:
@@ -69,40 +141,32 @@ class Parser:
             return BlockStmt(self.block())
         if self._match(TokenType.IF):
             return self.if_statement()
+        if self._match(TokenType.WHILE):
+            return self.while_statement()
         return self.expression_statement()
 
     def for_statement(self) -> Stmt:
         self._consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
 
-        initializer = None
-
+        initializer: Optional[Stmt] = None
         if self._match(TokenType.VAR):
             initializer = self.var_declaration()
-        else:
+        elif not self._match(TokenType.SEMICOLON):
             initializer = self.expression_statement()
 
-        condition: Expr = None
+        condition: Optional[Expr] = None
         if not self._check(TokenType.SEMICOLON):
             condition = self.expression()
 
         self._consume(TokenType.SEMICOLON, "Expect ';' after loop condition")
 
-        increment: Expr = None
+        increment: Optional[Expr] = None
         if not self._check(TokenType.RIGHT_PAREN):
             increment = self.expression()
         self._consume(TokenType.RIGHT_PAREN, "Expect ')' after for clauses")
 
         body: Stmt = self.statement()
-        if increment is not None:
-            body = BlockStmt([body, ExpressionStmt(increment)])
-
-        if condition is None:
-            condition = LiteralExpr(True)
-        body = WhileStmt(condition, body)
-
-        if initializer is not None:
-            body = BlockStmt([initializer, body])
-        return body
+        return ForStmt(initializer, condition, increment, body)
 
     def if_statement(self):
         self._consume(TokenType.LEFT_PAREN, "Expect '(' after 'if'.")
@@ -189,123 +253,60 @@ class Parser:
         self._consume(TokenType.RIGHT_BRACE, "Expect '}' after block.")
         return stmts
 
-    def _or(self):
-        expr: Expr = self._and()
-
-        while self._match(TokenType.OR):
-            operator: Token = self._previous()
-
-            right: Expr = self._and()
-
-            expr = LogicalExpr(expr, operator, right)
-
-        return expr
-
-    def _and(self):
-        expr: Expr = self._equality()
-
-        while self._match(TokenType.AND):
-            operator: Token = self._previous()
-
-            right: Expr = self._equality()
-
-            expr = LogicalExpr(expr, operator, right)
-
-        return expr
-
-    def _assignment(self) -> Expr:
-        expr: Expr = self._or()
-        if self._match(TokenType.EQUAL):
-            equals: Token = self._previous()
-            value: Expr = self._assignment()
-
-            if isinstance(expr, VariableExpr):
-                name: Token = expr.name
-                return AssignExpr(name, value)
-            elif isinstance(expr, GetExpr):
-                get: GetExpr = expr
-                return SetExpr(get.object, get.name, value)
-
-            self.error(equals, "Invalid assignment target.")
-
-        return expr
-
-    def _equality(self) -> Expr:
-        expr: Expr = self._comparison()
-
-        while self._match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            operator: Token = self._previous()
-            right: Expr = self._comparison()
-
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
-    def _comparison(self):
-        expr: Expr = self._term()
-
-        while self._match(
-            TokenType.GREATER,
-            TokenType.GREATER_EQUAL,
-            TokenType.LESS,
-            TokenType.LESS_EQUAL,
-        ):
-            operator: Token = self._previous()
-            right: Expr = self._term()
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
-    def _term(self):
-        expr: Expr = self._factor()
-
-        while self._match(TokenType.MINUS, TokenType.PLUS):
-            operator: Token = self._previous()
-            right: Expr = self._factor()
-            expr = BinaryExpr(expr, operator, right)
+    def _parse_precedence(self, precedence: Precedence) -> Expr:
+        """
+        Parses an expression whose operators all bind at least as tight as
+        precedence. Operators of one level are gathered in a loop instead of
+        a call per grammar rule, only their right operands recurse.
+        """
+        prefix: Optional[Callable[[Token], Expr]] = self._prefix_rules.get(
+            self._next_token.type
+        )
+        expr: Any = None
+        if prefix is None:
+            self._error(self._peek(), "Expect expression")
+        else:
+            expr = prefix(self._advance())
 
-        return expr
+        infix_rules = self._infix_rules
+        while True:
+            rule: Optional[InfixRule] = infix_rules.get(self._next_token.type)
+            if rule is None or rule[0] < precedence:
+                return expr
+            expr = rule[1](expr, self._advance(), rule[0])
 
     def _error(self, token: Token, msg: str) -> ParseError:
         self.error(token, msg)
         return ParseError()
 
-    def _factor(self):
-        expr: Expr = self._unary()
-
-        while self._match(TokenType.SLASH, TokenType.STAR):
-            operator: Token = self._previous()
-            right: Expr = self._unary()
-
-            expr = BinaryExpr(expr, operator, right)
-
-        return expr
-
-    def _unary(self):
-        if self._match(TokenType.BANG, TokenType.MINUS):
-            operator: Token = self._previous()
-            right: Expr = self._unary()
-            return UnaryExpr(operator, right)
-
-        return self._call()
-
-    def _call(self) -> Expr:
-        expr: Expr = self.primary()
-
-        while True:
-            if self._match(TokenType.LEFT_PAREN):
-                expr = self._finish_call(expr)
-            elif self._match(TokenType.DOT):
-                name = self._consume(
-                    TokenType.IDENTIFIER, "Expect property name after '.'."
-                )
-                expr = GetExpr(expr, name)
+    def _assign(self, target: Expr, equals: Token, precedence: Precedence) -> Expr:
+        # Right associative, a = b = c is a = (b = c). The whole chain is
+        # collected first and then built from the right.
+        assignments: list[tuple[Expr, Token]] = [(target, equals)]
+        value: Expr = self._parse_precedence(Precedence.OR)
+        while self._next_token.type == TokenType.EQUAL:
+            assignments.append((value, self._advance()))
+            value = self._parse_precedence(Precedence.OR)
+
+        for target, equals in reversed(assignments):
+            if isinstance(target, VariableExpr):
+                value = AssignExpr(target.name, value)
+            elif isinstance(target, GetExpr):
+                value = SetExpr(target.object, target.name, value)
             else:
-                break
+                self.error(equals, "Invalid assignment target.")
+                value = target
+        return value
 
-        return expr
+    def _logical(self, left: Expr, operator: Token, precedence: Precedence) -> Expr:
+        right: Expr = self._parse_precedence(Precedence(precedence + 1))
+        return LogicalExpr(left, operator, right)
+
+    def _binary(self, left: Expr, operator: Token, precedence: Precedence) -> Expr:
+        right: Expr = self._parse_precedence(Precedence(precedence + 1))
+        return BinaryExpr(left, operator, right)
 
-    def _finish_call(self, callee: Expr):
+    def _call(self, callee: Expr, paren: Token, precedence: Precedence) -> Expr:
         arguments: list[Expr] = []
 
         if not self._check(TokenType.RIGHT_PAREN):
@@ -317,43 +318,55 @@ class Parser:
 
                 if len(arguments) >= 255:
                     self.error(self._peek(), "Why u gotta have that many arguments for")
-        paren: Token = self._consume(
-            TokenType.RIGHT_PAREN, "Expect ')' after arguments"
-        )
+        paren = self._consume(TokenType.RIGHT_PAREN, "Expect ')' after arguments")
         return CallExpr(callee, paren, arguments)
 
-    def primary(self) -> Expr:
-        if self._match(TokenType.FALSE):
-            return LiteralExpr(False)
+    def _get(self, object: Expr, dot: Token, precedence: Precedence) -> Expr:
+        name: Token = self._consume(
+            TokenType.IDENTIFIER, "Expect property name after '.'."
+        )
+        return GetExpr(object, name)
+
+    def _unary(self, operator: Token) -> Expr:
+        # Stacked operators like - - x are collected rather than recursed on
+        operators: list[Token] = [operator]
+        while self._next_token.type in UNARY_OPERATORS:
+            operators.append(self._advance())
 
-        if self._match(TokenType.TRUE):
-            return LiteralExpr(True)
+        expr: Expr = self._parse_precedence(Precedence.UNARY)
+        for operator in reversed(operators):
+            expr = UnaryExpr(operator, expr)
+        return expr
 
-        if self._match(TokenType.NIL):
-            return LiteralExpr(None)
+    def _grouping(self, paren: Token) -> Expr:
+        expr: Expr = self._parse_precedence(Precedence.ASSIGNMENT)
+        self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression")
+        return GroupingExpr(expr)
 
-        if self._match(TokenType.NUMBER, TokenType.STRING):
-            return LiteralExpr(self._previous().literal)
+    def _literal(self, token: Token) -> Expr:
+        return LiteralExpr(token.literal)
 
-        if self._match(TokenType.SUPER):
-            keyword: Token = self._previous()
-            self._consume(TokenType.DOT, "Expect '.' after 'super'")
-            method: Token = self._consume(
-                TokenType.IDENTIFIER, "Expect superclass method name"
-            )
-            return SuperExpr(keyword, method)
+    def _false(self, token: Token) -> Expr:
+        return LiteralExpr(False)
 
-        if self._match(TokenType.THIS):
-            return ThisExpr(self._previous())
+    def _true(self, token: Token) -> Expr:
+        return LiteralExpr(True)
+
+    def _nil(self, token: Token) -> Expr:
+        return LiteralExpr(None)
+
+    def _super(self, keyword: Token) -> Expr:
+        self._consume(TokenType.DOT, "Expect '.' after 'super'")
+        method: Token = self._consume(
+            TokenType.IDENTIFIER, "Expect superclass method name"
+        )
+        return SuperExpr(keyword, method)
 
-        if self._match(TokenType.IDENTIFIER):
-            return VariableExpr(self._previous())
+    def _this(self, keyword: Token) -> Expr:
+        return ThisExpr(keyword)
 
-        if self._match(TokenType.LEFT_PAREN):
-            expr: Expr = self.expression()
-            self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression")
-            return GroupingExpr(expr)
-        self._error(self._peek(), "Expect expression")
+    def _variable(self, name: Token) -> Expr:
+        return VariableExpr(name)
 
     def _consume(self, type: TokenType, msg: str):
         if self._check(type):
@@ -404,14 +417,15 @@ class Parser:
 
     def _advance(self):
         if not self._is_at_end():
-            self._current += 1
+            self._previous_token = self._next_token
+            self._next_token = next(self.tokens)
         return self._previous()
 
     def _is_at_end(self):
-        return self._peek().type == TokenType.EOF
+        return self._next_token.type == TokenType.EOF
 
     def _peek(self) -> Token:
-        return self.tokens[self._current]
+        return self._next_token
 
     def _previous(self):
-        return self.tokens[self._current - 1]
+        return self._previous_token
@@ -0,0 +1,118 @@
+import contextlib
+import functools
+import gc
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Iterator, Optional
+
+from stmt import Stmt
+
+# Bumped whenever the layout of a cache file changes
+FORMAT = 1
+MAGIC = b"LOXC"
+
+# The modules whose code decides what a scanned, parsed, optimized and
+# resolved program looks like. Changing any of them invalidates every cache.
+COMPILER_MODULES = [
+    "_token",
+    "token_type",
+    "expression",
+    "stmt",
+    "regex_scanner",
+    "parser",
+    "optimizer",
+    "resolver",
+]
+
+
+def cache_path(script: str) -> str:
+    """Where the compiled program of script is kept, script.loxc in __pycache__"""
+    directory, name = os.path.split(os.path.abspath(script))
+    return os.path.join(directory, "__pycache__", os.path.splitext(name)[0] + ".loxc")
+
+
+@functools.cache
+def plox_version() -> bytes:
+    """
+    Identifies this plox by the code of its compiler modules, there's no
+    release number to go by and a cache written by different code can't be
+    trusted.
+    """
+    version = hashlib.sha256(f"{FORMAT} {sys.version}".encode())
+    for name in COMPILER_MODULES:
+        with open(importlib.import_module(name).__file__, "rb") as file:
+            version.update(file.read())
+    return version.digest()
+
+
+def cache_key(source: Any) -> bytes:
+    """The key a cache of source has to match, source being str or bytes like"""
+    if isinstance(source, str):
+        source = source.encode()
+    return hashlib.sha256(plox_version() + hashlib.sha256(source).digest()).digest()
+
+
+@contextlib.contextmanager
+def paused_gc() -> Iterator[None]:
+    """
+    Keeps the cycle collector from running while a program is pickled or
+    unpickled. The millions of nodes and tokens going by would trigger
+    collections that walk the whole growing tree again and again,
+    taking several times longer than the pickling itself.
+    """
+    enabled: bool = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def load(path: str, key: bytes) -> Optional[list[Stmt]]:
+    """The cached program at path if it was stored under key"""
+    try:
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC) + len(key)) != MAGIC + key:
+                return None
+            with paused_gc():
+                return pickle.load(file)
+    except Exception:
+        # Missing, unreadable or corrupt, compiling again fixes all of them
+        return None
+
+
+def store(path: str, key: bytes, stmts: list[Stmt]) -> bool:
+    """
+    Caches the program at path under key, returns if it did. The file is
+    written under a temporary name and renamed over path, so a concurrent
+    run sees either the old cache or the new one, never a partial file.
+    Programs too deep to pickle and unwritable directories aren't cached.
+    """
+    try:
+        with paused_gc():
+            data: bytes = pickle.dumps(stmts, pickle.HIGHEST_PROTOCOL)
+    except (RecursionError, pickle.PicklingError):
+        return False
+
+    directory: str = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(MAGIC + key)
+            file.write(data)
+        os.replace(temp, path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temp)
+        return False
+    return True
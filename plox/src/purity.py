@@ -0,0 +1,195 @@
+from typing import Any, Dict, Optional, Union
+
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
+                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+
+
+class FunctionInfo:
+    def __init__(self, stmt: FunctionStmt) -> None:
+        self.stmt: FunctionStmt = stmt
+        self.pure: bool = True
+        # Functions called by name from outside the function's own scopes
+        self.callees: set[str] = set()
+        # Block nesting inside the function, 0 is the scope of the params
+        self.scope: int = 0
+
+
+class Purity(Visitor):
+    """
+    Marks FunctionStmts whose result only depends on their arguments. A pure
+    function doesn't print, set fields, assign or read anything outside its
+    own scopes, doesn't declare functions or classes and only calls pure
+    functions by name. Callees are identified by name, so the name has to be
+    declared once in the whole program and never assigned to. Runs on a
+    resolved program, methods are never pure.
+    """
+
+    def __init__(self) -> None:
+        self.functions: Dict[str, FunctionInfo] = {}
+        self.infos: list[FunctionInfo] = []
+        self.declarations: Dict[str, int] = {}
+        self.assigned: set[str] = set()
+        self.current: Optional[FunctionInfo] = None
+
+    def analyze(self, stmts: list[Stmt]) -> None:
+        self.visit(stmts)
+
+        pure: Dict[str, FunctionInfo] = {
+            name: info
+            for name, info in self.functions.items()
+            if info.pure
+            and self.declarations[name] == 1
+            and name not in self.assigned
+        }
+        changed: bool = True
+        while changed:
+            changed = False
+            for name, info in list(pure.items()):
+                if not info.callees.issubset(pure):
+                    del pure[name]
+                    changed = True
+
+        for info in self.infos:
+            info.stmt.pure = info.stmt.name.lexeme in pure and info.pure
+
+    def visit(self, res: Union[list[Stmt], Stmt, Expr, None]) -> None:
+        if isinstance(res, list):
+            for stmt in res:
+                self.visit(stmt)
+        elif res is not None:
+            res.accept(self)
+
+    def declare(self, name: str) -> None:
+        self.declarations[name] = self.declarations.get(name, 0) + 1
+
+    def impure(self) -> None:
+        if self.current is not None:
+            self.current.pure = False
+
+    def is_local(self, depth: Optional[int]) -> bool:
+        return (
+            self.current is not None
+            and depth is not None
+            and depth <= self.current.scope
+        )
+
+    def function(self, stmt: FunctionStmt, info: Optional[FunctionInfo]) -> None:
+        enclosing: Optional[FunctionInfo] = self.current
+        self.current = info
+        for param in stmt.params:
+            self.declare(param.lexeme)
+        self.visit(stmt.body)
+        self.current = enclosing
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        if self.current is not None:
+            self.current.scope += 1
+        self.visit(stmt.statements)
+        if self.current is not None:
+            self.current.scope -= 1
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> None:
+        self.impure()
+        self.declare(stmt.name.lexeme)
+        self.visit(stmt.superclass)
+        for method in stmt.methods:
+            self.function(method, None)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.visit(stmt.expression)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        self.impure()
+        self.declare(stmt.name.lexeme)
+        info: FunctionInfo = FunctionInfo(stmt)
+        self.infos.append(info)
+        self.functions[stmt.name.lexeme] = info
+        self.function(stmt, info)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.visit(stmt.condition)
+        self.visit(stmt.then_branch)
+        self.visit(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.impure()
+        self.visit(stmt.expression)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        self.visit(stmt.value)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        self.declare(stmt.name.lexeme)
+        self.visit(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.visit(stmt.condition)
+        self.visit(stmt.body)
+
+    def visit_for_stmt(self, stmt: ForStmt) -> None:
+        if self.current is not None:
+            self.current.scope += 1
+        self.visit(stmt.initializer)
+        self.visit(stmt.condition)
+        self.visit(stmt.body)
+        self.visit(stmt.increment)
+        if self.current is not None:
+            self.current.scope -= 1
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.assigned.add(expr.name.lexeme)
+        if not self.is_local(expr.depth):
+            self.impure()
+        self.visit(expr.value)
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.visit(expr.left)
+        self.visit(expr.right)
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        callee: Any = expr.callee
+        if (
+            self.current is not None
+            and type(callee) is VariableExpr
+            and not self.is_local(callee.depth)
+        ):
+            self.current.callees.add(callee.name.lexeme)
+        else:
+            self.impure()
+            self.visit(callee)
+        self.visit(expr.arguments)
+
+    def visit_get_expr(self, expr: GetExpr) -> None:
+        self.impure()
+        self.visit(expr.object)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.visit(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        pass
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.visit(expr.left)
+        self.visit(expr.right)
+
+    def visit_set_expr(self, expr: SetExpr) -> None:
+        self.impure()
+        self.visit(expr.object)
+        self.visit(expr.value)
+
+    def visit_super_expr(self, expr: SuperExpr) -> None:
+        self.impure()
+
+    def visit_this_expr(self, expr: ThisExpr) -> None:
+        self.impure()
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.visit(expr.right)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        if not self.is_local(expr.depth):
+            self.impure()
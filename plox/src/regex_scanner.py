@@ -0,0 +1,173 @@
+import re
+import sys
+from mmap import mmap
+from typing import Any, Iterator, Optional
+
+from _token import Token
+from token_type import TokenType
+
+KEYWORDS: dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE,
+}
+
+# Operators and their lexemes, which for the two character ones is only
+# their first character like Scanner has it
+OPERATORS: dict[str, tuple[TokenType, str]] = {
+    "(": (TokenType.LEFT_PAREN, "("),
+    ")": (TokenType.RIGHT_PAREN, ")"),
+    "{": (TokenType.LEFT_BRACE, "{"),
+    "}": (TokenType.RIGHT_BRACE, "}"),
+    ",": (TokenType.COMMA, ","),
+    "-": (TokenType.MINUS, "-"),
+    "+": (TokenType.PLUS, "+"),
+    ";": (TokenType.SEMICOLON, ";"),
+    "/": (TokenType.SLASH, "/"),
+    "!": (TokenType.BANG, "!"),
+    "!=": (TokenType.BANG_EQUAL, "!"),
+    "=": (TokenType.EQUAL, "="),
+    "==": (TokenType.EQUAL_EQUAL, "="),
+    "<": (TokenType.LESS, "<"),
+    "<=": (TokenType.LESS_EQUAL, "<"),
+    ">": (TokenType.GREATER, ">"),
+    ">=": (TokenType.GREATER_EQUAL, ">"),
+}
+
+# Operators without a literal, their lexeme is the character before them
+UNNAMED: dict[str, TokenType] = {
+    ".": TokenType.DOT,
+    "*": TokenType.STAR,
+}
+
+# One alternative per kind of lexeme, tried in order at every position
+# after skipping spaces. A string's first character is taken whatever it
+# is, Scanner looks for the closing quote from the second one on.
+TOKEN = re.compile(
+    r"""
+    [ \t\r]*
+    (?:
+        (?P<identifier>[A-Za-z_][A-Za-z_0-9]*)
+        |(?P<comment>//[^\n]*\n?)
+        |(?P<operator>[!=<>]=?|[(){},\-+;/])
+        |(?P<newline>\n[ \t\r\n]*)
+        |(?P<unnamed>[.*])
+        |(?P<number>[0-9]+(?:\.[0-9]+)?)
+        |(?P<string>".[^"]*")
+        |(?P<error>.)
+    )?
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# The same tables for scanning bytes, like a memory mapped file, directly.
+# An unknown character is taken together with its UTF-8 continuation bytes
+# so the error can name it.
+BYTES_TOKEN = re.compile(
+    TOKEN.pattern.replace("(?P<error>.)", r"(?P<error>.[\x80-\xbf]*)").encode(),
+    re.VERBOSE | re.DOTALL,
+)
+BYTES_OPERATORS: dict[bytes, tuple[TokenType, str]] = {
+    operator.encode(): value for operator, value in OPERATORS.items()
+}
+BYTES_UNNAMED: dict[bytes, TokenType] = {
+    operator.encode(): value for operator, value in UNNAMED.items()
+}
+
+
+def decode(text: bytes) -> str:
+    return str(text, "utf-8")
+
+
+class RegexScanner:
+    """
+    Scans the whole source with one compiled regular expression instead of
+    a character at a time. Produces exactly the tokens Scanner does, line
+    numbers and quirks included: a comment swallows the line break ending
+    it without counting it, a line break right before a string's closing
+    quote isn't counted either and a number that runs to the very end of
+    the source has its last digit split off into a token of its own.
+
+    scan yields the tokens one at a time as the parser asks for them, so
+    they never all have to be in memory together. The source can also be
+    UTF-8 bytes or anything else exposing them, like an mmap, then only
+    the lexemes end up decoded and each distinct name only once.
+    """
+
+    def __init__(self, source: str | bytes | mmap) -> None:
+        self.source: str | bytes | mmap = source
+        self.tokens: list[Token] = []
+
+    def scan_tokens(self) -> list[Token]:
+        self.tokens.extend(self.scan())
+        return self.tokens
+
+    def scan(self) -> Iterator[Token]:
+        source: Any = self.source
+        if isinstance(source, str):
+            token, operators, unnamed, to_str = TOKEN, OPERATORS, UNNAMED, str
+        else:
+            token, operators, unnamed = BYTES_TOKEN, BYTES_OPERATORS, BYTES_UNNAMED
+            to_str = decode
+        newline: Any = "\n" if to_str is str else b"\n"
+        # Each name's interned lexeme and token type, by its text in source
+        names: dict[Any, tuple[str, TokenType]] = {}
+        number: TokenType = TokenType.NUMBER
+        string: TokenType = TokenType.STRING
+        line: int = 1
+
+        for match in token.finditer(source):
+            kind: Optional[str] = match.lastgroup
+            if kind is None:
+                continue
+
+            text: Any = match[kind]
+            if kind == "identifier":
+                name: Optional[tuple[str, TokenType]] = names.get(text)
+                if name is None:
+                    lexeme: str = sys.intern(to_str(text))
+                    name = names[text] = (
+                        lexeme,
+                        KEYWORDS.get(lexeme, TokenType.IDENTIFIER),
+                    )
+                yield Token(name[1], name[0], name[0], line)
+            elif kind == "operator":
+                type, lexeme = operators[text]
+                yield Token(type, lexeme, lexeme, line)
+            elif kind == "newline":
+                line += text.count(newline)
+            elif kind == "unnamed":
+                start: int = match.start(kind)
+                lexeme = to_str(source[start - 1 : start])
+                yield Token(unnamed[text], lexeme, None, line)
+            elif kind == "number":
+                if match.end() == len(source) and len(text) > 1:
+                    value: float = float(text[:-1])
+                    yield Token(number, value, value, line)
+                    text = text[-1:]
+                value = float(text)
+                yield Token(number, value, value, line)
+            elif kind == "string":
+                text = text[1:-1]
+                line += text.count(newline, 0, len(text) - 1)
+                lexeme = to_str(text)
+                yield Token(string, lexeme, lexeme, line)
+            elif kind == "error":
+                if text == '"' or text == b'"':
+                    raise Exception("Unterminated string")
+                raise Exception(f"Found unknown token {to_str(text)}")
+
+        yield Token(TokenType.EOF, "", None, line)
@@ -5,9 +5,8 @@ from _token import Token
 from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
                         GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
                         SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
-from stack import Stack
-from stmt import (BlockStmt, ClassStmt, ExpressionStmt, FunctionStmt, IfStmt,
-                  PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
 
 
 class FunctionType(enum.Enum):
@@ -24,9 +23,21 @@ class ClassType(enum.Enum):
 
 
 class Resolver(Visitor):
+    """
+    Annotates every local variable reference with the depth of the scope
+    declaring it and its slot there. Scopes are kept innermost last, and
+    next to them every name has the stack of scopes declaring it, so the
+    innermost declaration of a name is found with a single lookup
+    however deep the code is nested.
+    """
+
     def __init__(self, interpreter) -> None:
         self.interpreter = interpreter
-        self.scopes = Stack()
+        # Whether each name in each scope is defined yet
+        self.scopes: list[dict[str, bool]] = []
+        self.slots: list[dict[str, int]] = []
+        # The indexes in scopes of the scopes declaring each name
+        self.bindings: dict[str, list[int]] = {}
         self.current_function = FunctionType.NONE
         self.error = interpreter.error
         self.current_class = ClassType.NONE
@@ -59,10 +70,10 @@ class Resolver(Visitor):
             self.current_class = ClassType.SUBCLASS
             self.resolve(stmt.superclass)
             self.begin_scope()
-            self.scopes.peek()["super"] = True
+            self.declare_synthetic("super")
 
         self.begin_scope()
-        self.scopes.peek()["this"] = True
+        self.declare_synthetic("this")
 
         for method in stmt.methods:
             declaration: FunctionType = FunctionType.METHOD
@@ -103,6 +114,8 @@ class Resolver(Visitor):
             if self.current_function == FunctionType.INITIALIZER:
                 self.error(stmt.keyword, "Can't return a value from an initializer")
 
+            if isinstance(stmt.value, CallExpr):
+                stmt.value.tail = True
             self.resolve(stmt.value)
 
     def visit_var_stmt(self, stmt: VarStmt) -> None:
@@ -117,6 +130,18 @@ class Resolver(Visitor):
         self.resolve(stmt.condition)
         self.resolve(stmt.body)
 
+    def visit_for_stmt(self, stmt: ForStmt) -> None:
+        # The loop gets a scope of its own for the initializer's variable
+        self.begin_scope()
+        if stmt.initializer is not None:
+            self.resolve(stmt.initializer)
+        if stmt.condition is not None:
+            self.resolve(stmt.condition)
+        self.resolve(stmt.body)
+        if stmt.increment is not None:
+            self.resolve(stmt.increment)
+        self.end_scope()
+
     def visit_assign_expr(self, expr: AssignExpr) -> None:
         self.resolve(expr.value)
         self.resolve_local(expr, expr.name)
@@ -167,10 +192,7 @@ class Resolver(Visitor):
         self.resolve(expr.right)
 
     def visit_variable_expr(self, expr: VariableExpr) -> None:
-        if (
-            self.scopes.length != 0
-            and self.scopes.peek().get(expr.name.lexeme) is False
-        ):
+        if self.scopes and self.scopes[-1].get(expr.name.lexeme) is False:
             self.interpreter.error(
                 expr.name, "Can't read local variable in its own initializer"
             )
@@ -190,29 +212,45 @@ class Resolver(Visitor):
         self.current_function = enclosing_function
 
     def resolve_local(self, expr: Expr, name: Token) -> None:
-        for i in range(self.scopes.length - 1, -1, -1):
-            value: Optional[dict] = self.scopes.get(i)
-            if value and name.lexeme in value:
-                self.interpreter.resolve(expr, self.scopes.length - 1 - i)
-                return
+        declared: Optional[list[int]] = self.bindings.get(name.lexeme)
+        if declared:
+            scope: int = declared[-1]
+            expr.depth = len(self.scopes) - 1 - scope
+            expr.slot = self.slots[scope][name.lexeme]
 
     def define(self, name: Token) -> None:
-        scope = self.scopes.peek()
-        if scope is None:
+        if not self.scopes:
             return
 
-        scope[name.lexeme] = True
+        self.scopes[-1][name.lexeme] = True
 
     def begin_scope(self) -> None:
-        self.scopes.push({})
+        self.scopes.append({})
+        self.slots.append({})
 
     def end_scope(self) -> None:
-        self.scopes.pop()
+        for name in self.scopes.pop():
+            declared: list[int] = self.bindings[name]
+            declared.pop()
+            if not declared:
+                del self.bindings[name]
+        self.slots.pop()
 
     def declare(self, name: Token) -> None:
-        if self.scopes.length == 0:
+        if not self.scopes:
             return
-        scope: dict = self.scopes.peek()
-        if name.lexeme in scope:
+        if name.lexeme in self.scopes[-1]:
             self.error(name, "Already a variable with this name in this scope")
-        scope[name.lexeme] = False
+        self.bind(name.lexeme, False)
+
+    def declare_synthetic(self, name: str) -> None:
+        self.bind(name, True)
+
+    def bind(self, name: str, defined: bool) -> None:
+        """Declares name in the innermost scope, unless it already is"""
+        scope: dict[str, bool] = self.scopes[-1]
+        if name not in scope:
+            self.bindings.setdefault(name, []).append(len(self.scopes) - 1)
+            slots: dict[str, int] = self.slots[-1]
+            slots[name] = len(slots)
+        scope[name] = defined
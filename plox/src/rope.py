@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+# Concatenations shorter than this are copied right away, a Rope only pays
+# off once copying the string costs more than allocating a node
+MIN_ROPE = 256
+
+
+class Rope:
+    """
+    A Lox string made by concatenation, kept as the two strings it was made
+    of until something needs its characters. Printing, comparing, hashing
+    or measuring it flattens the tree once and keeps the result, so a
+    string built a piece at a time in a loop costs linear time instead of
+    copying everything built so far on every step. Building s = s + piece
+    gives a tree as deep as the number of pieces, so flattening it can't
+    recurse.
+    """
+
+    __slots__ = ("left", "right", "length", "text")
+
+    def __init__(self, left: str | Rope, right: str | Rope) -> None:
+        self.left: Optional[str | Rope] = left
+        self.right: Optional[str | Rope] = right
+        self.length: int = len(left) + len(right)
+        self.text: Optional[str] = None
+
+    def flatten(self) -> str:
+        if self.text is not None:
+            return self.text
+
+        pieces: list[str] = []
+        pending: list[Any] = [self]
+        while pending:
+            node: Any = pending.pop()
+            if type(node) is str:
+                pieces.append(node)
+            elif node.text is not None:
+                pieces.append(node.text)
+            else:
+                pending.append(node.right)
+                pending.append(node.left)
+
+        self.text = "".join(pieces)
+        # The pieces aren't needed anymore, let them go
+        self.left = self.right = None
+        return self.text
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is str or type(other) is Rope:
+            return len(other) == self.length and str(other) == self.flatten()
+        return NotImplemented
+
+    def __ne__(self, other: Any) -> bool:
+        if type(other) is str or type(other) is Rope:
+            return not self == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+
+def is_string(value: Any) -> bool:
+    return type(value) is str or type(value) is Rope
+
+
+def concat(left: str | Rope, right: str | Rope) -> str | Rope:
+    """left + right for two Lox strings"""
+    if len(left) + len(right) < MIN_ROPE:
+        return str(left) + str(right)
+    return Rope(left, right)
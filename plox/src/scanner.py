@@ -1,3 +1,4 @@
+import sys
 from typing import Any, Optional, Union
 
 from _token import Token
@@ -121,7 +122,10 @@ class Scanner:
         while self._is_alpha_numeric(self._peek_next()):
             self._advance()
 
-        txt: str = self.source[self._start : self._current + 1]
+        # Every occurrence of a name shares one string, which is hashed once
+        # and found by identity in the resolver's, environments' and
+        # classes' dicts
+        txt: str = sys.intern(self.source[self._start : self._current + 1])
         type: Union[TokenType, None] = self._keyword(txt)
         if not type:
             type = TokenType.IDENTIFIER
@@ -0,0 +1,516 @@
+from collections import deque
+from types import GeneratorType
+from typing import Any, Callable, Dict, Generator, Optional
+
+from ast_walk import children
+from counted_loop import counted_loop
+from environment import SlotEnvironment
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        GroupingExpr, LogicalExpr, QuickBinaryExpr,
+                        QuickUnaryExpr, SetExpr, SuperExpr, UnaryExpr)
+from interpreter import Interpreter, LoxRuntimeError
+from loxcallable import (MISSING, RETURN, TAIL_CALL, LoxCallable, LoxClass,
+                         LoxFunction, LoxInstance, Memo)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import TokenType
+
+# A suspended evaluation. It yields the frame it needs the result of and
+# gets that result sent back, its own result is the generator's return value
+Frame = Generator[Any, Any, Any]
+
+
+class StacklessInterpreter(Interpreter):
+    """
+    Runs Lox calls on a stack of frames kept in a list instead of on the
+    Python stack, so recursion depth is only limited by memory. Only nodes
+    with a call below them get a frame, the rest is evaluated by the
+    recursive Interpreter since it can't nest deeper than the source does.
+    Statement frames finish with their completion or, like the closure
+    engine's statements, with whatever value they computed.
+    """
+
+    def __init__(self, error, memo_size: int = 0) -> None:
+        super().__init__(error, memo_size)
+        self.frames: Dict[type, Callable[[Any], Frame]] = {
+            AssignExpr: self.assign_frame,
+            BinaryExpr: self.binary_frame,
+            QuickBinaryExpr: self.binary_frame,
+            CallExpr: self.call_frame,
+            GetExpr: self.get_frame,
+            GroupingExpr: self.grouping_frame,
+            LogicalExpr: self.logical_frame,
+            SetExpr: self.set_frame,
+            UnaryExpr: self.unary_frame,
+            QuickUnaryExpr: self.unary_frame,
+            BlockStmt: self.block_frame,
+            ExpressionStmt: self.expression_frame,
+            ForStmt: self.for_frame,
+            IfStmt: self.if_frame,
+            PrintStmt: self.print_frame,
+            ReturnStmt: self.return_frame,
+            VarStmt: self.var_frame,
+            WhileStmt: self.while_frame,
+        }
+
+    def interpret(self, stmts: list[Stmt]) -> bool:
+        self.mark(stmts)
+        try:
+            for stmt in stmts:
+                if stmt.calling:
+                    self.run(self.frame(stmt))
+                else:
+                    self.execute(stmt)
+        except LoxRuntimeError as e:
+            self.error(1, e.args[0])
+            return False
+        return True
+
+    def mark(self, node: Any) -> bool:
+        """Marks the nodes under node that call something, returns if node does"""
+        if isinstance(node, list):
+            calls: bool = False
+            for child in node:
+                calls = self.mark(child) or calls
+            return calls
+
+        calls = False
+        for child in children(node):
+            calls = self.mark(child) or calls
+        if isinstance(node, CallExpr):
+            if not calls:
+                node.direct = True
+            calls = True
+        # Declaring a function or a class doesn't run any of its code
+        if isinstance(node, (FunctionStmt, ClassStmt)):
+            return False
+
+        if calls:
+            node.calling = True
+            if type(node) is ReturnStmt and type(node.value) is not CallExpr:
+                node.returns = True
+        return calls
+
+    def run(self, frame: Frame) -> Any:
+        environment = self.environment
+        stack: list[Frame] = [frame]
+        value: Any = None
+        try:
+            while True:
+                try:
+                    value = stack[-1].send(value)
+                except StopIteration as done:
+                    stack.pop()
+                    if not stack:
+                        return done.value
+                    value = done.value
+                else:
+                    stack.append(value)
+                    value = None
+        except BaseException:
+            # Nothing in Lox catches errors, the whole stack unwinds
+            self.environment = environment
+            raise
+
+    def frame(self, node: Expr | Stmt) -> Frame:
+        return self.frames[type(node)](node)
+
+    @staticmethod
+    def done(value: Any) -> Frame:
+        """Frame for a result that's already known"""
+        return value
+        yield
+
+    def block_frame(self, stmt: BlockStmt) -> Frame:
+        return self.body(stmt.statements, SlotEnvironment(self.environment))
+
+    def body(self, statements: list[Stmt], environment: SlotEnvironment) -> Frame:
+        previous = self.environment
+        self.environment = environment
+        for statement in statements:
+            if not statement.calling:
+                completion = statement.accept(self)
+            elif statement.returns:
+                self.return_value = yield self.frame(statement.value)
+                completion = RETURN
+            else:
+                completion = yield self.frame(statement)
+            if completion is RETURN or completion is TAIL_CALL:
+                self.environment = previous
+                return completion
+        self.environment = previous
+
+    def expression_frame(self, stmt: ExpressionStmt) -> Frame:
+        return self.frame(stmt.expression)
+
+    def for_frame(self, stmt: ForStmt) -> Frame:
+        previous = self.environment
+        environment: SlotEnvironment = SlotEnvironment(previous)
+        self.environment = environment
+        body: Stmt = stmt.body
+        if stmt.initializer is not None:
+            if stmt.initializer.calling:
+                yield self.frame(stmt.initializer)
+            else:
+                self.execute(stmt.initializer)
+
+        if stmt.counted is None:
+            stmt.counted = counted_loop(stmt) or False
+        loop = stmt.counted
+        if loop:
+            values: list[Any] = environment.values
+            constant: Optional[float] = loop.constant()
+            while True:
+                i = values[0]
+                bound = constant
+                if bound is None:
+                    bound = self.evaluate(loop.bound)
+                if type(i) is not float or type(bound) is not float:
+                    break
+                if not loop.compare(i, bound):
+                    self.environment = previous
+                    return None
+                if body.calling:
+                    completion = yield self.frame(body)
+                else:
+                    completion = body.accept(self)
+                if completion is RETURN or completion is TAIL_CALL:
+                    self.environment = previous
+                    return completion
+                values[0] = i + loop.step
+
+        condition: Optional[Expr] = stmt.condition
+        increment: Optional[Expr] = stmt.increment
+        while True:
+            if condition is not None:
+                if condition.calling:
+                    value = yield self.frame(condition)
+                else:
+                    value = self.evaluate(condition)
+                if value is None or value is False:
+                    break
+            if body.calling:
+                completion = yield self.frame(body)
+            else:
+                completion = body.accept(self)
+            if completion is RETURN or completion is TAIL_CALL:
+                self.environment = previous
+                return completion
+            if increment is not None:
+                if increment.calling:
+                    yield self.frame(increment)
+                else:
+                    self.evaluate(increment)
+        self.environment = previous
+
+    def if_frame(self, stmt: IfStmt) -> Frame:
+        if stmt.condition.calling:
+            value = yield self.frame(stmt.condition)
+        else:
+            value = self.evaluate(stmt.condition)
+
+        branch: Optional[Stmt] = stmt.then_branch
+        if value is None or value is False:
+            branch = stmt.else_branch
+            if branch is None:
+                return None
+        if branch.calling:
+            return (yield self.frame(branch))
+        return branch.accept(self)
+
+    def print_frame(self, stmt: PrintStmt) -> Frame:
+        value = yield self.frame(stmt.expression)
+        print(self.stringify(value))
+
+    def return_frame(self, stmt: ReturnStmt) -> Frame:
+        expr: Any = stmt.value
+        if type(expr) is CallExpr and expr.tail:
+            if expr.direct:
+                value = self.direct_call(expr, True)
+            else:
+                value = yield self.call_steps(expr, True)
+            if value is TAIL_CALL:
+                return TAIL_CALL
+            if type(value) is GeneratorType:
+                value = yield value
+        else:
+            value = yield self.frame(expr)
+        self.return_value = value
+        return RETURN
+
+    def var_frame(self, stmt: VarStmt) -> Frame:
+        value = yield self.frame(stmt.initializer)
+        self.environment.define(stmt.name.lexeme, value)
+
+    def while_frame(self, stmt: WhileStmt) -> Frame:
+        condition: Expr = stmt.condition
+        body: Stmt = stmt.body
+        while True:
+            if condition.calling:
+                value = yield self.frame(condition)
+            else:
+                value = self.evaluate(condition)
+            if value is None or value is False:
+                return None
+            if body.calling:
+                completion = yield self.frame(body)
+            else:
+                completion = body.accept(self)
+            if completion is RETURN or completion is TAIL_CALL:
+                return completion
+
+    def assign_frame(self, expr: AssignExpr) -> Frame:
+        value = yield self.frame(expr.value)
+        return self.assign(expr, value)
+
+    def binary_frame(self, expr: BinaryExpr) -> Frame:
+        if expr.left.calling:
+            left = yield self.frame(expr.left)
+        else:
+            left = self.evaluate(expr.left)
+        if expr.right.calling:
+            right = yield self.frame(expr.right)
+        else:
+            right = self.evaluate(expr.right)
+        return self.binary(expr, left, right)
+
+    def call_frame(self, expr: CallExpr) -> Frame:
+        if not expr.direct:
+            return self.call_steps(expr, False)
+
+        result: Any = self.direct_call(expr, False)
+        if type(result) is GeneratorType:
+            return result
+        return self.done(result)
+
+    def direct_call(self, expr: CallExpr, tail: bool) -> Any:
+        """Evaluates the parts of a direct call and makes it"""
+        kind: type = type(expr.callee)
+        value: Any = None
+        if kind is GetExpr:
+            value = self.evaluate(expr.callee.object)
+        elif kind is not SuperExpr:
+            value = self.evaluate(expr.callee)
+
+        callee, instance = self.callee(expr, value)
+        arguments: list[Any] = [
+            self.evaluate(argument) for argument in expr.arguments
+        ]
+        return self.apply(expr, callee, instance, arguments, tail)
+
+    def call_steps(self, expr: CallExpr, tail: bool) -> Frame:
+        kind: type = type(expr.callee)
+        target: Optional[Expr] = None
+        if kind is GetExpr:
+            target = expr.callee.object
+        elif kind is not SuperExpr:
+            target = expr.callee
+
+        value: Any = None
+        if target is not None:
+            if target.calling:
+                value = yield self.frame(target)
+            else:
+                value = self.evaluate(target)
+
+        callee, instance = self.callee(expr, value)
+        arguments: list[Any] = []
+        for argument in expr.arguments:
+            if argument.calling:
+                arguments.append((yield self.frame(argument)))
+            else:
+                arguments.append(self.evaluate(argument))
+
+        result: Any = self.apply(expr, callee, instance, arguments, tail)
+        if type(result) is GeneratorType:
+            result = yield result
+        return result
+
+    def callee(
+        self, expr: CallExpr, value: Any
+    ) -> tuple[Any, Optional[LoxInstance]]:
+        """
+        What a call calls given the value of its callee, or of the object
+        for obj.method() calls. Methods called straight off an instance or
+        through super come back with the instance to run them on, unbound.
+        """
+        if type(expr.callee) is GetExpr:
+            get: GetExpr = expr.callee
+            if not isinstance(value, LoxInstance):
+                return self.get_property(value, get.name), None
+
+            entry: Optional[int | LoxFunction] = self.get_cache(get).lookup(value)
+            if type(entry) is LoxFunction:
+                return entry, value
+            if type(entry) is int:
+                return value.values[entry], None
+            return value.get(get.name), None
+
+        if type(expr.callee) is SuperExpr:
+            superclass, obj = self.super_receiver(expr.callee)
+            return self.find_super_method(superclass, expr.callee), obj
+
+        return value, None
+
+    def apply(
+        self,
+        expr: CallExpr,
+        callee: Any,
+        instance: Optional[LoxInstance],
+        arguments: list[Any],
+        tail: bool,
+    ) -> Any:
+        """
+        Returns the frame for a call that runs Lox code, or the result of one
+        that doesn't, like a native, a memo hit or a class without init. In
+        tail position calls to Lox functions go to tail_call instead.
+        """
+        if instance is not None:
+            self.check_arity(callee, arguments)
+            closure: SlotEnvironment = callee.receiver(instance)
+            if tail:
+                self.tail_call = (callee, closure, arguments)
+                return TAIL_CALL
+            return self.function_frame(callee, closure, arguments)
+
+        if type(callee) is LoxFunction:
+            self.check_arity(callee, arguments)
+            if tail:
+                self.tail_call = (callee, callee.closure, arguments)
+                return TAIL_CALL
+            if callee.memo is not None:
+                return self.memo_call(callee, callee.memo, arguments)
+            return self.function_frame(callee, callee.closure, arguments)
+
+        if not isinstance(callee, LoxCallable):
+            self.error(expr.paren, "Can only call functions and classes")
+            raise LoxRuntimeError("Trying to call non function")
+
+        self.check_arity(callee, arguments)
+        if type(callee) is LoxClass:
+            obj: LoxInstance = LoxInstance(callee)
+            initializer: Optional[LoxFunction] = callee.initializer
+            if initializer is None:
+                return obj
+            return self.function_frame(
+                initializer, initializer.receiver(obj), arguments
+            )
+
+        return callee.call(self, arguments)
+
+    def check_arity(self, callee: LoxCallable, arguments: list[Any]) -> None:
+        if len(arguments) != callee.arity():
+            raise LoxRuntimeError(
+                f"Expected {callee.arity()} arguments but got {len(arguments)}."
+            )
+
+    def memo_call(
+        self, function: LoxFunction, memo: Memo, arguments: list[Any]
+    ) -> Any:
+        key: Optional[tuple] = memo.key(arguments)
+        if key is None:
+            return self.function_frame(function, function.closure, arguments)
+
+        result: Any = memo.lookup(key)
+        if result is MISSING:
+            return self.memo_frame(function, memo, key, arguments)
+        return result
+
+    def memo_frame(
+        self, function: LoxFunction, memo: Memo, key: tuple, arguments: list[Any]
+    ) -> Frame:
+        result = yield self.function_frame(function, function.closure, arguments)
+        memo.store(key, result)
+        return result
+
+    def function_frame(
+        self, function: LoxFunction, closure: Any, arguments: list[Any]
+    ) -> Frame:
+        """Same as LoxFunction.run, tail calls reuse the frame"""
+        previous = self.environment
+        pending: Optional[deque[tuple[Memo, tuple]]] = None
+        result: Any = MISSING
+        while True:
+            environment: SlotEnvironment = SlotEnvironment(closure)
+            environment.values = arguments
+            self.environment = environment
+
+            completion = None
+            for statement in function.declaration.body:
+                if not statement.calling:
+                    completion = statement.accept(self)
+                elif statement.returns:
+                    # Saves a frame for the most common statement with a call
+                    self.return_value = yield self.frame(statement.value)
+                    completion = RETURN
+                else:
+                    completion = yield self.frame(statement)
+                if completion is RETURN or completion is TAIL_CALL:
+                    break
+            if completion is not TAIL_CALL:
+                break
+            function, closure, arguments = self.tail_call
+            if function.memo is not None:
+                if pending is None:
+                    pending = function.memo.pending()
+                result = function.memo.tail_lookup(arguments, pending)
+                if result is not MISSING:
+                    break
+
+        self.environment = previous
+        if result is MISSING:
+            if function.is_initializer:
+                result = closure.get_at(0, 0)
+            elif completion is RETURN:
+                result = self.return_value
+            else:
+                result = None
+        if pending:
+            Memo.store_pending(pending, result)
+        return result
+
+    def get_frame(self, expr: GetExpr) -> Frame:
+        obj = yield self.frame(expr.object)
+        if isinstance(obj, LoxInstance):
+            return self.get_cache(expr).get(obj, expr.name)
+
+        return self.get_property(obj, expr.name)
+
+    def grouping_frame(self, expr: GroupingExpr) -> Frame:
+        return self.frame(expr.expression)
+
+    def logical_frame(self, expr: LogicalExpr) -> Frame:
+        if expr.left.calling:
+            left = yield self.frame(expr.left)
+        else:
+            left = self.evaluate(expr.left)
+
+        if expr.operator.type == TokenType.OR:
+            if self.is_truthy(left):
+                return left
+        elif not self.is_truthy(left):
+            return left
+
+        if expr.right.calling:
+            return (yield self.frame(expr.right))
+        return self.evaluate(expr.right)
+
+    def set_frame(self, expr: SetExpr) -> Frame:
+        if expr.object.calling:
+            obj = yield self.frame(expr.object)
+        else:
+            obj = self.evaluate(expr.object)
+
+        if not isinstance(obj, LoxInstance):
+            raise LoxRuntimeError(f"{expr.name} Only instances have fields")
+
+        if expr.value.calling:
+            value = yield self.frame(expr.value)
+        else:
+            value = self.evaluate(expr.value)
+        self.set_cache(expr).set(obj, value)
+        return value
+
+    def unary_frame(self, expr: UnaryExpr) -> Frame:
+        right = yield self.frame(expr.right)
+        return self.unary(expr, right)
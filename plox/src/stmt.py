@@ -8,6 +8,11 @@ from expression import Expr, VariableExpr, Visitor
 
 
 class Stmt(ABC):
+    # Set by StacklessInterpreter.mark, if running it calls something and
+    # for a return whose value calls something but isn't a call
+    calling: bool = False
+    returns: bool = False
+
     def accept(self, a: Any):
         pass
 
@@ -55,6 +60,25 @@ class WhileStmt(Stmt, Visitor):
         return visitor.visit_while_stmt(self)
 
 
+class ForStmt(Stmt, Visitor):
+    def __init__(
+        self,
+        initializer: Optional[Stmt],
+        condition: Optional[Expr],
+        increment: Optional[Expr],
+        body: Stmt,
+    ):
+        self.initializer: Optional[Stmt] = initializer
+        self.condition: Optional[Expr] = condition
+        self.increment: Optional[Expr] = increment
+        self.body: Stmt = body
+        # Set by the Interpreter the first time the loop runs
+        self.counted: Any = None
+
+    def accept(self, visitor: Visitor):
+        return visitor.visit_for_stmt(self)
+
+
 class BlockStmt(Stmt, Visitor):
     def __init__(self, statements: list[Stmt]):
         self.statements: list[Stmt] = statements
@@ -93,6 +117,12 @@ class FunctionStmt(Stmt, Visitor):
         self.name: Token = name
         self.params: list[Token] = params
         self.body: list[Stmt] = body
+        # Set by Purity when the result only depends on the arguments
+        self.pure: bool = False
+        # Memo shared by its closures, set by the Interpreter
+        self.memo: Any = None
+        # Set by ClosureCompiler to the closure running the body
+        self.compiled: Any = None
 
     def accept(self, visitor: Visitor):
         return visitor.visit_function_stmt(self)
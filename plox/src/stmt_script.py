@@ -14,6 +14,7 @@ if __name__ == "__main__":
         "Return ; keyword:Token, value: Expr",
         "Var ; name:Token, initializer:Expr",
         "While ; condition:Expr, body:Stmt",
+        "For ; initializer:Stmt, condition:Expr, increment:Expr, body:Stmt",
         "Block ; statements: list[Stmt]",
         "Class ; name:Token, superclass:VariableExpr = None, methods:list[FunctionStmt]",
         "If ; condition : Expr, then_branch : Stmt, else_branch: Stmt",
@@ -25,6 +26,11 @@ from _token import Token
 from expression import Expr, Visitor, VariableExpr
 
 class Stmt(ABC):
+    # Set by StacklessInterpreter.mark, if running it calls something and
+    # for a return whose value calls something but isn't a call
+    calling: bool = False
+    returns: bool = False
+
     def accept(self, a: Any):
         pass
 """
@@ -36,6 +42,14 @@ class Stmt(ABC):
         s = ""
         for f in fields:
             s += f"        self.{f} = {f.split(':')[0]}\n"
+        if class_name == "Function":
+            s += "        self.pure: bool = False\n"
+            s += "        # Memo shared by its closures, set by the Interpreter\n"
+            s += "        self.memo: Any = None\n"
+            s += "        # Set by ClosureCompiler to the closure running the body\n"
+            s += "        self.compiled: Any = None\n"
+        if class_name == "For":
+            s += "        self.counted: Any = None\n"
         k += f"""\nclass {class_name}Stmt(Stmt, Visitor):
     def __init__(self, {', '.join(fields)}):
 {s}
@@ -1,4 +1,6 @@
+import operator
 from enum import Enum, auto
+from typing import Any, Callable, Dict
 
 
 class TokenType(Enum):
@@ -49,3 +51,16 @@ class TokenType(Enum):
     WHILE = auto()
 
     EOF = auto()
+
+
+# What the number operators do once both operands are known to be numbers
+NUMBER_OPS: Dict[TokenType, Callable[[float, float], Any]] = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.MINUS: operator.sub,
+    TokenType.PLUS: operator.add,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+}
@@ -0,0 +1,712 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Union
+
+from _token import Token
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        GroupingExpr, LiteralExpr, LogicalExpr, SetExpr,
+                        SuperExpr, ThisExpr, UnaryExpr, VariableExpr, Visitor)
+from stmt import (BlockStmt, ClassStmt, ExpressionStmt, ForStmt, FunctionStmt,
+                  IfStmt, PrintStmt, ReturnStmt, Stmt, VarStmt, WhileStmt)
+from token_type import TokenType
+
+PRELUDE = '''from time import time as _time
+from types import FunctionType as _FunctionType
+from types import MethodType as _MethodType
+
+
+class LoxRuntimeError(Exception):
+    pass
+
+
+class _LoxObject:
+    __slots__ = ()
+    lox_name = "object"
+
+
+class _Clock:
+    def __call__(self):
+        return _time()
+
+
+def _stringify(obj):
+    if obj is None:
+        return "nil"
+    if type(obj) is float:
+        txt = str(obj)
+        return txt[:-2] if txt[-2:] == ".0" else txt
+    if isinstance(obj, type) and issubclass(obj, _LoxObject):
+        return obj.lox_name
+    if isinstance(obj, _LoxObject):
+        return type(obj).lox_name + " instance"
+    if isinstance(obj, _FunctionType):
+        return "<fn " + obj.__name__ + ">"
+    if isinstance(obj, _MethodType):
+        return "<fn " + obj.__func__.__name__ + ">"
+    if isinstance(obj, _Clock):
+        return "<native fn>"
+    return str(obj)
+
+
+def _truthy(obj):
+    return obj is not None and obj is not False
+
+
+def _numbers(a, b):
+    if type(a) is not float or type(b) is not float:
+        raise LoxRuntimeError("Operands must be a numbers")
+
+
+def _add(a, b):
+    if type(a) is float and type(b) is float:
+        return a + b
+    if type(a) is str and type(b) is str:
+        return a + b
+    raise LoxRuntimeError(f"Trying to + smth? {type(a)} and {type(b)}")
+
+
+def _sub(a, b):
+    _numbers(a, b)
+    return a - b
+
+
+def _mul(a, b):
+    _numbers(a, b)
+    return a * b
+
+
+def _div(a, b):
+    _numbers(a, b)
+    return a / b
+
+
+def _lt(a, b):
+    _numbers(a, b)
+    return a < b
+
+
+def _le(a, b):
+    _numbers(a, b)
+    return a <= b
+
+
+def _gt(a, b):
+    _numbers(a, b)
+    return a > b
+
+
+def _ge(a, b):
+    _numbers(a, b)
+    return a >= b
+
+
+def _neg(a):
+    if type(a) is not float:
+        raise LoxRuntimeError("Operand must be a number")
+    return -a
+
+
+def _get(obj, field, method):
+    if not isinstance(obj, _LoxObject):
+        raise LoxRuntimeError("Only instances have properties")
+    try:
+        return getattr(obj, field)
+    except AttributeError:
+        pass
+    try:
+        return getattr(obj, method)
+    except AttributeError:
+        raise LoxRuntimeError("Undefined property " + field[2:])
+
+
+def _set(obj, field, value):
+    if not isinstance(obj, _LoxObject):
+        raise LoxRuntimeError("Only instances have fields")
+    setattr(obj, field, value)
+    return value
+
+
+def _set_box(box, value):
+    box[0] = value
+    return value
+
+
+g_clock = _Clock()
+'''
+
+FOOTER = '''
+
+def run():
+    try:
+        main()
+    except LoxRuntimeError as e:
+        print(f"[line 1] Error  : {e.args[0]}")
+
+
+if __name__ == "__main__":
+    run()
+'''
+
+NUMBER_OPS: Dict[TokenType, tuple[str, str]] = {
+    TokenType.MINUS: ("-", "_sub"),
+    TokenType.STAR: ("*", "_mul"),
+    TokenType.SLASH: ("/", "_div"),
+    TokenType.LESS: ("<", "_lt"),
+    TokenType.LESS_EQUAL: ("<=", "_le"),
+    TokenType.GREATER: (">", "_gt"),
+    TokenType.GREATER_EQUAL: (">=", "_ge"),
+}
+
+BOOLEAN_OPS = (
+    TokenType.BANG_EQUAL,
+    TokenType.EQUAL_EQUAL,
+    TokenType.LESS,
+    TokenType.LESS_EQUAL,
+    TokenType.GREATER,
+    TokenType.GREATER_EQUAL,
+)
+
+
+class Binding:
+    def __init__(
+        self, name: str, owner: Optional[PyFunction], in_loop: bool = False
+    ) -> None:
+        self.name: str = name
+        self.owner: Optional[PyFunction] = owner
+        self.in_loop: bool = in_loop
+        self.captured: bool = False
+
+    @property
+    def boxed(self) -> bool:
+        """
+        Lox gives every loop iteration fresh block variables while python
+        reuses the local, so captured ones get a one element list instead.
+        """
+        return self.captured and self.in_loop
+
+
+class PyFunction:
+    def __init__(self, enclosing: Optional[PyFunction]) -> None:
+        self.enclosing: Optional[PyFunction] = enclosing
+        self.loop_depth: int = 0
+        self.globals: set[str] = set()
+        self.nonlocals: set[Binding] = set()
+        self.free: set[Binding] = set()
+
+
+class Binder(Visitor):
+    """
+    First pass of the transpiler, gives every Lox variable a unique python
+    name and works out which names need global/nonlocal declarations.
+    """
+
+    def __init__(self) -> None:
+        self.scopes: list[Dict[str, Binding]] = []
+        self.main: PyFunction = PyFunction(None)
+        self.current: PyFunction = self.main
+        self.functions: Dict[FunctionStmt, PyFunction] = {}
+        self.bindings: Dict[Any, Binding] = {}
+        self.global_bindings: Dict[str, Binding] = {}
+        self.field_names: set[str] = set()
+        self.method_names: set[str] = set()
+        self.count: int = 0
+
+    def bind(self, res: Union[list[Stmt], Stmt, Expr, None]) -> None:
+        if isinstance(res, list):
+            for stmt in res:
+                self.bind(stmt)
+        elif res is not None:
+            res.accept(self)
+
+    def global_binding(self, lexeme: str) -> Binding:
+        if lexeme not in self.global_bindings:
+            self.global_bindings[lexeme] = Binding(f"g_{lexeme}", None)
+        return self.global_bindings[lexeme]
+
+    def declare(self, node: Any, name: Token) -> None:
+        if not self.scopes:
+            self.bindings[node] = self.global_binding(name.lexeme)
+            self.current.globals.add(self.bindings[node].name)
+            return
+
+        self.count += 1
+        binding = Binding(
+            f"v_{name.lexeme}_{self.count}", self.current, self.current.loop_depth > 0
+        )
+        self.scopes[-1][name.lexeme] = binding
+        self.bindings[node] = binding
+
+    def reference(self, expr: Expr, name: Token, assign: bool) -> None:
+        binding: Optional[Binding] = None
+        if expr.depth is not None:
+            for scope in reversed(self.scopes):
+                if name.lexeme in scope:
+                    binding = scope[name.lexeme]
+                    break
+
+        if binding is None:
+            binding = self.global_binding(name.lexeme)
+            if assign:
+                self.current.globals.add(binding.name)
+        elif binding.owner is not self.current:
+            binding.captured = True
+            if assign:
+                self.current.nonlocals.add(binding)
+
+            function: Optional[PyFunction] = self.current
+            while function is not None and function is not binding.owner:
+                function.free.add(binding)
+                function = function.enclosing
+
+        self.bindings[expr] = binding
+
+    def function(self, stmt: FunctionStmt) -> None:
+        function = PyFunction(self.current)
+        self.functions[stmt] = function
+        self.current = function
+
+        self.scopes.append({})
+        for param in stmt.params:
+            self.declare(param, param)
+        self.bind(stmt.body)
+        self.scopes.pop()
+
+        self.current = function.enclosing
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.scopes.append({})
+        self.bind(stmt.statements)
+        self.scopes.pop()
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> None:
+        self.declare(stmt, stmt.name)
+        self.bind(stmt.superclass)
+        for method in stmt.methods:
+            self.method_names.add(method.name.lexeme)
+            self.function(method)
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        self.bind(stmt.expression)
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        self.declare(stmt, stmt.name)
+        self.function(stmt)
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.bind(stmt.condition)
+        self.bind(stmt.then_branch)
+        self.bind(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.bind(stmt.expression)
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        self.bind(stmt.value)
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        self.bind(stmt.initializer)
+        self.declare(stmt, stmt.name)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.bind(stmt.condition)
+        self.current.loop_depth += 1
+        self.bind(stmt.body)
+        self.current.loop_depth -= 1
+
+    def visit_for_stmt(self, stmt: ForStmt) -> None:
+        self.scopes.append({})
+        self.bind(stmt.initializer)
+        self.bind(stmt.condition)
+        self.current.loop_depth += 1
+        self.bind(stmt.body)
+        self.bind(stmt.increment)
+        self.current.loop_depth -= 1
+        self.scopes.pop()
+
+    def visit_assign_expr(self, expr: AssignExpr) -> None:
+        self.bind(expr.value)
+        self.reference(expr, expr.name, True)
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> None:
+        self.bind(expr.left)
+        self.bind(expr.right)
+
+    def visit_call_expr(self, expr: CallExpr) -> None:
+        self.bind(expr.callee)
+        self.bind(expr.arguments)
+
+    def visit_get_expr(self, expr: GetExpr) -> None:
+        self.bind(expr.object)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> None:
+        self.bind(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> None:
+        ...
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> None:
+        self.bind(expr.left)
+        self.bind(expr.right)
+
+    def visit_set_expr(self, expr: SetExpr) -> None:
+        self.field_names.add(expr.name.lexeme)
+        self.bind(expr.object)
+        self.bind(expr.value)
+
+    def visit_super_expr(self, expr: SuperExpr) -> None:
+        ...
+
+    def visit_this_expr(self, expr: ThisExpr) -> None:
+        ...
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> None:
+        self.bind(expr.right)
+
+    def visit_variable_expr(self, expr: VariableExpr) -> None:
+        self.reference(expr, expr.name, False)
+
+
+class Transpiler(Visitor):
+    """
+    Turns a resolved program into the source of a python module. Lox
+    functions become python functions, classes become python classes with
+    __slots__ and locals become python locals, so CPython's own compiler and
+    specializing interpreter run the program. The module's main() runs the
+    program and run() also reports runtime errors.
+
+    Programs that run without errors print the same output as the
+    Interpreter, runtime errors may surface as plain python exceptions.
+    """
+
+    def __init__(self) -> None:
+        self.binder: Binder = Binder()
+        self.function: PyFunction = self.binder.main
+        self.out: list[str] = []
+        self.indent: int = 0
+        self.temps: int = 0
+
+    def transpile(self, stmts: list[Stmt], source_name: str = "<script>") -> str:
+        self.binder.bind(stmts)
+
+        self.out = [f"# Generated by plox from {source_name}, do not edit", ""]
+        self.out.extend(PRELUDE.splitlines())
+        self.out.extend(["", ""])
+
+        self.emit_def("main", [], self.binder.main, stmts)
+        self.out.extend(FOOTER.splitlines())
+        return "\n".join(self.out) + "\n"
+
+    def line(self, txt: str) -> None:
+        self.out.append("    " * self.indent + txt if txt else "")
+
+    def temp(self) -> str:
+        self.temps += 1
+        return f"_t{self.temps}"
+
+    def emit_def(
+        self,
+        name: str,
+        params: list[str],
+        function: PyFunction,
+        body: list[Stmt],
+    ) -> None:
+        self.line(f"def {name}({', '.join(params)}):")
+        self.indent += 1
+        if function.globals:
+            self.line(f"global {', '.join(sorted(function.globals))}")
+        nonlocals = sorted(b.name for b in function.nonlocals if not b.boxed)
+        if nonlocals:
+            self.line(f"nonlocal {', '.join(nonlocals)}")
+
+        enclosing: PyFunction = self.function
+        self.function = function
+        start = len(self.out)
+        self.emit_body(body)
+        if len(self.out) == start:
+            self.line("pass")
+        self.function = enclosing
+        self.indent -= 1
+
+    def emit_definition(
+        self, binding: Binding, functions: list[PyFunction], emit: Callable[[], None]
+    ) -> None:
+        """
+        Closures capture python variables rather than values, so a function
+        made inside a loop gets this iteration's boxes through a factory.
+        """
+        boxes = sorted(
+            {
+                free.name
+                for function in functions
+                for free in function.free
+                if free.boxed and free.owner is self.function and free is not binding
+            }
+        )
+        if boxes:
+            factory = f"_make_{binding.name}"
+            self.line(f"def {factory}({', '.join(boxes)}):")
+            self.indent += 1
+
+        emit()
+        if binding.boxed:
+            self.line(f"{binding.name} = [{binding.name}]")
+
+        if boxes:
+            self.line(f"return {binding.name}")
+            self.indent -= 1
+            self.line(f"{binding.name} = {factory}({', '.join(boxes)})")
+
+    def emit_body(self, stmts: list[Stmt]) -> None:
+        for stmt in stmts:
+            stmt.accept(self)
+
+    def emit_suite(self, stmt: Stmt) -> None:
+        self.indent += 1
+        start = len(self.out)
+        stmt.accept(self)
+        if len(self.out) == start:
+            self.line("pass")
+        self.indent -= 1
+
+    def declared(self, node: Any, value: str) -> None:
+        binding: Binding = self.binder.bindings[node]
+        if binding.boxed:
+            self.line(f"{binding.name} = [{value}]")
+        else:
+            self.line(f"{binding.name} = {value}")
+
+    def read(self, expr: Expr) -> str:
+        binding: Binding = self.binder.bindings[expr]
+        return f"{binding.name}[0]" if binding.boxed else binding.name
+
+    def expr(self, expr: Expr) -> str:
+        return expr.accept(self)
+
+    def condition(self, expr: Expr) -> str:
+        code = self.expr(expr)
+        return code if self.is_boolean(expr) else f"_truthy({code})"
+
+    def is_boolean(self, expr: Expr) -> bool:
+        while isinstance(expr, GroupingExpr):
+            expr = expr.expression
+        if isinstance(expr, LiteralExpr):
+            return isinstance(expr.value, bool)
+        if isinstance(expr, BinaryExpr):
+            return expr.operator.type in BOOLEAN_OPS
+        if isinstance(expr, UnaryExpr):
+            return expr.operator.type == TokenType.BANG
+        return False
+
+    def is_simple(self, expr: Expr) -> bool:
+        """Expressions that can be evaluated twice without side effects"""
+        while isinstance(expr, GroupingExpr):
+            expr = expr.expression
+        return isinstance(expr, (LiteralExpr, VariableExpr, ThisExpr))
+
+    def is_number(self, expr: Expr) -> bool:
+        return isinstance(expr, LiteralExpr) and type(expr.value) is float
+
+    def property(self, obj: str, name: str) -> str:
+        if name not in self.binder.method_names:
+            return f"{obj}.f_{name}"
+        if name not in self.binder.field_names:
+            return f"{obj}.m_{name}"
+        return f'_get({obj}, "f_{name}", "m_{name}")'
+
+    def visit_block_stmt(self, stmt: BlockStmt) -> None:
+        self.emit_body(stmt.statements)
+
+    def visit_class_stmt(self, stmt: ClassStmt) -> None:
+        binding: Binding = self.binder.bindings[stmt]
+        methods = [self.binder.functions[method] for method in stmt.methods]
+        self.emit_definition(binding, methods, lambda: self.emit_class(stmt, binding))
+
+    def emit_class(self, stmt: ClassStmt, binding: Binding) -> None:
+        superclass = "_LoxObject"
+        slots = "()"
+        if stmt.superclass is not None:
+            superclass = self.expr(stmt.superclass)
+        elif self.binder.field_names:
+            fields = sorted(self.binder.field_names)
+            slots = "(" + "".join(f'"f_{field}", ' for field in fields) + ")"
+
+        self.line(f"class {binding.name}({superclass}):")
+        self.indent += 1
+        self.line(f"__slots__ = {slots}")
+        self.line(f"lox_name = {stmt.name.lexeme!r}")
+
+        for method in stmt.methods:
+            params = ["this"] + [
+                self.binder.bindings[param].name for param in method.params
+            ]
+            function = self.binder.functions[method]
+            if method.name.lexeme == "init":
+                self.emit_def("__init__", params, function, method.body)
+                self.line("")
+                self.line("def m_init(this, *args):")
+                # Not this.__init__, super.init from a subclass would call
+                # the subclass initializer again
+                self.line("    __class__.__init__(this, *args)")
+                self.line("    return this")
+            else:
+                self.emit_def(f"m_{method.name.lexeme}", params, function, method.body)
+            self.line(f"m_{method.name.lexeme}.__name__ = {method.name.lexeme!r}")
+            self.line("")
+
+        self.indent -= 1
+
+    def visit_expression_stmt(self, stmt: ExpressionStmt) -> None:
+        expr = stmt.expression
+        if isinstance(expr, AssignExpr):
+            binding: Binding = self.binder.bindings[expr]
+            target = f"{binding.name}[0]" if binding.boxed else binding.name
+            self.line(f"{target} = {self.expr(expr.value)}")
+        elif (
+            isinstance(expr, SetExpr)
+            and isinstance(expr.object, ThisExpr)
+            and expr.name.lexeme not in self.binder.method_names
+        ):
+            # Only this is known to be an instance, anything else goes through
+            # _set's check
+            self.line(f"this.f_{expr.name.lexeme} = {self.expr(expr.value)}")
+        else:
+            self.line(self.expr(expr))
+
+    def visit_function_stmt(self, stmt: FunctionStmt) -> None:
+        binding: Binding = self.binder.bindings[stmt]
+        function: PyFunction = self.binder.functions[stmt]
+        self.emit_definition(
+            binding, [function], lambda: self.emit_function(stmt, binding, function)
+        )
+
+    def emit_function(
+        self, stmt: FunctionStmt, binding: Binding, function: PyFunction
+    ) -> None:
+        params = [self.binder.bindings[param].name for param in stmt.params]
+        self.emit_def(binding.name, params, function, stmt.body)
+        self.line(f"{binding.name}.__name__ = {stmt.name.lexeme!r}")
+
+    def visit_if_stmt(self, stmt: IfStmt) -> None:
+        self.line(f"if {self.condition(stmt.condition)}:")
+        self.emit_suite(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.line("else:")
+            self.emit_suite(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: PrintStmt) -> None:
+        self.line(f"print(_stringify({self.expr(stmt.expression)}))")
+
+    def visit_return_stmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value is None:
+            self.line("return")
+        else:
+            self.line(f"return {self.expr(stmt.value)}")
+
+    def visit_var_stmt(self, stmt: VarStmt) -> None:
+        value = "None"
+        if stmt.initializer is not None:
+            value = self.expr(stmt.initializer)
+        self.declared(stmt, value)
+
+    def visit_while_stmt(self, stmt: WhileStmt) -> None:
+        self.line(f"while {self.condition(stmt.condition)}:")
+        self.emit_suite(stmt.body)
+
+    def visit_for_stmt(self, stmt: ForStmt) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        condition = "True"
+        if stmt.condition is not None:
+            condition = self.condition(stmt.condition)
+        self.line(f"while {condition}:")
+
+        body: Stmt = stmt.body
+        if stmt.increment is not None:
+            body = BlockStmt([body, ExpressionStmt(stmt.increment)])
+        self.emit_suite(body)
+
+    def visit_assign_expr(self, expr: AssignExpr) -> str:
+        binding: Binding = self.binder.bindings[expr]
+        if binding.boxed:
+            return f"_set_box({binding.name}, {self.expr(expr.value)})"
+        return f"({binding.name} := {self.expr(expr.value)})"
+
+    def visit_binary_expr(self, expr: BinaryExpr) -> str:
+        left = self.expr(expr.left)
+        right = self.expr(expr.right)
+        op = expr.operator.type
+
+        if op == TokenType.EQUAL_EQUAL:
+            return f"({left} == {right})"
+        if op == TokenType.BANG_EQUAL:
+            return f"({left} != {right})"
+
+        if op == TokenType.PLUS:
+            symbol, helper = "+", "_add"
+        else:
+            symbol, helper = NUMBER_OPS[op]
+
+        if not (self.is_simple(expr.left) and self.is_simple(expr.right)):
+            return f"{helper}({left}, {right})"
+
+        guards = [
+            f"type({code}) is float"
+            for code, operand in ((left, expr.left), (right, expr.right))
+            if not self.is_number(operand)
+        ]
+        if not guards:
+            return f"{helper}({left}, {right})"
+        return (
+            f"({left} {symbol} {right} if {' and '.join(guards)} "
+            f"else {helper}({left}, {right}))"
+        )
+
+    def visit_call_expr(self, expr: CallExpr) -> str:
+        arguments = ", ".join(self.expr(argument) for argument in expr.arguments)
+        return f"{self.expr(expr.callee)}({arguments})"
+
+    def visit_get_expr(self, expr: GetExpr) -> str:
+        return self.property(self.expr(expr.object), expr.name.lexeme)
+
+    def visit_grouping_expr(self, expr: GroupingExpr) -> str:
+        return self.expr(expr.expression)
+
+    def visit_literal_expr(self, expr: LiteralExpr) -> str:
+        return repr(expr.value)
+
+    def visit_logical_expr(self, expr: LogicalExpr) -> str:
+        left = self.expr(expr.left)
+        right = self.expr(expr.right)
+        is_or = expr.operator.type == TokenType.OR
+
+        if self.is_boolean(expr.left):
+            return f"({left} {'or' if is_or else 'and'} {right})"
+
+        temp = self.temp()
+        if is_or:
+            return f"({temp} if _truthy({temp} := {left}) else {right})"
+        return f"({right} if _truthy({temp} := {left}) else {temp})"
+
+    def visit_set_expr(self, expr: SetExpr) -> str:
+        obj = self.expr(expr.object)
+        return f'_set({obj}, "f_{expr.name.lexeme}", {self.expr(expr.value)})'
+
+    def visit_super_expr(self, expr: SuperExpr) -> str:
+        return f"super(__class__, this).m_{expr.method.lexeme}"
+
+    def visit_this_expr(self, expr: ThisExpr) -> str:
+        return "this"
+
+    def visit_unary_expr(self, expr: UnaryExpr) -> str:
+        right = self.expr(expr.right)
+        if expr.operator.type == TokenType.BANG:
+            if self.is_boolean(expr.right):
+                return f"(not {right})"
+            return f"(not _truthy({right}))"
+
+        if self.is_simple(expr.right):
+            return f"(-{right} if type({right}) is float else _neg({right}))"
+        return f"_neg({right})"
+
+    def visit_variable_expr(self, expr: VariableExpr) -> str:
+        return self.read(expr)
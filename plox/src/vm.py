@@ -0,0 +1,389 @@
+from typing import Any, Optional
+
+from bytecode import OpCode
+from loxcallable import Clock, LoxCallable
+from rope import concat, is_string
+from vm_object import (ObjBoundMethod, ObjClass, ObjClosure, ObjFunction,
+                       ObjInstance, ObjUpvalue)
+
+FRAMES_MAX = 10000
+
+OP_CONSTANT = OpCode.OP_CONSTANT.value
+OP_NIL = OpCode.OP_NIL.value
+OP_TRUE = OpCode.OP_TRUE.value
+OP_FALSE = OpCode.OP_FALSE.value
+OP_POP = OpCode.OP_POP.value
+OP_GET_LOCAL = OpCode.OP_GET_LOCAL.value
+OP_SET_LOCAL = OpCode.OP_SET_LOCAL.value
+OP_GET_GLOBAL = OpCode.OP_GET_GLOBAL.value
+OP_SET_GLOBAL = OpCode.OP_SET_GLOBAL.value
+OP_DEFINE_GLOBAL = OpCode.OP_DEFINE_GLOBAL.value
+OP_GET_UPVALUE = OpCode.OP_GET_UPVALUE.value
+OP_SET_UPVALUE = OpCode.OP_SET_UPVALUE.value
+OP_GET_PROPERTY = OpCode.OP_GET_PROPERTY.value
+OP_SET_PROPERTY = OpCode.OP_SET_PROPERTY.value
+OP_GET_SUPER = OpCode.OP_GET_SUPER.value
+OP_EQUAL = OpCode.OP_EQUAL.value
+OP_GREATER = OpCode.OP_GREATER.value
+OP_LESS = OpCode.OP_LESS.value
+OP_ADD = OpCode.OP_ADD.value
+OP_SUBTRACT = OpCode.OP_SUBTRACT.value
+OP_MULTIPLY = OpCode.OP_MULTIPLY.value
+OP_DIVIDE = OpCode.OP_DIVIDE.value
+OP_NOT = OpCode.OP_NOT.value
+OP_NEGATE = OpCode.OP_NEGATE.value
+OP_PRINT = OpCode.OP_PRINT.value
+OP_JUMP = OpCode.OP_JUMP.value
+OP_JUMP_IF_FALSE = OpCode.OP_JUMP_IF_FALSE.value
+OP_LOOP = OpCode.OP_LOOP.value
+OP_CALL = OpCode.OP_CALL.value
+OP_INVOKE = OpCode.OP_INVOKE.value
+OP_SUPER_INVOKE = OpCode.OP_SUPER_INVOKE.value
+OP_CLOSURE = OpCode.OP_CLOSURE.value
+OP_CLOSE_UPVALUE = OpCode.OP_CLOSE_UPVALUE.value
+OP_RETURN = OpCode.OP_RETURN.value
+OP_CLASS = OpCode.OP_CLASS.value
+OP_INHERIT = OpCode.OP_INHERIT.value
+OP_METHOD = OpCode.OP_METHOD.value
+
+
+class VMRuntimeError(Exception):
+    pass
+
+
+class CallFrame:
+    __slots__ = ("closure", "ip", "slots")
+
+    def __init__(self, closure: ObjClosure, slots: int) -> None:
+        self.closure: ObjClosure = closure
+        self.ip: int = 0
+        self.slots: int = slots
+
+
+class VM:
+    def __init__(self, error) -> None:
+        self.error = error
+        self.stack: list[Any] = []
+        self.frames: list[CallFrame] = []
+        self.globals: dict[str, Any] = {"clock": Clock()}
+        self.open_upvalues: dict[int, ObjUpvalue] = {}
+
+    def interpret(self, function: ObjFunction) -> bool:
+        """Runs a compiled script, returns False if a runtime error stopped it"""
+        closure = ObjClosure(function, [])
+        self.stack = [closure]
+        self.frames = []
+        self.open_upvalues = {}
+        self.call(closure, 0)
+        try:
+            self.run()
+        except VMRuntimeError as e:
+            frame: CallFrame = self.frames[-1]
+            line: int = frame.closure.function.chunk.lines[max(frame.ip - 1, 0)]
+            self.error(line, e.args[0])
+            return False
+        return True
+
+    def call(self, closure: ObjClosure, arg_count: int) -> None:
+        if arg_count != closure.function.arity:
+            raise VMRuntimeError(
+                f"Expected {closure.function.arity} arguments but got {arg_count}."
+            )
+        if len(self.frames) == FRAMES_MAX:
+            raise VMRuntimeError("Stack overflow.")
+
+        self.frames.append(CallFrame(closure, len(self.stack) - arg_count - 1))
+
+    def call_value(self, callee: Any, arg_count: int) -> None:
+        if isinstance(callee, ObjClosure):
+            self.call(callee, arg_count)
+            return
+
+        if isinstance(callee, ObjBoundMethod):
+            self.stack[-arg_count - 1] = callee.receiver
+            self.call(callee.method, arg_count)
+            return
+
+        if isinstance(callee, ObjClass):
+            self.stack[-arg_count - 1] = ObjInstance(callee)
+            initializer: Optional[ObjClosure] = callee.methods.get("init")
+            if initializer is not None:
+                self.call(initializer, arg_count)
+            elif arg_count != 0:
+                raise VMRuntimeError(f"Expected 0 arguments but got {arg_count}.")
+            return
+
+        if isinstance(callee, LoxCallable):
+            if arg_count != callee.arity():
+                raise VMRuntimeError(
+                    f"Expected {callee.arity()} arguments but got {arg_count}."
+                )
+            arguments: list[Any] = self.stack[len(self.stack) - arg_count :]
+            result: Any = callee.call(self, arguments)
+            del self.stack[len(self.stack) - arg_count - 1 :]
+            self.stack.append(result)
+            return
+
+        raise VMRuntimeError("Can only call functions and classes.")
+
+    def invoke_from_class(self, klass: ObjClass, name: str, arg_count: int) -> None:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            raise VMRuntimeError(f"Undefined property '{name}'.")
+        self.call(method, arg_count)
+
+    def invoke(self, name: str, arg_count: int) -> None:
+        receiver: Any = self.stack[-arg_count - 1]
+        if not isinstance(receiver, ObjInstance):
+            raise VMRuntimeError("Only instances have methods.")
+
+        if name in receiver.fields:
+            value: Any = receiver.fields[name]
+            self.stack[-arg_count - 1] = value
+            self.call_value(value, arg_count)
+            return
+
+        self.invoke_from_class(receiver.klass, name, arg_count)
+
+    def bind_method(self, klass: ObjClass, name: str, receiver: Any) -> ObjBoundMethod:
+        method: Optional[ObjClosure] = klass.methods.get(name)
+        if method is None:
+            raise VMRuntimeError(f"Undefined property '{name}'.")
+        return ObjBoundMethod(receiver, method)
+
+    def capture_upvalue(self, location: int) -> ObjUpvalue:
+        upvalue: Optional[ObjUpvalue] = self.open_upvalues.get(location)
+        if upvalue is None:
+            upvalue = ObjUpvalue(self.stack, location)
+            self.open_upvalues[location] = upvalue
+        return upvalue
+
+    def close_upvalues(self, last: int) -> None:
+        for location in [loc for loc in self.open_upvalues if loc >= last]:
+            self.open_upvalues.pop(location).close()
+
+    def run(self) -> None:
+        stack: list[Any] = self.stack
+        frames: list[CallFrame] = self.frames
+        globals: dict[str, Any] = self.globals
+        push = stack.append
+        pop = stack.pop
+
+        frame: CallFrame = frames[-1]
+        code: list[int] = frame.closure.function.chunk.code
+        constants: list[Any] = frame.closure.function.chunk.constants
+        slots: int = frame.slots
+        ip: int = 0
+
+        while True:
+            op: int = code[ip]
+            ip += 1
+
+            if op == OP_GET_LOCAL:
+                push(stack[slots + code[ip]])
+                ip += 1
+            elif op == OP_CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == OP_POP:
+                pop()
+            elif op == OP_SET_LOCAL:
+                stack[slots + code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_GET_GLOBAL:
+                name: str = constants[code[ip]]
+                ip += 1
+                if name not in globals:
+                    frame.ip = ip
+                    raise VMRuntimeError(f"Undefined variable '{name}'.")
+                push(globals[name])
+            elif op == OP_JUMP_IF_FALSE:
+                value: Any = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == OP_JUMP:
+                ip = code[ip]
+            elif op == OP_LOOP:
+                ip = code[ip]
+            elif op == OP_LESS or op == OP_GREATER:
+                right: Any = pop()
+                left: Any = pop()
+                if not (isinstance(left, float) and isinstance(right, float)):
+                    frame.ip = ip
+                    raise VMRuntimeError("Operands must be numbers.")
+                push(left < right if op == OP_LESS else left > right)
+            elif op == OP_ADD:
+                right = pop()
+                left = pop()
+                if isinstance(left, float) and isinstance(right, float):
+                    push(left + right)
+                elif is_string(left) and is_string(right):
+                    push(concat(left, right))
+                else:
+                    frame.ip = ip
+                    raise VMRuntimeError(
+                        "Operands must be two numbers or two strings."
+                    )
+            elif op == OP_SUBTRACT or op == OP_MULTIPLY or op == OP_DIVIDE:
+                right = pop()
+                left = pop()
+                if not (isinstance(left, float) and isinstance(right, float)):
+                    frame.ip = ip
+                    raise VMRuntimeError("Operands must be numbers.")
+                if op == OP_SUBTRACT:
+                    push(left - right)
+                elif op == OP_MULTIPLY:
+                    push(left * right)
+                else:
+                    push(left / right)
+            elif op == OP_CALL or op == OP_INVOKE or op == OP_SUPER_INVOKE:
+                if op == OP_CALL:
+                    arg_count: int = code[ip]
+                    ip += 1
+                    frame.ip = ip
+                    self.call_value(stack[-arg_count - 1], arg_count)
+                elif op == OP_INVOKE:
+                    name = constants[code[ip]]
+                    arg_count = code[ip + 1]
+                    ip += 2
+                    frame.ip = ip
+                    self.invoke(name, arg_count)
+                else:
+                    name = constants[code[ip]]
+                    arg_count = code[ip + 1]
+                    ip += 2
+                    frame.ip = ip
+                    self.invoke_from_class(pop(), name, arg_count)
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                slots = frame.slots
+                ip = frame.ip
+            elif op == OP_RETURN:
+                result: Any = pop()
+                if self.open_upvalues:
+                    self.close_upvalues(slots)
+                frames.pop()
+                if not frames:
+                    pop()
+                    return
+
+                del stack[slots:]
+                push(result)
+                frame = frames[-1]
+                code = frame.closure.function.chunk.code
+                constants = frame.closure.function.chunk.constants
+                slots = frame.slots
+                ip = frame.ip
+            elif op == OP_NIL:
+                push(None)
+            elif op == OP_TRUE:
+                push(True)
+            elif op == OP_FALSE:
+                push(False)
+            elif op == OP_SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals:
+                    frame.ip = ip
+                    raise VMRuntimeError(f"Undefined variable '{name}'.")
+                globals[name] = stack[-1]
+            elif op == OP_DEFINE_GLOBAL:
+                globals[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == OP_GET_UPVALUE:
+                push(frame.closure.upvalues[code[ip]].get())
+                ip += 1
+            elif op == OP_SET_UPVALUE:
+                frame.closure.upvalues[code[ip]].set(stack[-1])
+                ip += 1
+            elif op == OP_GET_PROPERTY:
+                instance: Any = stack[-1]
+                name = constants[code[ip]]
+                ip += 1
+                frame.ip = ip
+                if not isinstance(instance, ObjInstance):
+                    raise VMRuntimeError("Only instances have properties.")
+                if name in instance.fields:
+                    stack[-1] = instance.fields[name]
+                else:
+                    stack[-1] = self.bind_method(instance.klass, name, instance)
+            elif op == OP_SET_PROPERTY:
+                instance = stack[-2]
+                ip += 1
+                if not isinstance(instance, ObjInstance):
+                    frame.ip = ip
+                    raise VMRuntimeError("Only instances have fields.")
+                value = pop()
+                instance.fields[constants[code[ip - 1]]] = value
+                stack[-1] = value
+            elif op == OP_GET_SUPER:
+                superclass: ObjClass = pop()
+                frame.ip = ip + 1
+                stack[-1] = self.bind_method(
+                    superclass, constants[code[ip]], stack[-1]
+                )
+                ip += 1
+            elif op == OP_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == OP_NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == OP_NEGATE:
+                if not isinstance(stack[-1], float):
+                    frame.ip = ip
+                    raise VMRuntimeError("Operand must be a number.")
+                stack[-1] = -stack[-1]
+            elif op == OP_PRINT:
+                print(self.stringify(pop()))
+            elif op == OP_CLOSURE:
+                function: ObjFunction = constants[code[ip]]
+                ip += 1
+                upvalues: list[ObjUpvalue] = []
+                for _ in range(function.upvalue_count):
+                    is_local: int = code[ip]
+                    index: int = code[ip + 1]
+                    ip += 2
+                    if is_local:
+                        upvalues.append(self.capture_upvalue(slots + index))
+                    else:
+                        upvalues.append(frame.closure.upvalues[index])
+                push(ObjClosure(function, upvalues))
+            elif op == OP_CLOSE_UPVALUE:
+                self.close_upvalues(len(stack) - 1)
+                pop()
+            elif op == OP_CLASS:
+                push(ObjClass(constants[code[ip]]))
+                ip += 1
+            elif op == OP_INHERIT:
+                superclass = stack[-2]
+                if not isinstance(superclass, ObjClass):
+                    frame.ip = ip
+                    raise VMRuntimeError("Superclass must be a class.")
+                subclass: ObjClass = pop()
+                subclass.methods.update(superclass.methods)
+            elif op == OP_METHOD:
+                method: ObjClosure = pop()
+                stack[-1].methods[constants[code[ip]]] = method
+                ip += 1
+            else:
+                raise VMRuntimeError(f"Unknown opcode {op}.")
+
+    def stringify(self, obj: Any) -> str:
+        if obj is None:
+            return "nil"
+
+        if isinstance(obj, float):
+            txt: str = str(obj)
+
+            if ".0" == txt[-2:]:
+                txt = txt[0:-2]
+
+            return txt
+        if hasattr(obj, "to_string"):
+            return obj.to_string()
+
+        return str(obj)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from bytecode import Chunk
+
+
+class ObjFunction:
+    def __init__(self, name: Optional[str]) -> None:
+        self.name: Optional[str] = name
+        self.arity: int = 0
+        self.upvalue_count: int = 0
+        self.chunk: Chunk = Chunk()
+
+    def to_string(self) -> str:
+        if self.name is None:
+            return "<script>"
+        return f"<fn {self.name}>"
+
+
+class ObjUpvalue:
+    __slots__ = ("stack", "location", "closed")
+
+    def __init__(self, stack: list[Any], location: int) -> None:
+        self.stack: Optional[list[Any]] = stack
+        self.location: int = location
+        self.closed: Any = None
+
+    def get(self) -> Any:
+        if self.stack is not None:
+            return self.stack[self.location]
+        return self.closed
+
+    def set(self, value: Any) -> None:
+        if self.stack is not None:
+            self.stack[self.location] = value
+        else:
+            self.closed = value
+
+    def close(self) -> None:
+        self.closed = self.stack[self.location]
+        self.stack = None
+
+
+class ObjClosure:
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: ObjFunction, upvalues: list[ObjUpvalue]) -> None:
+        self.function: ObjFunction = function
+        self.upvalues: list[ObjUpvalue] = upvalues
+
+    def to_string(self) -> str:
+        return self.function.to_string()
+
+
+class ObjClass:
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.methods: dict[str, ObjClosure] = {}
+
+    def to_string(self) -> str:
+        return self.name
+
+
+class ObjInstance:
+    __slots__ = ("klass", "fields")
+
+    def __init__(self, klass: ObjClass) -> None:
+        self.klass: ObjClass = klass
+        self.fields: dict[str, Any] = {}
+
+    def to_string(self) -> str:
+        return self.klass.name + " instance"
+
+
+class ObjBoundMethod:
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver: Any, method: ObjClosure) -> None:
+        self.receiver: Any = receiver
+        self.method: ObjClosure = method
+
+    def to_string(self) -> str:
+        return self.method.to_string()
@@ -0,0 +1,95 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from _token import Token
+from closure_compiler import ClosureInterpreter
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stmt import Stmt
+
+PROGRAMS = [
+    "var a = 2 - 1;print a;",
+    """for (var i = 0; i < 5; i = i + 1) {
+        print i;
+        }""",
+    "fun fib(n) {if (n < 2){return n;}return fib(n - 2) + fib(n - 1);} print fib(10);",
+    "print (1 + 2) * 3 / 4 - -1; print 1 == 1; print 1 != 1; print nil or 2;",
+    """var a = "global";
+    {
+        fun show() { print a; }
+        show();
+        var a = "block";
+        show();
+    }""",
+    """class Doughnut {
+        cook() { return "Fry until golden brown."; }
+    }
+    class BostonCream < Doughnut {
+        init(filling) { this.filling = filling; }
+        cook() { return super.cook() + " " + this.filling; }
+    }
+    var b = BostonCream("custard");
+    print b.cook(); print b; print BostonCream;""",
+    """var keep = nil;
+    for (var i = 0; i < 3; i = i + 1) { fun f() { print i; } if (i == 1) keep = f; }
+    keep();
+    for (var i = 0; i < 10; i = i + 1) { if (i == 2) i = 7; print i; }
+    var limit = 2;
+    for (var i = 5; i > 0; i = i - 1.5) { if (i < 3) limit = 0; print i; }
+    for (var i = 0; i <= limit; i = i + 0.5) print i;
+    fun first(n) { for (;;) { if (n > 3) return n; n = n + 1; } }
+    print first(0);""",
+    """var s = "a";
+    for (var i = 0; i < 300; i = i + 1) s = s + "bc";
+    var t = "a";
+    for (var i = 0; i < 300; i = i + 1) t = t + "b" + "c";
+    print s == t; print s != t; print s + "!" == "!"; print t;""",
+]
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def run_code(interpreter: Interpreter, txt: str):
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    tokens: list[Token] = scanner.tokens
+    parser: Parser = Parser(tokens, pass_error)
+    stmts: list[Stmt] = parser.parse()
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def test_quick_maths(capsys):
+    run_code(ClosureInterpreter(pass_error), "var a = 2 - 1;print a;")
+    captured = capsys.readouterr()
+    assert captured.out == "1\n"
+
+
+def test_runtime_error():
+    errors = []
+    run_code(ClosureInterpreter(lambda *args: errors.append(args)), 'print -"a";')
+    assert len(errors) == 1
+
+
+def test_tail_calls(capsys):
+    run_code(
+        ClosureInterpreter(pass_error),
+        """fun loop(n) { if (n == 0) return "done"; return loop(n - 1); }
+        class A { m(n) { if (n == 0) return clock() > 0; return this.m(n - 1); } }
+        print loop(50000); print A().m(50000);""",
+    )
+    assert capsys.readouterr().out == "done\nTrue\n"
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_matches_interpreter(capsys, program):
+    run_code(Interpreter(pass_error), program)
+    expected = capsys.readouterr().out
+    run_code(ClosureInterpreter(pass_error), program)
+    assert capsys.readouterr().out == expected
@@ -0,0 +1,86 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from closure_compiler import ClosureInterpreter
+from inline_cache import report
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stmt import Stmt
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def run_code(interpreter: Interpreter, txt: str) -> Interpreter:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    stmts: list[Stmt] = Parser(scanner.tokens, pass_error).parse()
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+    return interpreter
+
+
+ENGINES = [Interpreter, ClosureInterpreter]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_monomorphic_site(capsys, engine):
+    interpreter = run_code(
+        engine(pass_error),
+        """class A { init() { this.x = 1; } }
+        var a = A();
+        for (var i = 0; i < 3; i = i + 1) { print a.x; }""",
+    )
+    assert capsys.readouterr().out == "1\n1\n1\n"
+    get = [cache for cache in interpreter.caches if cache.kind == "get"][0]
+    assert (get.state(), get.hits, get.misses) == ("monomorphic", 2, 1)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_polymorphic_and_megamorphic_sites(capsys, engine):
+    interpreter = run_code(
+        engine(pass_error),
+        """class A { name() { return "A"; } }
+        class B { name() { return "B"; } }
+        class C { init() { this.name = "C"; } }
+        fun show(o) { print o.name; }
+        show(A()); show(B()); show(C()); show(A());""",
+    )
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["<fn name>", "<fn name>", "C", "<fn name>"]
+    get = [cache for cache in interpreter.caches if cache.kind == "get"][0]
+    assert (get.state(), get.hits, get.misses) == ("polymorphic", 1, 3)
+
+    interpreter = run_code(
+        engine(pass_error),
+        """class A {} class B {} class C {} class D {} class E {}
+        fun set(o) { o.v = 1; return o.v; }
+        set(A()); set(B()); set(C()); set(D()); print set(E());""",
+    )
+    assert capsys.readouterr().out == "1\n"
+    assert "megamorphic" in {cache.state() for cache in interpreter.caches}
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_field_shadows_cached_method(capsys, engine):
+    run_code(
+        engine(pass_error),
+        """fun other() { return "field"; }
+        class A { m() { return "method"; } }
+        fun call(o) { return o.m(); }
+        var a = A(); var b = A(); b.m = other;
+        print call(a); print call(b); print call(a);""",
+    )
+    assert capsys.readouterr().out == "method\nfield\nmethod\n"
+
+
+def test_report():
+    interpreter = run_code(
+        Interpreter(pass_error), "class A {} var a = A(); a.x = 1; a.x = 2;"
+    )
+    assert report(interpreter.caches)[-1] == "2 sites, 0 hits, 2 misses"
@@ -4,7 +4,9 @@ sys.path.append("./src")
 from parser import Parser
 
 from _token import Token
-from interpreter import Interpreter
+from expression import BinaryExpr, QuickBinaryExpr
+from interpreter import QUICKEN_AFTER, Interpreter
+from resolver import Resolver
 from scanner import Scanner
 from stmt import BlockStmt, ExpressionStmt, FunctionStmt, Stmt, VarStmt
 from token_type import TokenType
@@ -20,8 +22,10 @@ def run_code(txt: str):
     tokens: list[Token] = scanner.tokens
     parser: Parser = Parser(tokens, None)
     parser.error = pass_error
+    stmts: list[Stmt] = parser.parse()
     interpreter: Interpreter = Interpreter(error=pass_error)
-    interpreter.interpret(parser.parse())
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
 
 
 def test_quick_maths(capsys):
@@ -54,6 +58,159 @@ def test_func_recursion(capsys):
     assert captured.out == "5\n"
 
 
+def test_return_from_nested_loop(capsys):
+    run_code(
+        """fun find(n) {
+            for (var i = 0; i < 10; i = i + 1) {
+                { if (i == n) return i; }
+            }
+            return nil;
+        }
+        fun early() { return; }
+        print find(3); print find(20); print early();"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "3\nnil\nnil\n"
+
+
+def test_return_restores_environment(capsys):
+    run_code(
+        """var a = "outer";
+        fun f() { { var a = "inner"; return a; } }
+        print f(); print a;"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "inner\nouter\n"
+
+
+def test_inherited_methods(capsys):
+    run_code(
+        """class A {
+            init(x) { this.x = x; } name() { return "A"; } get() { return this.x; }
+        }
+        class B < A { name() { return "B" + super.name(); } }
+        class C < B {}
+        var c = C(7);
+        print c.name(); print c.get();"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "BA\n7\n"
+
+
+def test_method_recursion_keeps_this(capsys):
+    run_code(
+        """class Node {
+            init(value, next) { this.value = value; this.next = next; }
+            sum() {
+                if (this.next == nil) return this.value;
+                return this.value + this.next.sum();
+            }
+        }
+        class Box { init() { this.f = Node(5, nil); } }
+        var list = Node(1, Node(2, Node(3, nil)));
+        print list.sum(); print list.next.sum();
+        var b = Box(); print b.f.sum();"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "6\n5\n5\n"
+
+
+def test_call_field_holding_function(capsys):
+    run_code(
+        """fun hello() { return "hi"; }
+        class A {}
+        var a = A(); a.f = hello;
+        print a.f();"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "hi\n"
+
+
+def test_tail_calls_run_in_constant_stack(capsys):
+    run_code(
+        """fun loop(n, acc) { if (n == 0) return acc; return loop(n - 1, acc + n); }
+        fun even(n) { if (n == 0) return true; return odd(n - 1); }
+        fun odd(n) { if (n == 0) return false; return even(n - 1); }
+        class C {
+            init() { this.n = 0; }
+            count(n) {
+                if (n == 0) return this; this.n = this.n + 1; return this.count(n - 1);
+            }
+        }
+        print loop(50000, 0); print even(20001); print C().count(30000).n;"""
+    )
+    captured = capsys.readouterr()
+    assert captured.out == "1250025000\nFalse\n30000\n"
+
+
+def test_binary_quickens_and_despecialises(capsys):
+    interpreter: Interpreter = Interpreter(pass_error)
+    stmts: list[Stmt] = parse(
+        f"""fun add(a, b) {{ return a + b; }}
+        for (var i = 0; i < {QUICKEN_AFTER}; i = i + 1) add(i, 1);
+        print add(1, 2);"""
+    )
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+    function: FunctionStmt = stmts[0]
+    add = function.body[0].value
+    assert type(add) is QuickBinaryExpr
+
+    interpreter.interpret(parse('print add("a", "b"); print add(-1, 1);'))
+    assert type(add) is BinaryExpr
+    assert capsys.readouterr().out == "3\nab\n0\n"
+
+
+def test_numbers_are_doubles(capsys):
+    run_code(
+        """print 7 / 2; print 6 / 3; print -0; print 0 * -1; print -0 + 0;
+        print 9007199254740992 + 1; print 4503599627370496 * 4; print 1 == 1.0;
+        var big = 1; for (var i = 0; i < 60; i = i + 1) big = big * 2;
+        print big; print big + 1 == big; print 0.1 + 0.2;"""
+    )
+    assert capsys.readouterr().out == (
+        "3.5\n2\n-0\n-0\n0\n9007199254740992\n1.8014398509481984e+16\nTrue\n"
+        "1.152921504606847e+18\nTrue\n0.30000000000000004\n"
+    )
+
+
+def test_counted_for_loops(capsys):
+    interpreter: Interpreter = Interpreter(pass_error)
+    stmts: list[Stmt] = parse(
+        """var n = 3;
+        for (var i = 0; i < n; i = i + 1) print i;
+        for (var i = 0; i < 10; i = i + 1) { if (i == 1) i = 8; print i; }
+        for (var i = 0; i != 2; i = i + 1) print i;"""
+    )
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+    counted, assigned, other = stmts[1:]
+    assert counted.counted
+    assert assigned.counted is False
+    assert other.counted is False
+    assert capsys.readouterr().out == "0\n1\n2\n0\n8\n9\n0\n1\n"
+
+
+def test_counted_for_falls_back_on_other_types(capsys):
+    errors: list = []
+    interpreter: Interpreter = Interpreter(lambda *args: errors.append(args))
+    stmts: list[Stmt] = parse(
+        """var limit = 2;
+        for (var i = 0; i < limit; i = i + 1) { print i; limit = "two"; }"""
+    )
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+    assert capsys.readouterr().out == "0\n"
+    assert len(errors) == 1
+    assert interpreter.environment is interpreter.globals
+
+
+def parse(txt: str) -> list[Stmt]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    return Parser(scanner.tokens, pass_error).parse()
+
+
 # class Doughnut {
 #   cook() {
 #     print "Fry until golden brown.";
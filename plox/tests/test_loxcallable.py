@@ -0,0 +1,35 @@
+import sys
+
+sys.path.append("./src")
+from _token import Token
+from loxcallable import LoxClass, LoxInstance
+from token_type import TokenType
+
+
+def name(lexeme: str) -> Token:
+    return Token(TokenType.IDENTIFIER, lexeme, None, 1)
+
+
+def test_instances_share_shapes():
+    klass = LoxClass("A", None, {})
+    a, b, c = LoxInstance(klass), LoxInstance(klass), LoxInstance(klass)
+    for instance in (a, b):
+        instance.set(name("x"), 1.0)
+        instance.set(name("y"), 2.0)
+    c.set(name("y"), 3.0)
+    c.set(name("x"), 4.0)
+
+    assert a.shape is b.shape
+    assert a.shape is not c.shape
+    assert a.values == [1.0, 2.0]
+    assert c.get(name("x")) == 4.0
+
+
+def test_set_existing_field_keeps_shape():
+    instance = LoxInstance(LoxClass("A", None, {}))
+    instance.set(name("x"), 1.0)
+    shape = instance.shape
+    instance.set(name("x"), 2.0)
+
+    assert instance.shape is shape
+    assert instance.get(name("x")) == 2.0
@@ -0,0 +1,85 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from expression import BinaryExpr, LiteralExpr
+from interpreter import Interpreter
+from optimizer import Optimizer, count_nodes
+from resolver import Resolver
+from scanner import Scanner
+from stmt import BlockStmt, FunctionStmt, PrintStmt, Stmt
+
+PROGRAMS = [
+    "print 60 * 60 * 24; print (1 + 2) * 3 / 4 - -1; print 1 == 1; print 1 != nil;",
+    'print "a" + "b"; print !nil; print !0; print nil or 2; print 0 and 3;',
+    'if (false) print "no"; else print "yes"; if (1 > 2) print "no";',
+    "while (false) print 1; for (var i = 0; false; i = i + 1) print i;",
+    "fun f(a) { if (true) return a; print a; } print f(3);",
+    "var a = 1; print a + 2 * 3; print (a);",
+]
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def parse(txt: str) -> list[Stmt]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    return Parser(scanner.tokens, pass_error).parse()
+
+
+def run(stmts: list[Stmt], errors: list):
+    interpreter: Interpreter = Interpreter(lambda *args: errors.append(args))
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def test_folds_constants():
+    stmts = Optimizer().optimize(parse("print 60 * 60 * 24;"))
+    printed: PrintStmt = stmts[0]
+    assert isinstance(printed.expression, LiteralExpr)
+    assert printed.expression.value == 86400.0
+
+
+def test_keeps_runtime_errors():
+    for source in ['print "a" - 1;', "print 1 / 0;", 'print -"a";']:
+        stmts = Optimizer().optimize(parse(source))
+        assert not isinstance(stmts[0].expression, LiteralExpr)
+
+    stmts = Optimizer().optimize(parse('print 1 + 2 - "a";'))
+    expr: BinaryExpr = stmts[0].expression
+    assert isinstance(expr.left, LiteralExpr) and expr.left.value == 3.0
+
+
+def test_prunes_dead_code():
+    stmts = Optimizer().optimize(
+        parse("if (false) print 1; while (nil) print 2; fun f() { return; print 3; }")
+    )
+    function: FunctionStmt = stmts[0]
+    assert len(stmts) == 1 and len(function.body) == 1
+
+
+def test_required_statements_stay():
+    stmts = Optimizer().optimize(parse("while (true) if (false) print 1;"))
+    assert isinstance(stmts[0].body, BlockStmt)
+
+
+def test_count_nodes():
+    stmts = parse("print 1 + 2;")
+    assert count_nodes(stmts) == 4
+    assert count_nodes(Optimizer().optimize(stmts)) == 2
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_same_output(capsys, program):
+    expected_errors: list = []
+    run(parse(program), expected_errors)
+    expected = capsys.readouterr().out
+
+    errors: list = []
+    run(Optimizer().optimize(parse(program)), errors)
+    assert capsys.readouterr().out == expected
+    assert errors == expected_errors
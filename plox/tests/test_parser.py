@@ -4,8 +4,12 @@ sys.path.append("./src")
 from parser import Parser
 
 from _token import Token
+from regex_scanner import RegexScanner
 from scanner import Scanner
-from stmt import BlockStmt, ExpressionStmt, FunctionStmt, Stmt, VarStmt
+from expression import (AssignExpr, BinaryExpr, CallExpr, Expr, GetExpr,
+                        LiteralExpr, LogicalExpr, UnaryExpr, VariableExpr)
+from stmt import (BlockStmt, ExpressionStmt, ForStmt, FunctionStmt, Stmt,
+                  VarStmt)
 from token_type import TokenType
 
 
@@ -27,7 +31,9 @@ def test_rec_fib():
         """fun fib(n) {if (n < 2){return n;}return fib(n - 2) + fib(n - 1);}for (var i = 0; i < 20; i = i + 1) {print fib(i);}"""
     )
     assert isinstance(stmts[0], FunctionStmt)
-    assert isinstance(stmts[1], BlockStmt)
+    assert isinstance(stmts[1], ForStmt)
+    assert isinstance(stmts[1].initializer, VarStmt)
+    assert isinstance(stmts[1].body, BlockStmt)
     assert len(stmts[0].body) == 2
     assert stmts[0].name.literal == "fib"
     assert stmts[0].params[0].literal == "n"
@@ -40,3 +46,85 @@ def test_assignment():
     assert stmts[0].name.literal == "a"
     assert stmts[0].name.lexeme == "a"
     assert stmts[0].initializer.value == 5
+
+
+def test_for_without_clauses():
+    stmts: list[Stmt] = get_stmts("for (;;) print 1;")
+    assert isinstance(stmts[0], ForStmt)
+    assert stmts[0].initializer is None
+    assert stmts[0].condition is None
+    assert stmts[0].increment is None
+
+
+def test_parses_from_a_generator():
+    source: str = "fun f(a) { return a * 2; } var x = f(3); print x;"
+    tokens = RegexScanner(source).scan()
+    stmts: list[Stmt] = Parser(tokens, pass_error).parse()
+    assert [type(stmt) for stmt in stmts] == [
+        type(stmt) for stmt in get_stmts(source)
+    ]
+
+
+def test_declarations_are_parsed_on_demand():
+    scanned: list[Token] = []
+
+    def tokens():
+        for token in RegexScanner("var a = 1; var b = 2;").scan():
+            scanned.append(token)
+            yield token
+
+    declarations = Parser(tokens(), pass_error).declarations()
+    first: Stmt = next(declarations)
+    assert isinstance(first, VarStmt) and first.name.lexeme == "a"
+    # Only the first declaration and the token after it have been scanned
+    assert [token.lexeme for token in scanned] == ["var", "a", "=", 1.0, ";", "var"]
+    assert next(declarations).name.lexeme == "b"
+    assert next(declarations, None) is None
+
+
+def parse_expression(txt: str):
+    stmt: Stmt = get_stmts(txt + ";")[0]
+    assert isinstance(stmt, ExpressionStmt)
+    return stmt.expression
+
+
+def shape(expr: Expr) -> str:
+    """The tree as nested parentheses, operators by their token type"""
+    if isinstance(expr, AssignExpr):
+        return f"(= {expr.name.lexeme} {shape(expr.value)})"
+    if isinstance(expr, BinaryExpr) or isinstance(expr, LogicalExpr):
+        operator: str = expr.operator.type.name
+        return f"({operator} {shape(expr.left)} {shape(expr.right)})"
+    if isinstance(expr, UnaryExpr):
+        return f"({expr.operator.type.name} {shape(expr.right)})"
+    if isinstance(expr, CallExpr):
+        arguments: str = "".join(f" {shape(argument)}" for argument in expr.arguments)
+        return f"(call {shape(expr.callee)}{arguments})"
+    if isinstance(expr, GetExpr):
+        return f"(. {shape(expr.object)} {expr.name.lexeme})"
+    if isinstance(expr, VariableExpr):
+        return expr.name.lexeme
+    assert isinstance(expr, LiteralExpr)
+    return str(expr.value)
+
+
+def test_precedence_and_associativity():
+    expr: Expr = parse_expression("a = b = !c or d and e == f < g - h / -i(j).k")
+    assert shape(expr) == (
+        "(= a (= b (OR (BANG c) (AND d (EQUAL_EQUAL e (LESS f "
+        "(MINUS g (SLASH h (MINUS (. (call i j) k))))))))))"
+    )
+    assert shape(parse_expression("1 - 2 - 3")) == "(MINUS (MINUS 1.0 2.0) 3.0)"
+
+
+def test_invalid_assignment_target():
+    errors: list[str] = []
+    tokens: list[Token] = RegexScanner("a + b = c;").scan_tokens()
+    Parser(tokens, lambda token, msg: errors.append(msg)).parse()
+    assert errors == ["Invalid assignment target."]
+
+
+def test_deep_nesting():
+    assert parse_expression("(" * 300 + "1" + ")" * 300) is not None
+    assert parse_expression("-" * 5000 + "1") is not None
+    assert parse_expression("a = " * 5000 + "1") is not None
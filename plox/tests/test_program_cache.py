@@ -0,0 +1,93 @@
+import os
+import sys
+
+sys.path.append("./src")
+import pytest
+
+import main
+import program_cache
+from main import Lox
+
+SCRIPT = """
+fun counter() {
+    var count = 0;
+    fun add() { count = count + 1; return count; }
+    return add;
+}
+var add = counter();
+add();
+print add();
+"""
+
+
+def write(path, source: str) -> str:
+    path.write_text(source)
+    return str(path)
+
+
+def run(script: str, capsys, **kwargs) -> str:
+    Lox(script, **kwargs).run_file()
+    return capsys.readouterr().out
+
+
+def scanning_fails(monkeypatch) -> None:
+    def fail(source):
+        raise AssertionError("scanned a cached script")
+
+    monkeypatch.setattr(main, "RegexScanner", fail)
+
+
+def test_second_run_skips_compiling(tmp_path, capsys, monkeypatch):
+    script: str = write(tmp_path / "counter.lox", SCRIPT)
+    assert run(script, capsys) == "2\n"
+    assert os.path.exists(tmp_path / "__pycache__" / "counter.loxc")
+
+    scanning_fails(monkeypatch)
+    assert run(script, capsys) == "2\n"
+    assert run(script, capsys, engine="vm") == "2\n"
+
+
+def test_changed_script_is_compiled_again(tmp_path, capsys):
+    script: str = write(tmp_path / "counter.lox", SCRIPT)
+    run(script, capsys)
+    write(tmp_path / "counter.lox", SCRIPT + "print add();\n")
+    assert run(script, capsys) == "2\n3\n"
+
+
+def test_no_cache(tmp_path, capsys, monkeypatch):
+    script: str = write(tmp_path / "counter.lox", SCRIPT)
+    assert run(script, capsys, cache=False) == "2\n"
+    assert not os.path.exists(program_cache.cache_path(script))
+
+    run(script, capsys)
+    scanning_fails(monkeypatch)
+    with pytest.raises(AssertionError, match="scanned a cached script"):
+        run(script, capsys, cache=False)
+
+
+def test_corrupt_cache_is_ignored(tmp_path, capsys):
+    script: str = write(tmp_path / "counter.lox", SCRIPT)
+    run(script, capsys)
+    path: str = program_cache.cache_path(script)
+    with open(path, "r+b") as file:
+        file.seek(40)
+        file.write(b"garbage")
+
+    assert run(script, capsys) == "2\n"
+    # Rewritten whole, without leftover temporary files
+    assert os.listdir(os.path.dirname(path)) == ["counter.loxc"]
+    assert run(script, capsys) == "2\n"
+
+
+def test_key_follows_source_and_plox():
+    key: bytes = program_cache.cache_key("print 1;")
+    assert key == program_cache.cache_key(b"print 1;")
+    assert key != program_cache.cache_key("print 2;")
+
+    program_cache.plox_version.cache_clear()
+    try:
+        program_cache.FORMAT += 1
+        assert key != program_cache.cache_key("print 1;")
+    finally:
+        program_cache.FORMAT -= 1
+        program_cache.plox_version.cache_clear()
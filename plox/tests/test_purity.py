@@ -0,0 +1,135 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from closure_compiler import ClosureInterpreter
+from interpreter import Interpreter
+from loxcallable import Memo
+from main import Lox
+from purity import Purity
+from resolver import Resolver
+from scanner import Scanner
+from stackless import StacklessInterpreter
+from stmt import FunctionStmt, Stmt
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def analyze(txt: str) -> dict[str, bool]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    stmts: list[Stmt] = Parser(scanner.tokens, pass_error).parse()
+    Resolver(Interpreter(pass_error)).resolve(stmts)
+    Purity().analyze(stmts)
+    return {
+        stmt.name.lexeme: stmt.pure for stmt in stmts if isinstance(stmt, FunctionStmt)
+    }
+
+
+def run_memoized(interpreter: Interpreter, txt: str) -> Interpreter:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    stmts: list[Stmt] = Parser(scanner.tokens, pass_error).parse()
+    Resolver(interpreter).resolve(stmts)
+    Purity().analyze(stmts)
+    interpreter.interpret(stmts)
+    return interpreter
+
+
+def test_pure_functions():
+    assert analyze(
+        """fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fun sum(n) {
+            var t = 0; for (var i = 0; i < n; i = i + 1) { t = t + i; } return t;
+        }
+        fun twice(n) { return sum(n) + sum(n); }"""
+    ) == {"fib": True, "sum": True, "twice": True}
+
+
+def test_impure_functions():
+    assert analyze(
+        """var k = 1;
+        fun reads(n) { return n + k; }
+        fun writes(n) { k = n; }
+        fun prints(n) { print n; }
+        fun time() { return clock(); }
+        fun calls(n) { return prints(n); }
+        fun nested() { fun inner() { return 1; } return inner(); }
+        fun sets(o) { o.x = 1; }
+        fun reassigned() { return 1; }
+        reassigned = nil;"""
+    ) == {
+        "reads": False,
+        "writes": False,
+        "prints": False,
+        "time": False,
+        "calls": False,
+        "nested": False,
+        "sets": False,
+        "reassigned": False,
+    }
+
+
+@pytest.mark.parametrize(
+    "engine", [Interpreter, ClosureInterpreter, StacklessInterpreter]
+)
+def test_memoized_results(capsys, engine):
+    interpreter = run_memoized(
+        engine(pass_error, memo_size=8),
+        """fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fun same(x) { return x; }
+        print fib(20); print same(true);
+        print same(1); print same(-0); print same(0);""",
+    )
+    assert capsys.readouterr().out == "6765\nTrue\n1\n-0\n0\n"
+    fib: Memo = interpreter.memos[0]
+    assert (fib.hits, fib.misses, fib.evictions) == (18, 21, 13)
+
+
+@pytest.mark.parametrize(
+    "engine", [Interpreter, ClosureInterpreter, StacklessInterpreter]
+)
+def test_closures_share_a_memo(capsys, engine):
+    interpreter = run_memoized(
+        engine(pass_error, memo_size=8),
+        """fun outer(n) { fun square(x) { return x * x; } return square(n) + 0; }
+        var total = 0;
+        for (var i = 0; i < 30; i = i + 1) total = total + outer(2);
+        print total;""",
+    )
+    assert capsys.readouterr().out == "120\n"
+    assert len(interpreter.memos) == 1
+    square: Memo = interpreter.memos[0]
+    assert (square.hits, square.misses) == (29, 1)
+
+
+@pytest.mark.parametrize(
+    "engine", [Interpreter, ClosureInterpreter, StacklessInterpreter]
+)
+def test_tail_calls_are_memoized(capsys, engine):
+    interpreter = run_memoized(
+        engine(pass_error, memo_size=8),
+        """fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+        fun first(n) { return fib(n); }
+        fun count(n, acc) { if (n == 0) return acc; return count(n - 1, acc + 1); }
+        print first(15); print fib(15); print count(10, 0); print count(2, 8);""",
+    )
+    assert capsys.readouterr().out == "610\n610\n10\n10\n"
+    fib, _, count = interpreter.memos
+    assert Memo.key([15.0]) in fib.results
+    assert (count.hits, count.misses) == (1, 11)
+
+
+def test_vm_does_not_memoize():
+    with pytest.raises(Exception, match="not the vm"):
+        Lox(engine="vm", memo_size=8)
+
+
+def test_memo_key():
+    assert Memo.key([1.0]) != Memo.key([True])
+    assert Memo.key([-0.0]) is None
+    assert Memo.key([[]]) is None
@@ -0,0 +1,104 @@
+import mmap
+import random
+import sys
+
+sys.path.append("./src")
+import pytest
+
+from _token import Token
+from main import Lox
+from regex_scanner import RegexScanner
+from scanner import Scanner
+
+SOURCES = [
+    "",
+    "12",
+    "1.5",
+    "x = 12",
+    "a.b",
+    "2 * 3",
+    "a != b == c <= d >= e < f > g ! h = i",
+    '"a\n"',
+    '"a\nb\n" x',
+    "// comment\nx",
+    "// comment",
+    "x // comment\ny\nz",
+    "  \t\r\n\n var\tx = 1;\n",
+    "class A < B { init() { this.x = super.y; } }",
+    "fun f(a, b) { return a + -b / 2; }",
+    "for (var i = 0; i < 10; i = i + 1) print i;",
+    "if (true and false or nil) print 1.; else print .5;",
+    "_private and_ forest",
+    'print "h\u00e9llo \u2603";',
+]
+
+
+def fields(tokens: list[Token]) -> list[tuple]:
+    return [(t.type, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+def scan(scanner: type, source: str) -> list[tuple] | str:
+    try:
+        return fields(scanner(source).scan_tokens())
+    except Exception as e:
+        return str(e)
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_matches_scanner(source: str):
+    assert scan(RegexScanner, source) == scan(Scanner, source)
+    assert scan(RegexScanner, source.encode()) == scan(Scanner, source)
+
+
+def test_matches_scanner_on_random_sources():
+    pieces: list[str] = [
+        "var", "x", "_y1", "print", "12", "3.25", "7.", '"s"', '"a\nb"', "(",
+        ")", "{", "}", ",", ".", "-", "+", ";", "*", "/", "!", "!=", "=",
+        "==", "<", "<=", ">", ">=", " ", "\t", "\n", "\r", "// c\n",
+    ]  # fmt: skip
+    generator: random.Random = random.Random(20)
+    for _ in range(2000):
+        source: str = "".join(
+            generator.choice(pieces) for _ in range(generator.randint(0, 30))
+        )
+        assert scan(RegexScanner, source) == scan(Scanner, source), source
+        assert scan(RegexScanner, source.encode()) == scan(Scanner, source), source
+
+
+def test_identifiers_are_interned():
+    tokens: list[Token] = RegexScanner("var alpha = alpha + beta;").scan_tokens()
+    assert tokens[1].lexeme is tokens[3].lexeme
+    assert tokens[1].lexeme is sys.intern("alpha")
+
+
+@pytest.mark.parametrize(
+    "source, message",
+    [
+        ("var a = 1 @ 2;", "Found unknown token @"),
+        ("var \u00e9 = 1;", "Found unknown token \u00e9"),
+        ('"open', "Unterminated string"),
+    ],
+)
+def test_errors(source: str, message: str):
+    with pytest.raises(Exception, match=message):
+        RegexScanner(source).scan_tokens()
+    with pytest.raises(Exception, match=message):
+        RegexScanner(source.encode()).scan_tokens()
+
+
+def test_scans_a_memory_mapped_file(tmp_path):
+    source: str = 'var greeting = "h\u00e9llo";\nprint greeting . size * 2;\n'
+    path = tmp_path / "script.lox"
+    path.write_text(source, encoding="utf-8")
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert scan(RegexScanner, mapped) == scan(Scanner, source)
+
+
+def test_run_file_closes_its_map(tmp_path, capsys):
+    path = tmp_path / "script.lox"
+    path.write_text("print 1;\n")
+    lox: Lox = Lox(str(path), cache=False)
+    lox.run_file()
+    assert capsys.readouterr().out == "1\n"
+    assert lox.input.closed
@@ -24,7 +24,7 @@ def resolve(txt: str):
     resolver: Resolver = Resolver(interpreter)
     return interpreter
     LOGGER.info(
-        "resolved", locals=interpreter.locals, globals=interpreter.globals.values
+        "resolved", globals=interpreter.globals.values
     )
 
 
@@ -39,3 +39,76 @@ fun fib(n) {
 print fib(5);
             """
     )
+
+
+def resolve_program(txt: str) -> tuple[Interpreter, list[Stmt]]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    stmts: list[Stmt] = Parser(scanner.tokens, Lox.error).parse()
+    interpreter: Interpreter = Interpreter(Lox.error)
+    Resolver(interpreter).resolve(stmts)
+    return interpreter, stmts
+
+
+def test_slots_follow_declaration_order():
+    _, stmts = resolve_program(
+        """
+fun f(a, b) {
+    var c = a;
+    { var d = b; print c + d; }
+}
+"""
+    )
+    function: FunctionStmt = stmts[0]
+    c: VarStmt = function.body[0]
+    block: BlockStmt = function.body[1]
+    d: VarStmt = block.statements[0]
+    printed = block.statements[1].expression
+
+    def local(expr):
+        return (expr.depth, expr.slot)
+
+    assert local(c.initializer) == (0, 0)
+    assert local(d.initializer) == (1, 1)
+    assert local(printed.left) == (1, 2)
+    assert local(printed.right) == (0, 0)
+
+
+def test_globals_are_not_annotated():
+    _, stmts = resolve_program("var a = 1; { print a; }")
+    assert stmts[1].statements[0].expression.depth is None
+
+
+def test_shadowing_ends_with_its_scope():
+    _, stmts = resolve_program(
+        """
+{
+    var x = 0;
+    var a = 1;
+    { var a = 2; print a; }
+    print a;
+}
+"""
+    )
+    outer: BlockStmt = stmts[0]
+    inner: BlockStmt = outer.statements[2]
+    shadowing = inner.statements[1].expression
+    shadowed = outer.statements[3].expression
+    assert (shadowing.depth, shadowing.slot) == (0, 0)
+    assert (shadowed.depth, shadowed.slot) == (0, 1)
+
+
+def test_deeply_nested_reference():
+    depth: int = 100
+    _, stmts = resolve_program(
+        "{ var a = 0; "
+        + "{ var b = 0; " * depth
+        + "print a + b;"
+        + " }" * (depth + 1)
+    )
+    block: BlockStmt = stmts[0]
+    for _ in range(depth):
+        block = block.statements[1]
+    printed = block.statements[1].expression
+    assert (printed.left.depth, printed.left.slot) == (depth, 0)
+    assert (printed.right.depth, printed.right.slot) == (0, 0)
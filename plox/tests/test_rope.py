@@ -0,0 +1,66 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+from _token import Token
+from interpreter import Interpreter
+from resolver import Resolver
+from rope import MIN_ROPE, Rope, concat
+from scanner import Scanner
+from stmt import Stmt
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def run_code(txt: str):
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    tokens: list[Token] = scanner.tokens
+    stmts: list[Stmt] = Parser(tokens, pass_error).parse()
+    interpreter: Interpreter = Interpreter(pass_error)
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def test_short_strings_stay_flat():
+    assert type(concat("a", "b")) is str
+    assert type(concat("a" * MIN_ROPE, "b")) is Rope
+
+
+def test_deep_rope_flattens():
+    s = "a" * MIN_ROPE
+    for _ in range(100000):
+        s = concat(s, "bc")
+    for _ in range(100000):
+        s = concat("de", s)
+    expected = "de" * 100000 + "a" * MIN_ROPE + "bc" * 100000
+    assert len(s) == len(expected)
+    assert str(s) == expected
+    assert s.left is None and s.right is None
+
+
+def test_rope_acts_like_str():
+    rope = concat("a" * MIN_ROPE, "b")
+    same = concat("a", "a" * (MIN_ROPE - 1) + "b")
+    assert rope == same and same == rope
+    assert rope == "a" * MIN_ROPE + "b" and "a" * MIN_ROPE + "b" == rope
+    assert rope != "a" and not rope != same
+    # Rope's own __ne__ is what's tested, not an identity check
+    assert rope != 1.0 and rope != None and rope != True  # noqa: E711, E712
+    assert hash(rope) == hash(str(same))
+    assert {rope: 1}["a" * MIN_ROPE + "b"] == 1
+
+
+def test_strings_built_in_a_loop(capsys):
+    run_code(
+        """var s = "a";
+        for (var i = 0; i < 300; i = i + 1) s = s + "bc";
+        var t = "a";
+        for (var i = 0; i < 300; i = i + 1) t = t + "b" + "c";
+        print s == t; print s != t; print s == "a"; print s + "!" == t + "!";
+        print t;"""
+    )
+    assert capsys.readouterr().out == "True\nFalse\nFalse\nTrue\na" + "bc" * 300 + "\n"
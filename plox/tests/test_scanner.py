@@ -422,5 +422,16 @@ def test_keywords():
     assert scanner.tokens[22].type == TokenType.EOF
 
 
+def test_identifiers_are_interned():
+    scanner = get_tokens("var total = 1; total = total + 1; var totals;")
+    names = [
+        token.lexeme for token in scanner.tokens if token.type == TokenType.IDENTIFIER
+    ]
+
+    assert len(names) == 4
+    assert names[0] is names[1] is names[2]
+    assert names[3] == "totals"
+
+
 if __name__ == "__main__":
     test_keywords()
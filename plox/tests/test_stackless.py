@@ -0,0 +1,107 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from _token import Token
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stackless import StacklessInterpreter
+from stmt import Stmt
+
+PROGRAMS = [
+    "var a = 2 - 1;print a;",
+    """for (var i = 0; i < 5; i = i + 1) {
+        print i;
+        }""",
+    "fun fib(n) {if (n < 2){return n;}return fib(n - 2) + fib(n - 1);} print fib(10);",
+    "print (1 + 2) * 3 / 4 - -1; print 1 == 1; print 1 != 1; print nil or 2;",
+    """var a = "global";
+    {
+        fun show() { print a; }
+        show();
+        var a = "block";
+        show();
+    }""",
+    """class Doughnut {
+        cook() { return "Fry until golden brown."; }
+    }
+    class BostonCream < Doughnut {
+        init(filling) { this.filling = filling; }
+        cook() { return super.cook() + " " + this.filling; }
+    }
+    var b = BostonCream("custard");
+    print b.cook(); print b; print BostonCream;""",
+    """var keep = nil;
+    for (var i = 0; i < 3; i = i + 1) { fun f() { print i; } if (i == 1) keep = f; }
+    keep();
+    for (var i = 0; i < 10; i = i + 1) { if (i == 2) i = 7; print i; }
+    var limit = 2;
+    for (var i = 5; i > 0; i = i - 1.5) { if (i < 3) limit = 0; print i; }
+    for (var i = 0; i <= limit; i = i + 0.5) print i;
+    fun first(n) { for (;;) { if (n > 3) return n; n = n + 1; } }
+    print first(0);""",
+    """fun count(n) { if (n > 0) count(n - 1); else print "bottom"; }
+    count(3); var x = 1; x = count(2); print x;""",
+]
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def run_code(interpreter: Interpreter, txt: str):
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    tokens: list[Token] = scanner.tokens
+    parser: Parser = Parser(tokens, pass_error)
+    stmts: list[Stmt] = parser.parse()
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def test_deep_recursion(capsys):
+    run_code(
+        StacklessInterpreter(pass_error),
+        """fun sum(n) { if (n == 0) return 0; return n + sum(n - 1); }
+        class Node {
+            init(next) { this.next = next; }
+            length() { if (this.next == nil) return 1; return 1 + this.next.length(); }
+        }
+        var list = nil;
+        for (var i = 0; i < 20000; i = i + 1) list = Node(list);
+        print sum(20000); print list.length();""",
+    )
+    assert capsys.readouterr().out == "200010000\n20000\n"
+
+
+def test_tail_calls(capsys):
+    run_code(
+        StacklessInterpreter(pass_error),
+        """fun loop(n) { if (n == 0) return "done"; return loop(n - 1); }
+        class A { m(n) { if (n == 0) return clock() > 0; return this.m(n - 1); } }
+        print loop(50000); print A().m(50000);""",
+    )
+    assert capsys.readouterr().out == "done\nTrue\n"
+
+
+def test_runtime_error_unwinds():
+    errors = []
+    interpreter = StacklessInterpreter(lambda *args: errors.append(args))
+    run_code(
+        interpreter,
+        """fun down(n) { if (n == 0) return -"a"; return 1 + down(n - 1); }
+        down(100);""",
+    )
+    assert len(errors) == 1
+    assert interpreter.environment is interpreter.globals
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_matches_interpreter(capsys, program):
+    run_code(Interpreter(pass_error), program)
+    expected = capsys.readouterr().out
+    run_code(StacklessInterpreter(pass_error), program)
+    assert capsys.readouterr().out == expected
@@ -0,0 +1,48 @@
+import sys
+
+sys.path.append("./src")
+import pytest
+
+from main import ENGINES, Lox
+
+PROGRAM = """
+fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+class Counter {
+    init() { this.count = 0; }
+    add(n) { this.count = this.count + n; return this; }
+}
+var counter = Counter();
+for (var i = 0; i < 10; i = i + 1) counter.add(fib(i));
+{
+    var local = counter.count;
+    fun twice() { return local * 2; }
+    print twice();
+}
+print counter.count;
+"""
+
+
+def run(source: str, engine: str, stream: bool) -> None:
+    lox: Lox = Lox(engine=engine, stream=stream)
+    lox.input = source
+    lox._run()
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_stream_matches_whole_program(engine: str, capsys):
+    run(PROGRAM, engine, False)
+    whole: str = capsys.readouterr().out
+    run(PROGRAM, engine, True)
+    assert capsys.readouterr().out == whole == "176\n88\n"
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "vm"])
+def test_runtime_error_stops_the_stream(engine: str, capsys):
+    run('print 1;\nprint 1 - "a";\nprint 2;\n', engine, True)
+    out: str = capsys.readouterr().out
+    assert out.startswith("1\n") and "Error" in out and "2\n" not in out
+
+
+def test_stream_cant_memoize():
+    with pytest.raises(Exception, match="can't stream"):
+        Lox(stream=True, memo_size=16)
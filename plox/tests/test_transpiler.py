@@ -0,0 +1,127 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from _token import Token
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stmt import Stmt
+from transpiler import Transpiler
+
+PROGRAMS = [
+    "var a = 2 - 1;print a;",
+    "fun fib(n) {if (n < 2){return n;}return fib(n - 2) + fib(n - 1);} print fib(10);",
+    "print (1 + 2) * 3 / 4 - -1; print 1 == 1; print nil or 2; print 0 and 3;",
+    "{ var a = 1; { var a = 2; print a; } print a; }",
+    """var a = "global";
+    {
+        fun show() { print a; }
+        show();
+        var a = "block";
+        show();
+    }""",
+    """fun counter() {
+        var c = 0;
+        fun inc() { c = c + 1; return c; }
+        return inc;
+    }
+    var f = counter(); f(); print f(); print f;""",
+    """var keep = nil;
+    for (var i = 0; i < 3; i = i + 1) {
+        var j = i;
+        fun get() { j = j + 10; return j; }
+        if (i == 1) keep = get;
+    }
+    print keep(); print keep();""",
+    """class Doughnut {
+        cook() { return "Fry until golden brown."; }
+    }
+    class BostonCream < Doughnut {
+        init(filling) { this.filling = filling; }
+        cook() { return super.cook() + " " + this.filling; }
+    }
+    var b = BostonCream("custard");
+    print b.cook(); print b; print BostonCream; print b.cook;""",
+    """var keep = nil;
+    for (var i = 0; i < 3; i = i + 1) { fun f() { print i; } if (i == 1) keep = f; }
+    keep();
+    for (var i = 0; i < 10; i = i + 1) { if (i == 2) i = 7; print i; }
+    var limit = 2;
+    for (var i = 5; i > 0; i = i - 1.5) { if (i < 3) limit = 0; print i; }
+    for (var i = 0; i <= limit; i = i + 0.5) print i;
+    fun first(n) { for (;;) { if (n > 3) return n; n = n + 1; } }
+    print first(0);""",
+    """class A { init(x) { this.x = x; } }
+    class B < A { init(x) { super.init(x * 2); } }
+    print B(3).x;
+    var b = B(1); print b.init(5).x;""",
+]
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def run_interpreter(txt: str):
+    stmts: list[Stmt] = parse(txt)
+    interpreter: Interpreter = Interpreter(error=pass_error)
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def parse(txt: str) -> list[Stmt]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    tokens: list[Token] = scanner.tokens
+    parser: Parser = Parser(tokens, pass_error)
+    return parser.parse()
+
+
+def transpile(txt: str) -> str:
+    stmts: list[Stmt] = parse(txt)
+    interpreter: Interpreter = Interpreter(error=pass_error)
+    Resolver(interpreter).resolve(stmts)
+    return Transpiler().transpile(stmts)
+
+
+def run_transpiled(txt: str):
+    module: dict = {"__name__": "lox_test"}
+    exec(compile(transpile(txt), "<lox>", "exec"), module)
+    module["run"]()
+
+
+def test_quick_maths(capsys):
+    run_transpiled("var a = 2 - 1;print a;")
+    captured = capsys.readouterr()
+    assert captured.out == "1\n"
+
+
+def test_locals_become_python_locals():
+    code: str = transpile("fun f(n) { var m = n; return m; }")
+    assert "def g_f(v_n_1):" in code
+    assert "v_m_2 = v_n_1" in code
+
+
+def test_classes_get_slots():
+    code: str = transpile("class A { init(x) { this.x = x; } }")
+    assert "__slots__ = (\"f_x\", )" in code
+
+
+@pytest.mark.parametrize(
+    "program",
+    ['var a = "s"; a.x = 2; print "after";', 'fun f() {} f.x = 3; print "after";'],
+)
+def test_set_on_non_instance(capsys, program):
+    run_transpiled(program)
+    assert capsys.readouterr().out == "[line 1] Error  : Only instances have fields\n"
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_matches_interpreter(capsys, program):
+    run_interpreter(program)
+    expected = capsys.readouterr().out
+    run_transpiled(program)
+    assert capsys.readouterr().out == expected
@@ -0,0 +1,112 @@
+import sys
+
+sys.path.append("./src")
+from parser import Parser
+
+import pytest
+from _token import Token
+from bytecode import OpCode
+from compiler import Compiler
+from interpreter import Interpreter
+from resolver import Resolver
+from scanner import Scanner
+from stmt import Stmt
+from vm import VM
+
+PROGRAMS = [
+    "var a = 2 - 1;print a;",
+    """for (var i = 0; i < 5; i = i + 1) {
+        print i;
+        }""",
+    "fun fib(n) {return n;}var a = 5; print fib(a + 2);",
+    "fun fib(n) {if (n < 2){return n;}return fib(n - 2) + fib(n - 1);} print fib(5);",
+    "print (1 + 2) * 3 / 4 - -1; print 1 == 1; print 1 != 1; print nil or 2;",
+    "var i = 0; while (i < 3) { print i; i = i + 1; }",
+    """fun counter() {
+        var c = 0;
+        fun inc() { c = c + 1; return c; }
+        return inc;
+    }
+    var f = counter(); f(); print f(); print f;""",
+    """class Doughnut {
+        cook() { return "Fry until golden brown."; }
+    }
+    class BostonCream < Doughnut {
+        init(filling) { this.filling = filling; }
+        cook() { return super.cook() + " " + this.filling; }
+    }
+    var b = BostonCream("custard");
+    print b.cook(); print b; print BostonCream;""",
+    """var keep = nil;
+    for (var i = 0; i < 3; i = i + 1) { fun f() { print i; } if (i == 1) keep = f; }
+    keep();
+    for (var i = 0; i < 10; i = i + 1) { if (i == 2) i = 7; print i; }
+    var limit = 2;
+    for (var i = 5; i > 0; i = i - 1.5) { if (i < 3) limit = 0; print i; }
+    for (var i = 0; i <= limit; i = i + 0.5) print i;
+    fun first(n) { for (;;) { if (n > 3) return n; n = n + 1; } }
+    print first(0);""",
+    """var s = "a";
+    for (var i = 0; i < 300; i = i + 1) s = s + "bc";
+    var t = "a";
+    for (var i = 0; i < 300; i = i + 1) t = t + "b" + "c";
+    print s == t; print s != t; print s + "!" == "!"; print t;""",
+]
+
+
+def pass_error(*args, **kwargs):
+    pass
+
+
+def parse(txt: str) -> list[Stmt]:
+    scanner: Scanner = Scanner(txt)
+    scanner.scan_tokens()
+    tokens: list[Token] = scanner.tokens
+    parser: Parser = Parser(tokens, pass_error)
+    return parser.parse()
+
+
+def run_vm(txt: str):
+    stmts: list[Stmt] = parse(txt)
+    compiler: Compiler = Compiler(pass_error)
+    Resolver(compiler).resolve(stmts)
+    VM(pass_error).interpret(compiler.compile(stmts))
+
+
+def run_interpreter(txt: str):
+    stmts: list[Stmt] = parse(txt)
+    interpreter: Interpreter = Interpreter(error=pass_error)
+    Resolver(interpreter).resolve(stmts)
+    interpreter.interpret(stmts)
+
+
+def test_quick_maths(capsys):
+    run_vm("var a = 2 - 1;print a;")
+    captured = capsys.readouterr()
+    assert captured.out == "1\n"
+
+
+def test_invoke_is_compiled():
+    stmts: list[Stmt] = parse("class A { f() {} } A().f();")
+    compiler: Compiler = Compiler(pass_error)
+    Resolver(compiler).resolve(stmts)
+    code: list[int] = compiler.compile(stmts).chunk.code
+    assert OpCode.OP_INVOKE in code
+    assert OpCode.OP_GET_PROPERTY not in code
+
+
+def test_runtime_error():
+    errors = []
+    stmts: list[Stmt] = parse('print "a" - 1;')
+    compiler: Compiler = Compiler(pass_error)
+    Resolver(compiler).resolve(stmts)
+    VM(lambda *args: errors.append(args)).interpret(compiler.compile(stmts))
+    assert errors == [(1, "Operands must be numbers.")]
+
+
+@pytest.mark.parametrize("program", PROGRAMS)
+def test_matches_interpreter(capsys, program):
+    run_interpreter(program)
+    expected = capsys.readouterr().out
+    run_vm(program)
+    assert capsys.readouterr().out == expected